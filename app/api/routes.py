@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 from datetime import datetime
@@ -6,10 +7,16 @@ from datetime import datetime
 from app.database import get_db
 from app.models.report import Report, ReportCreate, ReportUpdate, ReportResponse
 from app.services.processor import processor
+from app.transforms import RecordError
+from app.services.agworld_async_client import async_agworld_client
+from app.services.agworld_client import AgworldResource
+from app.services.sync_engine import sync_engine
+from app.services.bulk_sync import bulk_sync
 from app.services.reporter import reporter
 from app.services.notifier import notifier
 from app.scheduler.poller import task_scheduler, agworld_poller
 from app.redis_client import redis_client
+from app.redis_async_client import async_redis_client
 from app.utils.logger import get_logger
 
 # Create router
@@ -30,7 +37,7 @@ async def health_check():
             db_status = "error"
         
         # Check Redis connection
-        redis_status = "ok" if redis_client.ping() else "error"
+        redis_status = "ok" if await async_redis_client.ping() else "error"
         
         # Check scheduler status
         scheduler_status = "running" if task_scheduler.is_running else "stopped"
@@ -42,12 +49,35 @@ async def health_check():
                 "database": db_status,
                 "redis": redis_status,
                 "scheduler": scheduler_status
-            }
+            },
+            "redis_circuit": redis_client.breaker.stats(),
+            "memory_cache": redis_client.memory_cache.stats(),
+            "local_cache": redis_client.local_cache.stats()
         }
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
         raise HTTPException(status_code=500, detail="Health check failed")
 
+# Cache metrics endpoints
+@router.get("/cache/metrics")
+async def get_cache_metrics():
+    """Cache hit ratio, latency and payload sizes per key namespace"""
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "namespaces": redis_client.metrics.snapshot(),
+        "processor": processor.cache_stats(),
+        "memory_cache": redis_client.memory_cache.stats(),
+        "local_cache": redis_client.local_cache.stats()
+    }
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """Cache metrics in the Prometheus text format"""
+    return PlainTextResponse(
+        redis_client.metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
 # Reports endpoints
 @router.get("/reports", response_model=List[ReportResponse])
 async def get_reports(
@@ -136,16 +166,132 @@ async def process_data(
 ):
     """Process raw data"""
     try:
-        processed_data = processor.process_agworld_data(data, data_type)
+        processed_data = await processor.process_agworld_data_async(data, data_type)
         return {
             "success": True,
-            "processed_data": processed_data,
+            "processed_data": processed_data.to_dict(),
             "message": f"Successfully processed {data_type} data"
         }
     except Exception as e:
         logger.error(f"Failed to process data: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to process data")
 
+@router.post("/data/process/batch")
+async def process_data_batch(
+    records: List[Dict[str, Any]],
+    data_type: str = "generic"
+):
+    """Process a list of raw records of one type"""
+    try:
+        results = await processor.process_batch_async(records, data_type, errors="collect")
+        errors = [
+            {"index": result.index, "error": result.message}
+            for result in results if isinstance(result, RecordError)
+        ]
+        return {
+            "success": not errors,
+            "processed_data": [
+                result.to_dict() for result in results if not isinstance(result, RecordError)
+            ],
+            "errors": errors,
+            "message": f"Processed {len(records) - len(errors)} of {len(records)} {data_type} records"
+        }
+    except Exception as e:
+        logger.error(f"Failed to process data batch: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to process data batch")
+
+# Agworld data endpoints
+@router.get("/agworld/snapshot")
+async def get_agworld_snapshot(
+    company_id: Optional[str] = None,
+    season_id: Optional[str] = None
+):
+    """Fetch all Agworld collections for a company concurrently"""
+    try:
+        snapshot = await async_agworld_client.fetch_company_snapshot(company_id, season_id)
+        return {
+            "company_id": company_id,
+            "season_id": season_id,
+            "counts": {name: len(records) for name, records in snapshot.items()},
+            "data": snapshot
+        }
+    except Exception as e:
+        logger.error(f"Failed to fetch Agworld snapshot: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch Agworld snapshot")
+
+@router.post("/agworld/cache/{resource}/invalidate")
+async def invalidate_agworld_cache(resource: str):
+    """Invalidate every cached Agworld collection of one resource type"""
+    try:
+        resource = AgworldResource(resource).value
+    except ValueError:
+        raise HTTPException(status_code=404, detail=f"Unknown Agworld resource: {resource}")
+    try:
+        generation = await async_redis_client.invalidate_namespace(f"agworld:{resource}")
+        return {"success": True, "resource": resource, "generation": generation}
+    except Exception as e:
+        logger.error(f"Failed to invalidate Agworld cache for {resource}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to invalidate cache")
+
+@router.post("/sync/bulk")
+async def trigger_bulk_sync(
+    background_tasks: BackgroundTasks,
+    company_ids: Optional[List[str]] = None,
+    season_id: Optional[str] = None
+):
+    """Start a parallel sync of many companies"""
+    try:
+        run_id = bulk_sync.new_run_id()
+        background_tasks.add_task(bulk_sync.sync_companies, company_ids, season_id, run_id)
+        return {
+            "success": True,
+            "run_id": run_id,
+            "message": f"Started bulk sync of {len(company_ids) if company_ids else 'all'} companies"
+        }
+    except Exception as e:
+        logger.error(f"Failed to start bulk sync: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to start bulk sync")
+
+@router.get("/sync/bulk/{run_id}")
+async def get_bulk_sync_progress(run_id: str):
+    """Get per-company progress of a bulk sync run"""
+    try:
+        progress = await bulk_sync.get_progress_async(run_id)
+        if not progress:
+            raise HTTPException(status_code=404, detail="Bulk sync run not found")
+        return progress
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get bulk sync progress for {run_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get bulk sync progress")
+
+@router.post("/sync/{company_id}")
+async def trigger_sync(
+    company_id: str,
+    background_tasks: BackgroundTasks,
+    full: bool = False
+):
+    """Start an incremental sync for a company"""
+    try:
+        background_tasks.add_task(sync_engine.sync_company, company_id, full)
+        return {
+            "success": True,
+            "message": f"Started {'full' if full else 'incremental'} sync for company {company_id}"
+        }
+    except Exception as e:
+        logger.error(f"Failed to start sync for company {company_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to start sync")
+
+@router.get("/sync/{company_id}/status")
+async def get_sync_status(company_id: str):
+    """Get sync watermarks and the last sync result for a company"""
+    try:
+        return await sync_engine.get_status_async(company_id)
+    except Exception as e:
+        logger.error(f"Failed to get sync status for company {company_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get sync status")
+
 @router.post("/reports/generate")
 async def generate_report_endpoint(
     background_tasks: BackgroundTasks,
@@ -230,41 +376,25 @@ async def get_polling_status():
     try:
         status_data = {}
         
-        # Get field polling status
-        field_status = redis_client.get("polling:fields:status") or "unknown"
-        field_last_run = redis_client.get("polling:fields:last_run")
-        field_error = redis_client.get("polling:fields:error")
-        
-        status_data["fields"] = {
-            "status": field_status,
-            "last_run": field_last_run,
-            "error": field_error
+        # Read the status of every job in one round trip
+        jobs = {
+            "fields": "polling:fields",
+            "activities": "polling:activities",
+            "daily_report": "report:daily"
         }
+        values = await async_redis_client.get_many(
+            f"{prefix}:{name}" for prefix in jobs.values() for name in ("status", "last_run", "error")
+        )
         
-        # Get activity polling status
-        activity_status = redis_client.get("polling:activities:status") or "unknown"
-        activity_last_run = redis_client.get("polling:activities:last_run")
-        activity_error = redis_client.get("polling:activities:error")
-        
-        status_data["activities"] = {
-            "status": activity_status,
-            "last_run": activity_last_run,
-            "error": activity_error
-        }
-        
-        # Get daily report status
-        report_status = redis_client.get("report:daily:status") or "unknown"
-        report_last_run = redis_client.get("report:daily:last_run")
-        report_error = redis_client.get("report:daily:error")
-        
-        status_data["daily_report"] = {
-            "status": report_status,
-            "last_run": report_last_run,
-            "error": report_error
-        }
+        for job, prefix in jobs.items():
+            status_data[job] = {
+                "status": values[f"{prefix}:status"] or "unknown",
+                "last_run": values[f"{prefix}:last_run"],
+                "error": values[f"{prefix}:error"]
+            }
         
         return status_data
-        
+    
     except Exception as e:
         logger.error(f"Failed to get polling status: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get polling status")
@@ -310,7 +440,7 @@ async def generate_report_background(
             logger.info("Background report generation completed successfully")
         else:
             logger.error(f"Background report generation failed: {result['errors']}")
-            
+    
     except Exception as e:
         logger.error(f"Background report generation error: {str(e)}")
 
@@ -0,0 +1,167 @@
+import bisect
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Upper bounds of the histogram buckets: operation latency in seconds and payload size in bytes
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+COUNTERS = ("hits", "l1_hits", "misses", "stale_serves", "sets", "deletes", "evictions", "errors")
+
+# Namespaces tracked separately; keys of any further namespace are counted under OTHER_NAMESPACE
+MAX_NAMESPACES = 256
+OTHER_NAMESPACE = "other"
+
+def key_namespace(key: str, depth: int = 2) -> str:
+    """Key family used to group metrics, e.g. ``agworld:fields`` or ``polling:activities``"""
+    return ":".join(key.split(":", depth)[:depth])
+
+def escape_label(value: str) -> str:
+    """Escape a label value for the Prometheus text format"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Histogram:
+    """Fixed-bucket histogram in the Prometheus style"""
+    
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(upper bound, cumulative count) pairs ending with +Inf"""
+        total = 0
+        result = []
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else 0.0,
+            "buckets": dict(self.cumulative())
+        }
+
+class CacheMetrics:
+    """Thread-safe cache counters and histograms grouped by key namespace.
+    
+    At most ``max_namespaces`` namespaces are tracked, so keys derived from
+    request input cannot create an unbounded number of series.
+    """
+    
+    def __init__(self, depth: int = 2, max_namespaces: int = MAX_NAMESPACES):
+        self.depth = depth
+        self.max_namespaces = max_namespaces
+        self._namespaces = set()
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._sizes: Dict[Tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+    
+    def namespace(self, key: str) -> str:
+        return key_namespace(key, self.depth)
+    
+    def _tracked(self, namespace: str) -> str:
+        # Caller holds the lock
+        if namespace not in self._namespaces:
+            if len(self._namespaces) >= self.max_namespaces:
+                return OTHER_NAMESPACE
+            self._namespaces.add(namespace)
+        return namespace
+    
+    def incr(self, key: str, counter: str, amount: int = 1):
+        """Increment a counter of the namespace ``key`` belongs to"""
+        namespace = self.namespace(key)
+        with self._lock:
+            namespace = self._tracked(namespace)
+            counters = self._counters.get(namespace)
+            if counters is None:
+                counters = self._counters[namespace] = dict.fromkeys(COUNTERS, 0)
+            counters[counter] = counters.get(counter, 0) + amount
+    
+    def observe_latency(self, keys: Iterable[str], operation: str, seconds: float):
+        """Record how long an operation took for every namespace it touched"""
+        namespaces = {self.namespace(key) for key in keys}
+        with self._lock:
+            for namespace in {self._tracked(namespace) for namespace in namespaces}:
+                histogram = self._latency.get((namespace, operation))
+                if histogram is None:
+                    histogram = self._latency[(namespace, operation)] = Histogram(LATENCY_BUCKETS)
+                histogram.observe(seconds)
+    
+    def observe_size(self, key: str, operation: str, size: int):
+        """Record the size of a payload read or written"""
+        namespace = self.namespace(key)
+        with self._lock:
+            namespace = self._tracked(namespace)
+            histogram = self._sizes.get((namespace, operation))
+            if histogram is None:
+                histogram = self._sizes[(namespace, operation)] = Histogram(SIZE_BUCKETS)
+            histogram.observe(size)
+    
+    def reset(self):
+        with self._lock:
+            self._namespaces.clear()
+            self._counters.clear()
+            self._latency.clear()
+            self._sizes.clear()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters, hit ratio and histograms per namespace"""
+        with self._lock:
+            namespaces = {}
+            for namespace, counters in self._counters.items():
+                hits = counters["hits"] + counters["l1_hits"]
+                lookups = hits + counters["misses"]
+                namespaces[namespace] = {
+                    **counters,
+                    "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                    "latency_seconds": {},
+                    "payload_bytes": {}
+                }
+            for (namespace, operation), histogram in self._latency.items():
+                entry = namespaces.setdefault(namespace, {"latency_seconds": {}, "payload_bytes": {}})
+                entry["latency_seconds"][operation] = histogram.snapshot()
+            for (namespace, operation), histogram in self._sizes.items():
+                entry = namespaces.setdefault(namespace, {"latency_seconds": {}, "payload_bytes": {}})
+                entry["payload_bytes"][operation] = histogram.snapshot()
+            return namespaces
+    
+    def render_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP cache_events_total Cache events by key namespace",
+            "# TYPE cache_events_total counter"
+        ]
+        with self._lock:
+            for namespace, counters in sorted(self._counters.items()):
+                for counter, value in counters.items():
+                    lines.append(
+                        f'cache_events_total{{namespace="{escape_label(namespace)}",event="{counter}"}} {value}'
+                    )
+            
+            for metric, help_text, histograms in (
+                ("cache_operation_seconds", "Cache operation latency", self._latency),
+                ("cache_payload_bytes", "Cache payload size", self._sizes)
+            ):
+                lines.append(f"# HELP {metric} {help_text} by key namespace")
+                lines.append(f"# TYPE {metric} histogram")
+                for (namespace, operation), histogram in sorted(histograms.items()):
+                    labels = f'namespace="{escape_label(namespace)}",operation="{escape_label(operation)}"'
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f"{metric}_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+# Global cache metrics shared by the sync and async Redis clients
+cache_metrics = CacheMetrics()
@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+class CircuitBreaker:
+    """Circuit breaker with background half-open probing.
+    
+    The circuit opens once ``failure_threshold`` failures happen within
+    ``failure_window`` seconds. While it is open callers skip the protected
+    dependency; a background thread waits ``recovery_timeout`` seconds, moves
+    to half-open and runs ``probe``. A successful probe closes the circuit
+    (and calls ``on_close``), a failed one opens it again.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(
+        self,
+        name: str,
+        probe: Callable[[], Any],
+        failure_threshold: int = 3,
+        failure_window: float = 30.0,
+        recovery_timeout: float = 5.0,
+        on_close: Optional[Callable[[], Any]] = None
+    ):
+        self.name = name
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.recovery_timeout = recovery_timeout
+        self.on_close = on_close
+        self.state = self.CLOSED
+        self._failures = deque()
+        self._lock = threading.Lock()
+        self._recovery_thread: Optional[threading.Thread] = None
+        self.transitions: Dict[str, int] = {}
+        self.total_failures = 0
+        self.probes = 0
+        self.last_failure: Optional[str] = None
+        self.last_transition_at: Optional[str] = None
+        self.opened_at: Optional[float] = None
+    
+    def allow_request(self) -> bool:
+        """Whether callers should use the protected dependency"""
+        return self.state == self.CLOSED
+    
+    def _transition(self, state: str):
+        # Caller holds the lock
+        if state == self.state:
+            return
+        transition = f"{self.state}->{state}"
+        self.transitions[transition] = self.transitions.get(transition, 0) + 1
+        self.last_transition_at = datetime.utcnow().isoformat()
+        # Probe round trips (open <-> half-open) are only counted, not printed
+        if self.CLOSED in (self.state, state):
+            print(f"{self.name} circuit {transition}")
+        self.state = state
+        if state == self.OPEN:
+            self.opened_at = time.monotonic()
+            self._failures.clear()
+            self._start_recovery()
+    
+    def record_failure(self, error: Optional[Exception] = None):
+        """Count a failure, opening the circuit when the threshold is reached"""
+        with self._lock:
+            now = time.monotonic()
+            self.total_failures += 1
+            self.last_failure = str(error) if error else None
+            self._failures.append(now)
+            while self._failures and self._failures[0] < now - self.failure_window:
+                self._failures.popleft()
+            if self.state == self.CLOSED and len(self._failures) >= self.failure_threshold:
+                self._transition(self.OPEN)
+    
+    def trip(self):
+        """Open the circuit immediately"""
+        with self._lock:
+            self._transition(self.OPEN)
+    
+    def close(self):
+        """Close the circuit immediately"""
+        with self._lock:
+            recovered = self.state != self.CLOSED
+            self._failures.clear()
+            self._transition(self.CLOSED)
+        if recovered:
+            self._on_recovered()
+    
+    def _start_recovery(self):
+        # Caller holds the lock
+        if self._recovery_thread and self._recovery_thread.is_alive():
+            return
+        self._recovery_thread = threading.Thread(
+            target=self._recover,
+            name=f"{self.name}-reconnect",
+            daemon=True
+        )
+        self._recovery_thread.start()
+    
+    def _recover(self):
+        while True:
+            time.sleep(self.recovery_timeout)
+            with self._lock:
+                if self.state == self.CLOSED:
+                    return
+                self._transition(self.HALF_OPEN)
+                self.probes += 1
+            try:
+                self.probe()
+            except Exception as e:
+                with self._lock:
+                    self.last_failure = str(e)
+                    self._transition(self.OPEN)
+                continue
+            
+            with self._lock:
+                self._failures.clear()
+                self._transition(self.CLOSED)
+            self._on_recovered()
+            return
+    
+    def _on_recovered(self):
+        if self.on_close:
+            try:
+                self.on_close()
+            except Exception as e:
+                print(f"{self.name} circuit close hook failed: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Current state and transition counters"""
+        return {
+            "state": self.state,
+            "recent_failures": len(self._failures),
+            "total_failures": self.total_failures,
+            "probes": self.probes,
+            "transitions": dict(self.transitions),
+            "last_failure": self.last_failure,
+            "last_transition_at": self.last_transition_at,
+            "open_for_seconds": (
+                round(time.monotonic() - self.opened_at, 3)
+                if self.state != self.CLOSED and self.opened_at else 0.0
+            )
+        }
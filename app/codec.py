@@ -0,0 +1,213 @@
+import json
+import zlib
+from typing import Any, Optional
+from app.models.records import RECORD_TYPES, RecordMixin
+
+# Optional fast serializers and compressors, the standard library is used otherwise
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import lz4.frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+# Header byte of every encoded value: CODEC_VERSION | serializer << 2 | compression.
+# Values starting with any other byte were written before the codec existed
+# (plain text or JSON) and are decoded the old way.
+CODEC_VERSION = 0x10
+
+SERIALIZER_STR = 0
+SERIALIZER_JSON = 1
+SERIALIZER_ORJSON = 2
+SERIALIZER_MSGPACK = 3
+SERIALIZERS = {"json": SERIALIZER_JSON, "orjson": SERIALIZER_ORJSON, "msgpack": SERIALIZER_MSGPACK}
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+COMPRESSION_LZ4 = 3
+COMPRESSIONS = {"none": COMPRESSION_NONE, "zlib": COMPRESSION_ZLIB, "zstd": COMPRESSION_ZSTD, "lz4": COMPRESSION_LZ4}
+
+# Records are stored as {RECORD_TAG: type name, "values": [field values]}, without repeating their keys
+RECORD_TAG = "__record__"
+_RECORD_TAG_BYTES = RECORD_TAG.encode("utf-8")
+
+class CodecError(ValueError):
+    """Raised when a stored value cannot be decoded"""
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, RecordMixin):
+        return {RECORD_TAG: type(value).__name__, "values": value.values()}
+    return str(value)
+
+def _revive_record(obj: dict) -> Any:
+    if RECORD_TAG in obj and len(obj) == 2:
+        record_type = RECORD_TYPES.get(obj[RECORD_TAG])
+        if record_type is not None:
+            return record_type(*obj["values"])
+    return obj
+
+def _revive_tree(value: Any) -> Any:
+    """Rebuild records in a decoded value, for serializers without an object hook"""
+    if isinstance(value, dict):
+        return _revive_record({key: _revive_tree(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_revive_tree(item) for item in value]
+    return value
+
+class CacheCodec:
+    """Encodes cached values as a header byte followed by the serialized payload.
+    
+    Strings are stored as UTF-8 so they round-trip as strings; everything else
+    goes through msgpack, orjson or json. Records from ``app.models.records``
+    are stored as their type name and field values and come back as records. Payloads of at least
+    ``compress_min_bytes`` are compressed when that makes them smaller. The
+    header records how a value was written, so any reader can decode it
+    whatever its own configuration.
+    """
+    
+    def __init__(self, serializer: str = "auto", compression: str = "auto", compress_min_bytes: int = 1024):
+        self.serializer = self._pick_serializer(serializer)
+        self.compression = self._pick_compression(compression)
+        self.compress_min_bytes = compress_min_bytes
+    
+    @staticmethod
+    def _pick_serializer(name: str) -> int:
+        if name == "auto":
+            if MSGPACK_AVAILABLE:
+                return SERIALIZER_MSGPACK
+            if ORJSON_AVAILABLE:
+                return SERIALIZER_ORJSON
+            return SERIALIZER_JSON
+        if name not in SERIALIZERS:
+            raise ValueError(f"Unknown cache serializer: {name}")
+        if (name == "msgpack" and not MSGPACK_AVAILABLE) or (name == "orjson" and not ORJSON_AVAILABLE):
+            print(f"{name} not available, caching with json")
+            return SERIALIZER_JSON
+        return SERIALIZERS[name]
+    
+    @staticmethod
+    def _pick_compression(name: str) -> int:
+        if name == "auto":
+            if ZSTD_AVAILABLE:
+                return COMPRESSION_ZSTD
+            if LZ4_AVAILABLE:
+                return COMPRESSION_LZ4
+            return COMPRESSION_ZLIB
+        if name not in COMPRESSIONS:
+            raise ValueError(f"Unknown cache compression: {name}")
+        if (name == "zstd" and not ZSTD_AVAILABLE) or (name == "lz4" and not LZ4_AVAILABLE):
+            print(f"{name} not available, compressing cache values with zlib")
+            return COMPRESSION_ZLIB
+        return COMPRESSIONS[name]
+    
+    def _serialize(self, value: Any) -> bytes:
+        if self.serializer == SERIALIZER_MSGPACK:
+            return msgpack.packb(value, use_bin_type=True, default=_encode_default)
+        if self.serializer == SERIALIZER_ORJSON:
+            return orjson.dumps(
+                value,
+                default=_encode_default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+            )
+        return json.dumps(value, default=_encode_default, separators=(",", ":")).encode("utf-8")
+    
+    @staticmethod
+    def _deserialize(serializer: int, payload: bytes) -> Any:
+        if serializer == SERIALIZER_STR:
+            return payload.decode("utf-8")
+        # Only payloads that contain records pay for the object hook
+        object_hook = _revive_record if _RECORD_TAG_BYTES in payload else None
+        if serializer == SERIALIZER_MSGPACK:
+            if not MSGPACK_AVAILABLE:
+                raise CodecError("Value was written with msgpack, which is not installed")
+            return msgpack.unpackb(payload, raw=False, strict_map_key=False, object_hook=object_hook)
+        if serializer == SERIALIZER_ORJSON and ORJSON_AVAILABLE:
+            value = orjson.loads(payload)
+            return _revive_tree(value) if object_hook else value
+        # orjson output is plain JSON, so json can read it too
+        return json.loads(payload, object_hook=object_hook)
+    
+    def _compress(self, payload: bytes) -> bytes:
+        if self.compression == COMPRESSION_ZSTD:
+            return zstandard.ZstdCompressor(level=3).compress(payload)
+        if self.compression == COMPRESSION_LZ4:
+            return lz4.frame.compress(payload)
+        return zlib.compress(payload, 6)
+    
+    @staticmethod
+    def _decompress(compression: int, payload: bytes) -> bytes:
+        if compression == COMPRESSION_ZSTD:
+            if not ZSTD_AVAILABLE:
+                raise CodecError("Value was compressed with zstd, which is not installed")
+            return zstandard.ZstdDecompressor().decompress(payload)
+        if compression == COMPRESSION_LZ4:
+            if not LZ4_AVAILABLE:
+                raise CodecError("Value was compressed with lz4, which is not installed")
+            return lz4.frame.decompress(payload)
+        return zlib.decompress(payload)
+    
+    def encode(self, value: Any) -> bytes:
+        """Encode a value for storage"""
+        if isinstance(value, str):
+            serializer, payload = SERIALIZER_STR, value.encode("utf-8")
+        else:
+            serializer, payload = self.serializer, self._serialize(value)
+        
+        compression = COMPRESSION_NONE
+        if (
+            self.compression != COMPRESSION_NONE
+            and self.compress_min_bytes
+            and len(payload) >= self.compress_min_bytes
+        ):
+            compressed = self._compress(payload)
+            if len(compressed) < len(payload):
+                compression, payload = self.compression, compressed
+        
+        return bytes((CODEC_VERSION | serializer << 2 | compression,)) + payload
+    
+    def decode(self, data: Optional[bytes]) -> Any:
+        """Decode a stored value, including values written before the codec existed"""
+        if data is None:
+            return None
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if not data:
+            return None
+        
+        header = data[0]
+        if header & 0xF0 != CODEC_VERSION:
+            # Legacy value: JSON if it parses, plain text otherwise
+            text = data.decode("utf-8", errors="replace")
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError:
+                return text
+        
+        try:
+            payload = data[1:]
+            compression = header & 0x03
+            if compression != COMPRESSION_NONE:
+                payload = self._decompress(compression, payload)
+            return self._deserialize(header >> 2 & 0x03, payload)
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(f"Corrupt cached value: {e}") from e
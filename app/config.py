@@ -7,6 +7,24 @@ load_dotenv()
 class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./test.db")
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    # Connection pool size and how long callers wait for a free connection (seconds)
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+    REDIS_POOL_TIMEOUT: float = float(os.getenv("REDIS_POOL_TIMEOUT", 2.0))
+    # Connection errors (within 30s) before falling back to memory, and seconds between reconnect probes
+    REDIS_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("REDIS_CIRCUIT_FAILURE_THRESHOLD", 3))
+    REDIS_CIRCUIT_RECOVERY_TIMEOUT: float = float(os.getenv("REDIS_CIRCUIT_RECOVERY_TIMEOUT", 5.0))
+    # Limits of the in-process cache used while Redis is unavailable
+    MEMORY_CACHE_MAX_ENTRIES: int = int(os.getenv("MEMORY_CACHE_MAX_ENTRIES", 10000))
+    MEMORY_CACHE_MAX_BYTES: int = int(os.getenv("MEMORY_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    # In-process L1 copies of rarely changing keys, invalidated across nodes over pub/sub
+    L1_CACHE_PREFIXES: str = os.getenv("L1_CACHE_PREFIXES", "agworld:companies,agworld:farms,agworld:seasons")
+    L1_CACHE_TTL: int = int(os.getenv("L1_CACHE_TTL", 30))
+    L1_CACHE_MAX_ENTRIES: int = int(os.getenv("L1_CACHE_MAX_ENTRIES", 1000))
+    # Cached value encoding: serializer (auto, msgpack, orjson, json), compression
+    # (auto, zstd, lz4, zlib) and the payload size from which values are compressed (0 disables)
+    CACHE_SERIALIZER: str = os.getenv("CACHE_SERIALIZER", "auto")
+    CACHE_COMPRESSION: str = os.getenv("CACHE_COMPRESSION", "auto")
+    CACHE_COMPRESS_MIN_BYTES: int = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", 1024))
     
     # Agworld API Configuration
     # Get your API token from Agworld support: https://help.agworld.com/en/articles/2497766-how-to-contact-agworld-customer-success
@@ -15,6 +33,46 @@ class Settings:
     # Australia: https://my.agworld.com.au/user_api/v1
     # New Zealand: https://nz.agworld.co/user_api/v1
     AGWORLD_API_BASE_URL: str = os.getenv("AGWORLD_API_BASE_URL", "https://us.agworld.co/user_api/v1")
+    # Number of records requested per JSON:API page
+    AGWORLD_PAGE_SIZE: int = int(os.getenv("AGWORLD_PAGE_SIZE", 100))
+    # Seconds to keep raw responses and their ETag/Last-Modified validators for conditional GETs
+    AGWORLD_HTTP_CACHE_TTL: int = int(os.getenv("AGWORLD_HTTP_CACHE_TTL", 86400))
+    # Maximum number of in-flight requests for the async client
+    AGWORLD_MAX_CONCURRENCY: int = int(os.getenv("AGWORLD_MAX_CONCURRENCY", 4))
+    # Token bucket shared by every process: sustained requests/second and burst size
+    AGWORLD_RATE_LIMIT: float = float(os.getenv("AGWORLD_RATE_LIMIT", 1.0))
+    AGWORLD_RATE_LIMIT_BURST: float = float(os.getenv("AGWORLD_RATE_LIMIT_BURST", 5))
+    # Retries for 429/5xx responses with jittered exponential backoff (seconds)
+    AGWORLD_MAX_RETRIES: int = int(os.getenv("AGWORLD_MAX_RETRIES", 3))
+    AGWORLD_BACKOFF_BASE: float = float(os.getenv("AGWORLD_BACKOFF_BASE", 1.0))
+    AGWORLD_BACKOFF_MAX: float = float(os.getenv("AGWORLD_BACKOFF_MAX", 60.0))
+    # Parse large responses incrementally with ijson so memory is bounded by one record, not one page
+    AGWORLD_STREAM_JSON: bool = os.getenv("AGWORLD_STREAM_JSON", "false").lower() in ("1", "true", "yes")
+    
+    # Cache fill coordination: stale entries are served this many seconds past
+    # their TTL while one caller refreshes them; fill locks expire after CACHE_LOCK_TTL
+    CACHE_STALE_TTL: int = int(os.getenv("CACHE_STALE_TTL", 300))
+    CACHE_LOCK_TTL: int = int(os.getenv("CACHE_LOCK_TTL", 30))
+    # Seconds before in-process entity indexes (crops by field) are rebuilt
+    ENTITY_INDEX_TTL: int = int(os.getenv("ENTITY_INDEX_TTL", 300))
+    # Collections indexed per kind of entity index, least recently used dropped first
+    ENTITY_INDEX_MAX_ENTRIES: int = int(os.getenv("ENTITY_INDEX_MAX_ENTRIES", 256))
+    
+    # Delta sync: seconds between full reconciliations that detect deletions
+    SYNC_RECONCILE_INTERVAL: int = int(os.getenv("SYNC_RECONCILE_INTERVAL", 86400))
+    # Worker threads shared by all companies in a bulk sync
+    BULK_SYNC_MAX_WORKERS: int = int(os.getenv("BULK_SYNC_MAX_WORKERS", 8))
+    
+    # Data processing: comma-separated modules that register extra transforms when imported
+    TRANSFORM_PLUGINS: str = os.getenv("TRANSFORM_PLUGINS", "")
+    # Executor for large transforms: process, thread or serial
+    PROCESSING_EXECUTOR: str = os.getenv("PROCESSING_EXECUTOR", "process")
+    # Worker count, 0 means one per available CPU core
+    PROCESSING_MAX_WORKERS: int = int(os.getenv("PROCESSING_MAX_WORKERS", 0))
+    PROCESSING_CHUNK_SIZE: int = int(os.getenv("PROCESSING_CHUNK_SIZE", 2000))
+    # Smaller jobs are transformed on the calling thread
+    PROCESSING_PARALLEL_MIN_RECORDS: int = int(os.getenv("PROCESSING_PARALLEL_MIN_RECORDS", 5000))
+    PROCESSING_IO_WORKERS: int = int(os.getenv("PROCESSING_IO_WORKERS", 4))
     
     # Email Configuration
     EMAIL_HOST: str = os.getenv("EMAIL_HOST", "")
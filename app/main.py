@@ -9,6 +9,9 @@ from app.database import create_tables
 from app.scheduler.poller import task_scheduler
 from app.utils.logger import get_logger
 from app.redis_client import redis_client
+from app.services.agworld_async_client import async_agworld_client
+from app.redis_async_client import async_redis_client
+from app.services.processing_pool import processing_pool
 
 logger = get_logger("main")
 
@@ -46,6 +49,15 @@ async def lifespan(app: FastAPI):
     try:
         task_scheduler.shutdown()
         logger.info("Task scheduler stopped")
+        
+        await async_agworld_client.aclose()
+        logger.info("Agworld async client closed")
+        
+        await async_redis_client.aclose()
+        logger.info("Async Redis client closed")
+        
+        processing_pool.shutdown()
+        logger.info("Processing pool stopped")
     except Exception as e:
         logger.error(f"Error during shutdown: {str(e)}")
 
@@ -72,6 +84,7 @@ def read_root():
             "reports": "/api/v1/reports",
             "scheduler": "/api/v1/scheduler/status",
             "polling": "/api/v1/polling/status",
+            "cache_metrics": "/api/v1/cache/metrics",
             "docs": "/docs",
             "redoc": "/redoc"
         }
@@ -0,0 +1,196 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+class MemoryCache:
+    """Thread-safe in-process cache with per-key TTL and LRU eviction.
+    
+    Used by ``RedisClient`` when Redis is unavailable. The cache holds at most
+    ``max_entries`` keys and roughly ``max_bytes`` of serialised values;
+    expired keys are dropped on access and swept before anything live is
+    evicted, so a long-running worker on the fallback path stays bounded.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        on_evict: Optional[Callable[[str], Any]] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Called with the key of every live entry evicted to make room
+        self.on_evict = on_evict
+        # key -> (value, expires_at or None, size in bytes), least recently used first
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float], int]]" = OrderedDict()
+        self._bytes = 0
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejections = 0
+    
+    @staticmethod
+    def _sizeof(value: Any) -> int:
+        """Approximate memory footprint of a value by its serialised size"""
+        if isinstance(value, (str, bytes)):
+            return len(value)
+        try:
+            return len(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            return len(str(value))
+    
+    def _live_entry(self, key: str, now: float) -> Optional[Tuple[Any, Optional[float], int]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= now:
+            self._remove(key)
+            self.expirations += 1
+            return None
+        return entry
+    
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+    
+    def _purge_expired(self, now: float):
+        expired = [key for key, (_, expires_at, _) in self._entries.items() if expires_at is not None and expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+    
+    def _make_room(self, size: int, now: float):
+        if len(self._entries) < self.max_entries and self._bytes + size <= self.max_bytes:
+            return
+        # A full sweep is O(n), so run it at most once a second under eviction pressure
+        if now >= self._next_sweep:
+            self._purge_expired(now)
+            self._next_sweep = now + 1.0
+        while self._entries and (len(self._entries) >= self.max_entries or self._bytes + size > self.max_bytes):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+            if self.on_evict:
+                self.on_evict(key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a live value and mark it as recently used"""
+        with self._lock:
+            entry = self._live_entry(key, time.monotonic())
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ex: Optional[float] = None,
+        nx: bool = False,
+        size: Optional[int] = None
+    ) -> bool:
+        """Store a value, optionally expiring after ``ex`` seconds (or only if absent with ``nx``).
+        
+        ``size`` skips the size estimate when the caller already knows it,
+        e.g. the length of the payload the value was decoded from.
+        """
+        if size is None:
+            size = self._sizeof(value)
+        with self._lock:
+            now = time.monotonic()
+            if nx and self._live_entry(key, now) is not None:
+                return False
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                self.rejections += 1
+                return False
+            self._make_room(size, now)
+            self._entries[key] = (value, now + ex if ex else None, size)
+            self._bytes += size
+            return True
+    
+    def delete(self, key: str) -> bool:
+        """Remove a key, returns whether a live value was removed"""
+        with self._lock:
+            if self._live_entry(key, time.monotonic()) is None:
+                return False
+            self._remove(key)
+            return True
+    
+    def expire(self, key: str, seconds: float) -> bool:
+        """Reset the time to live of a live key"""
+        with self._lock:
+            entry = self._live_entry(key, time.monotonic())
+            if entry is None:
+                return False
+            self._entries[key] = (entry[0], time.monotonic() + seconds, entry[2])
+            return True
+    
+    def ttl(self, key: str) -> Optional[float]:
+        """Seconds until a key expires, None for missing or persistent keys"""
+        with self._lock:
+            now = time.monotonic()
+            entry = self._live_entry(key, now)
+            if entry is None or entry[1] is None:
+                return None
+            return entry[1] - now
+    
+    def keys(self) -> List[str]:
+        """Keys of every live entry"""
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            return list(self._entries)
+    
+    def clear(self) -> int:
+        """Drop every entry, returns the number removed"""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            return count
+    
+    def delete_matching(self, pattern: str) -> int:
+        """Remove every key matching a glob pattern, returns the number removed"""
+        with self._lock:
+            if pattern == "*":
+                count = len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+                return count
+            keys = [key for key in self._entries if fnmatchcase(key, pattern)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+    
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._live_entry(key, time.monotonic()) is not None
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit/miss/eviction counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "rejections": self.rejections
+        }
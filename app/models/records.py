@@ -0,0 +1,197 @@
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+class RecordMixin:
+    """Read access by key so records can stand in for the dicts they replaced.
+    
+    ``summary`` is a computed property: it is built when it is read and never
+    stored, neither on the instance nor in the cache.
+    """
+    
+    __slots__ = ()
+    
+    # Set on every record class by @record
+    _field_names: Tuple[str, ...] = ()
+    
+    @property
+    def summary(self) -> str:
+        return ""
+    
+    def keys(self) -> Tuple[str, ...]:
+        return self._field_names + ("summary",)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._field_names or key == "summary"
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self else default
+    
+    def values(self) -> List[Any]:
+        """Field values in declaration order (without the summary)"""
+        return [getattr(self, name) for name in self._field_names]
+    
+    def __reduce__(self):
+        # Pickle as the class and its field values, e.g. to and from processing pool workers
+        return type(self), tuple(self.values())
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict including the summary, e.g. for JSON responses"""
+        data = {}
+        for name in self._field_names:
+            value = getattr(self, name)
+            data[name] = value.to_dict() if isinstance(value, RecordMixin) else value
+        data["summary"] = self.summary
+        return data
+
+# Record type name -> class, used by the cache codec to rebuild records
+RECORD_TYPES: Dict[str, Type[RecordMixin]] = {}
+
+def record(cls):
+    """Register a slots dataclass as a cache-serialisable record type"""
+    cls = dataclass(slots=True)(cls)
+    cls._field_names = tuple(f.name for f in fields(cls))
+    RECORD_TYPES[cls.__name__] = cls
+    return cls
+
+def _label(value: Any, default: str = "N/A") -> Any:
+    return default if value is None else value
+
+def _quantity(value: Optional[float], unit: Optional[str]) -> str:
+    if value is None:
+        return "N/A"
+    return f"{value:g} {unit}" if unit else f"{value:g}"
+
+@record
+class FieldRecord(RecordMixin):
+    field_id: Optional[str] = None
+    field_name: Optional[str] = None
+    area: Optional[float] = None
+    area_unit: Optional[str] = None
+    farm_id: Optional[str] = None
+    description: Optional[str] = None
+    cropping_method: Optional[str] = None
+    crops: List[Dict[str, Any]] = field(default_factory=list)
+    cost_unit: Optional[str] = None
+    chemical_cost: Optional[float] = None
+    fertilizer_cost: Optional[float] = None
+    seed_cost: Optional[float] = None
+    
+    @property
+    def summary(self) -> str:
+        return (
+            f"Field: {_label(self.field_name, 'Unknown')} - Area: {_quantity(self.area, self.area_unit)}"
+            f" - Farm: {_label(self.farm_id)}"
+        )
+
+@record
+class CropRecord(RecordMixin):
+    crop_id: Optional[str] = None
+    crop_type: Optional[str] = None
+    variety: Optional[str] = None
+    field_id: Optional[str] = None
+    crop_grade: Optional[str] = None
+    crop_use: Optional[str] = None
+    crop_blend: Optional[str] = None
+    planting_date: Optional[str] = None
+    harvest_date: Optional[str] = None
+    
+    @property
+    def summary(self) -> str:
+        return (
+            f"Crop: {_label(self.crop_type, 'Unknown')} - Variety: {_label(self.variety)}"
+            f" - Field: {_label(self.field_id)}"
+        )
+
+@record
+class ActivityRecord(RecordMixin):
+    activity_id: Optional[str] = None
+    title: Optional[str] = None
+    activity_type: Optional[str] = None
+    activity_category: Optional[str] = None
+    approved: Optional[bool] = None
+    completed: Optional[bool] = None
+    area: Optional[float] = None
+    area_unit: Optional[str] = None
+    cost_unit: Optional[str] = None
+    total_cost: Optional[float] = None
+    chemical_cost: Optional[float] = None
+    fertilizer_cost: Optional[float] = None
+    seed_cost: Optional[float] = None
+    due_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    company_name: Optional[str] = None
+    author_user_name: Optional[str] = None
+    activity_fields: List[Dict[str, Any]] = field(default_factory=list)
+    activity_inputs: List[Dict[str, Any]] = field(default_factory=list)
+    
+    @property
+    def summary(self) -> str:
+        return (
+            f"Activity: {_label(self.title, 'Unknown')} - Type: {_label(self.activity_type)}"
+            f" - Status: {'Completed' if self.completed else 'Pending'}"
+        )
+
+@record
+class CompanyRecord(RecordMixin):
+    company_id: Optional[str] = None
+    company_name: Optional[str] = None
+    company_type: Optional[str] = None
+    business_identifier: Optional[str] = None
+    contact_email: Optional[str] = None
+    contact_name: Optional[str] = None
+    description: Optional[str] = None
+    physical_location: Optional[Any] = None
+    
+    @property
+    def summary(self) -> str:
+        return f"Company: {_label(self.company_name, 'Unknown')} - Type: {_label(self.company_type)}"
+
+@record
+class FarmRecord(RecordMixin):
+    farm_id: Optional[str] = None
+    farm_name: Optional[str] = None
+    company_id: Optional[str] = None
+    description: Optional[str] = None
+    location: Optional[Any] = None
+    reporting_region: Optional[str] = None
+    
+    @property
+    def summary(self) -> str:
+        return f"Farm: {_label(self.farm_name, 'Unknown')} - Region: {_label(self.reporting_region)}"
+
+@record
+class SeasonRecord(RecordMixin):
+    season_id: Optional[str] = None
+    season_name: Optional[str] = None
+    company_id: Optional[str] = None
+    approved: Optional[bool] = None
+    season_start_date: Optional[str] = None
+    season_end_date: Optional[str] = None
+    
+    @property
+    def summary(self) -> str:
+        return (
+            f"Season: {_label(self.season_name, 'Unknown')}"
+            f" - Status: {'Approved' if self.approved else 'Draft'}"
+        )
+
+@record
+class ProcessedRecord(RecordMixin):
+    """Envelope returned by DataProcessor; ``processed_data`` is a typed record, or a dict for unknown types"""
+    data_type: str
+    processed_at: str
+    source: str
+    raw_data_hash: str
+    processed_data: Union[RecordMixin, Dict[str, Any]]
+    
+    @property
+    def summary(self) -> str:
+        return self.processed_data.get("summary", "")
@@ -0,0 +1,374 @@
+import asyncio
+import json
+import time
+from typing import Any, Dict, Iterable, Optional, Union
+from app.config import settings
+from app.redis_client import RedisClient, redis_client, REDIS_AVAILABLE, _MISSING
+
+if REDIS_AVAILABLE:
+    import redis.asyncio as aioredis
+
+class AsyncRedisClient:
+    """Asyncio counterpart of RedisClient for use from request handlers.
+    
+    Shares the codec, memory fallback, L1 tier and circuit breaker of the
+    synchronous client, so both read and write the same entries and fall
+    back to memory together. Only the socket I/O is asynchronous; the pool
+    is created lazily for the running event loop.
+    """
+    
+    def __init__(self, sync_client: Optional[RedisClient] = None):
+        self.sync = sync_client or redis_client
+        self.memory_cache = self.sync.memory_cache
+        self.local_cache = self.sync.local_cache
+        self.codec = self.sync.codec
+        self.breaker = self.sync.breaker
+        self.metrics = self.sync.metrics
+        self.redis_client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lifetime = None
+    
+    @property
+    def use_redis(self) -> bool:
+        """Whether calls go to Redis right now, i.e. the shared circuit is closed"""
+        return REDIS_AVAILABLE and self.sync.use_redis
+    
+    async def _connect(self):
+        """Connection pool for the running event loop, replacing one bound to another loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self.redis_client is None:
+            previous, previous_loop = self.redis_client, self._loop
+            self._loop = loop
+            pool = aioredis.BlockingConnectionPool.from_url(
+                settings.REDIS_URL,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                timeout=settings.REDIS_POOL_TIMEOUT,
+                socket_connect_timeout=2,
+                socket_timeout=2,
+                socket_keepalive=True,
+                health_check_interval=30
+            )
+            # Values are binary codec payloads, decoded by CacheCodec
+            self.redis_client = aioredis.Redis(connection_pool=pool, decode_responses=False)
+            # asyncio.run() finalises async generators before closing its loop,
+            # which closes the pool while its connections can still be shut down
+            self._lifetime = self._pool_lifetime(self.redis_client)
+            await self._lifetime.asend(None)
+            if previous is not None and previous_loop is not None and previous_loop.is_running():
+                # The previous loop still runs (in another thread): close its pool there
+                asyncio.run_coroutine_threadsafe(self._close(previous), previous_loop)
+        return self.redis_client
+    
+    async def _pool_lifetime(self, client):
+        try:
+            yield
+        finally:
+            await self._close(client)
+    
+    async def _close(self, client):
+        if self.redis_client is client:
+            self.redis_client = None
+        try:
+            await client.aclose(close_connection_pool=True)
+        except RuntimeError:
+            # Pool was bound to an event loop that has already been closed
+            pass
+    
+    async def aclose(self):
+        """Close the connection pool"""
+        if self._lifetime is not None:
+            lifetime, self._lifetime = self._lifetime, None
+            await lifetime.aclose()
+        elif self.redis_client is not None:
+            await self._close(self.redis_client)
+    
+    async def _invalidate(self, *keys: str, namespace: Optional[str] = None):
+        """Drop hot keys from the L1 tier and tell the other nodes to do the same"""
+        for key in keys:
+            self.local_cache.delete(key)
+        if namespace:
+            self.sync.generations.delete(namespace)
+        try:
+            client = await self._connect()
+            await client.publish(
+                self.sync.INVALIDATION_CHANNEL,
+                json.dumps({"node": self.sync.node_id, "keys": list(keys), "pattern": None, "namespace": namespace})
+            )
+        except Exception as e:
+            print(f"Cache invalidation publish error: {e}")
+            self.sync._redis_error(e)
+    
+    async def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        """Set a key-value pair with optional expiration"""
+        if self.use_redis:
+            try:
+                payload = self.codec.encode(value)
+                client = await self._connect()
+                started = time.perf_counter()
+                result = await client.set(key, payload, ex=ex)
+                self.metrics.observe_latency((key,), "set", time.perf_counter() - started)
+                self.metrics.observe_size(key, "set", len(payload))
+                self.metrics.incr(key, "sets")
+                if self.sync._is_local(key):
+                    await self._invalidate(key)
+                return result
+            except Exception as e:
+                print(f"Cache set error: {e}")
+                # Fall back to memory cache on Redis error
+                self.sync._redis_error(e)
+                self.metrics.incr(key, "errors")
+        
+        # Memory cache fallback
+        self.metrics.incr(key, "sets")
+        return self.memory_cache.set(key, value, ex=ex)
+    
+    async def set_if_absent(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        """Set a key only if it does not exist yet (SET NX), stored without the codec"""
+        if self.use_redis:
+            try:
+                client = await self._connect()
+                return bool(await client.set(key, value, ex=ex, nx=True))
+            except Exception as e:
+                print(f"Cache setnx error: {e}")
+                # Fall back to memory cache on Redis error
+                self.sync._redis_error(e)
+        
+        # Memory cache fallback
+        return self.memory_cache.set(key, value, ex=ex, nx=True)
+    
+    async def set_many(self, mapping: Dict[str, Any], ex: Union[int, Dict[str, int], None] = None) -> bool:
+        """Set several keys in one round trip; ``ex`` is one TTL for all keys or a TTL per key"""
+        ttls = {key: ex.get(key) if isinstance(ex, dict) else ex for key in mapping}
+        if self.use_redis and mapping:
+            try:
+                client = await self._connect()
+                pipe = client.pipeline(transaction=False)
+                for key, value in mapping.items():
+                    payload = self.codec.encode(value)
+                    self.metrics.observe_size(key, "set", len(payload))
+                    pipe.set(key, payload, ex=ttls[key])
+                started = time.perf_counter()
+                await pipe.execute()
+                self.metrics.observe_latency(mapping, "pipeline", time.perf_counter() - started)
+                for key in mapping:
+                    self.metrics.incr(key, "sets")
+                hot_keys = [key for key in mapping if self.sync._is_local(key)]
+                if hot_keys:
+                    await self._invalidate(*hot_keys)
+                return True
+            except Exception as e:
+                print(f"Cache batch error: {e}")
+                # Fall back to memory cache on Redis error
+                self.sync._redis_error(e)
+                for key in mapping:
+                    self.metrics.incr(key, "errors")
+        
+        # Memory cache fallback
+        for key, value in mapping.items():
+            self.memory_cache.set(key, value, ex=ttls[key])
+            self.metrics.incr(key, "sets")
+        return True
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a value by key, from the L1 tier for hot keys"""
+        if self.use_redis:
+            local = self.sync._is_local(key)
+            if local:
+                cached = self.local_cache.get(key, _MISSING)
+                if cached is not _MISSING:
+                    self.metrics.incr(key, "l1_hits")
+                    return cached
+            try:
+                client = await self._connect()
+                started = time.perf_counter()
+                if local:
+                    # Fetch the remaining TTL in the same round trip so L1 never outlives Redis
+                    raw, ttl_ms = await client.pipeline(transaction=False).get(key).pttl(key).execute()
+                else:
+                    raw, ttl_ms = await client.get(key), None
+                self.metrics.observe_latency((key,), "get", time.perf_counter() - started)
+                value = self.sync._decode_fetched(key, raw, ttl_ms)
+                self.sync._record_lookup(key, value)
+                return value
+            except Exception as e:
+                print(f"Cache get error: {e}")
+                # Fall back to memory cache on Redis error
+                self.sync._redis_error(e)
+                self.metrics.incr(key, "errors")
+        
+        # Memory cache fallback
+        value = self.memory_cache.get(key)
+        self.sync._record_lookup(key, value)
+        return value
+    
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several keys in one round trip (MGET), missing keys map to None"""
+        keys = list(dict.fromkeys(keys))
+        results = {}
+        remaining = keys
+        
+        if remaining and self.use_redis:
+            to_fetch = []
+            for key in remaining:
+                cached = self.local_cache.get(key, _MISSING) if self.sync._is_local(key) else _MISSING
+                if cached is _MISSING:
+                    to_fetch.append(key)
+                else:
+                    results[key] = cached
+                    self.metrics.incr(key, "l1_hits")
+            try:
+                if to_fetch:
+                    hot_keys = [key for key in to_fetch if self.sync._is_local(key)]
+                    client = await self._connect()
+                    pipe = client.pipeline(transaction=False)
+                    pipe.mget(to_fetch)
+                    for key in hot_keys:
+                        pipe.pttl(key)
+                    started = time.perf_counter()
+                    raw_values, *ttls = await pipe.execute()
+                    self.metrics.observe_latency(to_fetch, "mget", time.perf_counter() - started)
+                    ttl_by_key = dict(zip(hot_keys, ttls))
+                    for key, raw in zip(to_fetch, raw_values):
+                        results[key] = self.sync._decode_fetched(key, raw, ttl_by_key.get(key))
+                        self.sync._record_lookup(key, results[key])
+                remaining = []
+            except Exception as e:
+                print(f"Cache mget error: {e}")
+                # Fall back to memory cache on Redis error
+                self.sync._redis_error(e)
+                for key in to_fetch:
+                    self.metrics.incr(key, "errors")
+                remaining = to_fetch
+        
+        # Memory cache fallback
+        for key in remaining:
+            results[key] = self.memory_cache.get(key)
+            self.sync._record_lookup(key, results[key])
+        return {key: results.get(key) for key in keys}
+    
+    async def delete(self, key: str) -> bool:
+        """Delete a key"""
+        self.metrics.incr(key, "deletes")
+        try:
+            if self.use_redis:
+                client = await self._connect()
+                deleted = bool(await client.delete(key))
+                # Invalidate after the DEL so a concurrent read cannot put the old value back in L1
+                if self.sync._is_local(key):
+                    await self._invalidate(key)
+                return deleted
+            else:
+                # Memory cache fallback
+                return self.memory_cache.delete(key)
+        except Exception as e:
+            print(f"Cache delete error: {e}")
+            self.sync._redis_error(e)
+            self.metrics.incr(key, "errors")
+            return False
+    
+    async def expire(self, key: str, seconds: int) -> bool:
+        """Reset the time to live of an existing key"""
+        try:
+            if self.use_redis:
+                client = await self._connect()
+                expired = bool(await client.expire(key, seconds))
+                if self.sync._is_local(key):
+                    await self._invalidate(key)
+                return expired
+            else:
+                # Memory cache fallback
+                return self.memory_cache.expire(key, seconds)
+        except Exception as e:
+            print(f"Cache expire error: {e}")
+            self.sync._redis_error(e)
+            return False
+    
+    async def exists(self, key: str) -> bool:
+        """Check if key exists"""
+        try:
+            if self.use_redis:
+                if self.sync._is_local(key):
+                    # Hot keys (e.g. freshness markers) are answered from L1 after the first read
+                    return await self.get(key) is not None
+                client = await self._connect()
+                return bool(await client.exists(key))
+            else:
+                # Memory cache fallback
+                return key in self.memory_cache
+        except Exception as e:
+            print(f"Cache exists error: {e}")
+            self.sync._redis_error(e)
+            return False
+    
+    async def ping(self) -> bool:
+        """Test connection"""
+        try:
+            if self.use_redis:
+                client = await self._connect()
+                return await client.ping()
+            else:
+                # Memory cache is always available
+                return True
+        except Exception as e:
+            print(f"Cache ping error: {e}")
+            self.sync._redis_error(e)
+            return False
+    
+    async def eval(self, script: str, keys: list, args: list) -> Optional[Any]:
+        """Run a Lua script atomically, returns None when Redis is unavailable"""
+        if self.use_redis:
+            try:
+                client = await self._connect()
+                result = await client.eval(script, len(keys), *keys, *args)
+                return result.decode("utf-8") if isinstance(result, bytes) else result
+            except Exception as e:
+                print(f"Cache eval error: {e}")
+                self.sync._redis_error(e)
+        return None
+    
+    async def namespace_generation(self, namespace: str) -> int:
+        """Current generation of a key namespace, 0 until it is first invalidated"""
+        if self.use_redis:
+            generation = self.sync.generations.get(namespace)
+            if generation is not None:
+                return generation
+            try:
+                client = await self._connect()
+                generation = int(await client.get(self.sync._generation_key(namespace)) or 0)
+                if self.sync.invalidation_thread is not None:
+                    # Kept locally only while bumps from other nodes can reach us
+                    self.sync.generations.set(namespace, generation, ex=self.sync.local_ttl)
+                return generation
+            except Exception as e:
+                print(f"Cache generation error: {e}")
+                # Fall back to memory cache on Redis error
+                self.sync._redis_error(e)
+        
+        # Memory cache fallback
+        return self.sync.memory_generations.get(namespace, 0)
+    
+    async def namespaced_key(self, namespace: str, *parts: Any) -> str:
+        """Build a key inside a versioned namespace, e.g. ``agworld:activities:v3:...``"""
+        suffix = ":".join(str(part) for part in parts)
+        return f"{namespace}:v{await self.namespace_generation(namespace)}:{suffix}"
+    
+    async def invalidate_namespace(self, namespace: str) -> int:
+        """Invalidate every key of a namespace in O(1) by bumping its generation"""
+        if self.use_redis:
+            try:
+                client = await self._connect()
+                generation = await client.incr(self.sync._generation_key(namespace))
+                await self._invalidate(namespace=namespace)
+                return generation
+            except Exception as e:
+                print(f"Cache generation bump error: {e}")
+                # Fall back to memory cache on Redis error
+                self.sync._redis_error(e)
+        
+        # Memory cache fallback
+        generations = self.sync.memory_generations
+        generations[namespace] = generations.get(namespace, 0) + 1
+        return generations[namespace]
+
+# Global async Redis client instance
+async_redis_client = AsyncRedisClient()
@@ -1,92 +1,515 @@
 import json
-from typing import Any, Optional
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from app.config import settings
+from app.memory_cache import MemoryCache
+from app.codec import CacheCodec, CodecError
+from app.circuit_breaker import CircuitBreaker
+from app.cache_metrics import cache_metrics
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Marks an L1 miss (and a buffered delete), since None is a valid cached value
+_MISSING = object()
+
+class CacheBatch:
+    """Writes buffered by ``RedisClient.batch`` until the block exits"""
+    
+    def __init__(self):
+        self.operations: List[Tuple[str, str, Any, Optional[int]]] = []
+        # Latest buffered value per key so reads inside the batch see its writes
+        self.pending: Dict[str, Any] = {}
+    
+    def set(self, key: str, value: Any, ex: Optional[int] = None):
+        self.operations.append(("set", key, value, ex))
+        self.pending[key] = value
+    
+    def delete(self, key: str):
+        self.operations.append(("delete", key, None, None))
+        self.pending[key] = _MISSING
 
 class RedisClient:
+    # Every node announces the hot keys it changed here so peers drop their L1 copies
+    INVALIDATION_CHANNEL = "cache:invalidate"
+    
     def __init__(self):
-        self.memory_cache = {}  # Always initialize memory cache
+        # Hit/miss counters, latency and payload size histograms per key namespace
+        self.metrics = cache_metrics
+        # Always initialize the bounded in-process fallback cache
+        self.memory_cache = MemoryCache(
+            max_entries=settings.MEMORY_CACHE_MAX_ENTRIES,
+            max_bytes=settings.MEMORY_CACHE_MAX_BYTES,
+            on_evict=self._record_eviction
+        )
+        # L1 tier: decoded values of hot keys read from Redis, shared by every caller.
+        # Values returned for these keys must be treated as read-only.
+        self.local_cache = MemoryCache(
+            max_entries=settings.L1_CACHE_MAX_ENTRIES,
+            max_bytes=settings.MEMORY_CACHE_MAX_BYTES,
+            on_evict=self._record_eviction
+        )
+        self.local_ttl = settings.L1_CACHE_TTL
+        self.local_prefixes = tuple(p.strip() for p in settings.L1_CACHE_PREFIXES.split(",") if p.strip())
+        self.node_id = uuid.uuid4().hex
+        # Namespace generations read from Redis, refreshed like L1 entries
+        self.generations = MemoryCache(max_entries=1024)
+        # Namespace generations while running on the memory fallback
+        self.memory_generations = {}
+        # Values are stored as header byte + msgpack/orjson/json payload, compressed when large
+        self.codec = CacheCodec(
+            serializer=settings.CACHE_SERIALIZER,
+            compression=settings.CACHE_COMPRESSION,
+            compress_min_bytes=settings.CACHE_COMPRESS_MIN_BYTES
+        )
+        self.invalidation_thread = None
+        # Per-thread write buffer of an active batch() block
+        self._local = threading.local()
+        # Opens after repeated connection errors; a background probe closes it again
+        self.breaker = CircuitBreaker(
+            name="redis",
+            probe=self._probe,
+            failure_threshold=settings.REDIS_CIRCUIT_FAILURE_THRESHOLD,
+            recovery_timeout=settings.REDIS_CIRCUIT_RECOVERY_TIMEOUT,
+            on_close=self._on_reconnect
+        )
+        if not REDIS_AVAILABLE:
+            print("Redis not available, using memory cache")
+            self.redis_client = None
+            return
+        
+        # Connections are created lazily, so a server that is down at startup is picked up later
+        pool = redis.BlockingConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_connect_timeout=2,
+            socket_timeout=2,
+            socket_keepalive=True,
+            health_check_interval=30,
+            retry_on_timeout=False
+        )
+        # Values are binary codec payloads, decoded by CacheCodec
+        self.redis_client = redis.Redis(connection_pool=pool, decode_responses=False)
         try:
-            import redis
-            self.redis_client = redis.from_url(
-                settings.REDIS_URL,
-                decode_responses=True,
-                socket_connect_timeout=2,
-                socket_timeout=2,
-                retry_on_timeout=False
-            )
             # Test connection
             self.redis_client.ping()
-            self.use_redis = True
             print("Redis client initialized successfully")
-        except ImportError:
-            print("Redis not available, using memory cache")
-            self.redis_client = None
-            self.use_redis = False
+            self._subscribe_invalidations()
         except Exception as e:
-            print(f"Redis connection failed, using memory cache: {e}")
-            self.redis_client = None
-            self.use_redis = False
+            print(f"Redis connection failed, using memory cache until it recovers: {e}")
+            self.breaker.trip()
+    
+    @property
+    def use_redis(self) -> bool:
+        """Whether calls go to Redis right now, i.e. the circuit is closed"""
+        return self.redis_client is not None and self.breaker.allow_request()
+    
+    @use_redis.setter
+    def use_redis(self, enabled: bool):
+        if enabled:
+            self.breaker.close()
+        else:
+            self.breaker.trip()
+    
+    def _record_eviction(self, key: str):
+        self.metrics.incr(key, "evictions")
+    
+    def _record_lookup(self, key: str, value: Any):
+        self.metrics.incr(key, "misses" if value is None else "hits")
+    
+    def _redis_error(self, error: Exception):
+        """Count connection failures towards opening the circuit"""
+        if REDIS_AVAILABLE and isinstance(
+            error, (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError, OSError)
+        ):
+            self.breaker.record_failure(error)
+    
+    def _probe(self):
+        self.redis_client.ping()
+    
+    def _on_reconnect(self):
+        # Invalidations published while disconnected were missed
+        self.local_cache.clear()
+        self.generations.clear()
+        # Entries written to the fallback during the outage are not in Redis and
+        # would be served again, out of date, during the next outage
+        self.memory_cache.clear()
+        if self.invalidation_thread is None or not self.invalidation_thread.is_alive():
+            self._subscribe_invalidations()
+        print("Redis connection restored")
+    
+    def _subscribe_invalidations(self):
+        """Listen for L1 and namespace generation invalidations from other nodes on a background thread"""
+        try:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.INVALIDATION_CHANNEL: self._on_invalidation})
+            self.invalidation_thread = pubsub.run_in_thread(
+                sleep_time=1.0,
+                daemon=True,
+                exception_handler=self._on_invalidation_error
+            )
+        except Exception as e:
+            # Without invalidations other nodes' writes would go unnoticed, so run
+            # without L1 and read namespace generations from Redis every time
+            print(f"Cache invalidation subscribe error, L1 cache disabled: {e}")
+            self.local_prefixes = ()
+            self.invalidation_thread = None
+    
+    def _on_invalidation(self, message: dict):
+        try:
+            payload = json.loads(message["data"])
+        except (TypeError, ValueError):
+            return
+        if payload.get("node") == self.node_id:
+            return
+        for key in payload.get("keys", []):
+            self.local_cache.delete(key)
+        if payload.get("pattern"):
+            self.local_cache.delete_matching(payload["pattern"])
+        if payload.get("namespace"):
+            self.generations.delete(payload["namespace"])
+    
+    def _on_invalidation_error(self, error: Exception, pubsub, thread):
+        # Invalidations may have been missed while disconnected
+        self.local_cache.clear()
+        self.generations.clear()
+        if self.breaker.allow_request():
+            print(f"Cache invalidation listener error: {error}")
+            self._redis_error(error)
+        # pubsub reconnects and resubscribes on its next read
+        time.sleep(self.breaker.recovery_timeout if not self.breaker.allow_request() else 1.0)
+    
+    def _is_local(self, key: str) -> bool:
+        """Whether a key is served from the L1 tier"""
+        return bool(self.local_prefixes) and self.use_redis and key.startswith(self.local_prefixes)
+    
+    def _invalidate(self, *keys: str, pattern: Optional[str] = None, namespace: Optional[str] = None):
+        """Drop hot keys from this node's L1 tier and tell the other nodes to do the same"""
+        for key in keys:
+            self.local_cache.delete(key)
+        if pattern:
+            self.local_cache.delete_matching(pattern)
+        if namespace:
+            self.generations.delete(namespace)
+        try:
+            self.redis_client.publish(
+                self.INVALIDATION_CHANNEL,
+                json.dumps({"node": self.node_id, "keys": list(keys), "pattern": pattern, "namespace": namespace})
+            )
+        except Exception as e:
+            print(f"Cache invalidation publish error: {e}")
+            self._redis_error(e)
+    
+    def _active_batch(self) -> Optional[CacheBatch]:
+        return getattr(self._local, "batch", None)
+    
+    @contextmanager
+    def batch(self) -> Iterator[CacheBatch]:
+        """Buffer set/delete calls made on this thread and flush them in one round trip on exit"""
+        batch = self._active_batch()
+        if batch is not None:
+            # Nested blocks join the outer batch
+            yield batch
+            return
+        batch = CacheBatch()
+        self._local.batch = batch
+        try:
+            yield batch
+        finally:
+            self._local.batch = None
+            if batch.operations:
+                self._flush(batch.operations)
+    
+    def _flush(self, operations: List[Tuple[str, str, Any, Optional[int]]]):
+        """Apply buffered writes with one pipelined round trip"""
+        if self.use_redis and self.redis_client:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for operation, key, value, ex in operations:
+                    if operation == "set":
+                        payload = self.codec.encode(value)
+                        self.metrics.observe_size(key, "set", len(payload))
+                        pipe.set(key, payload, ex=ex)
+                    else:
+                        pipe.delete(key)
+                started = time.perf_counter()
+                pipe.execute()
+                self.metrics.observe_latency(
+                    (key for _, key, _, _ in operations), "pipeline", time.perf_counter() - started
+                )
+                for operation, key, _, _ in operations:
+                    self.metrics.incr(key, "sets" if operation == "set" else "deletes")
+                hot_keys = [key for _, key, _, _ in operations if self._is_local(key)]
+                if hot_keys:
+                    self._invalidate(*dict.fromkeys(hot_keys))
+                return
+            except Exception as e:
+                print(f"Cache batch error: {e}")
+                # Fall back to memory cache on Redis error
+                self._redis_error(e)
+                for _, key, _, _ in operations:
+                    self.metrics.incr(key, "errors")
+        
+        # Memory cache fallback
+        for operation, key, value, ex in operations:
+            if operation == "set":
+                self.memory_cache.set(key, value, ex=ex)
+                self.metrics.incr(key, "sets")
+            else:
+                self.memory_cache.delete(key)
+                self.metrics.incr(key, "deletes")
     
     def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
         """Set a key-value pair with optional expiration"""
+        batch = self._active_batch()
+        if batch is not None:
+            batch.set(key, value, ex=ex)
+            return True
+        
         if self.use_redis and self.redis_client:
             try:
-                if isinstance(value, (dict, list)):
-                    value = json.dumps(value)
-                return self.redis_client.set(key, value, ex=ex)
+                payload = self.codec.encode(value)
+                started = time.perf_counter()
+                result = self.redis_client.set(key, payload, ex=ex)
+                self.metrics.observe_latency((key,), "set", time.perf_counter() - started)
+                self.metrics.observe_size(key, "set", len(payload))
+                self.metrics.incr(key, "sets")
+                if self._is_local(key):
+                    self._invalidate(key)
+                return result
             except Exception as e:
                 print(f"Cache set error: {e}")
                 # Fall back to memory cache on Redis error
-                self.use_redis = False
+                self._redis_error(e)
+                self.metrics.incr(key, "errors")
         
         # Memory cache fallback
-        self.memory_cache[key] = value
+        self.metrics.incr(key, "sets")
+        return self.memory_cache.set(key, value, ex=ex)
+    
+    def set_if_absent(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        """Set a key only if it does not exist yet (SET NX), returns whether it was set.
+        
+        The value is stored as is, without the codec, so Lua scripts can compare it.
+        """
+        if self.use_redis and self.redis_client:
+            try:
+                return bool(self.redis_client.set(key, value, ex=ex, nx=True))
+            except Exception as e:
+                print(f"Cache setnx error: {e}")
+                # Fall back to memory cache on Redis error
+                self._redis_error(e)
+        
+        # Memory cache fallback
+        return self.memory_cache.set(key, value, ex=ex, nx=True)
+    
+    def set_many(self, mapping: Dict[str, Any], ex: Union[int, Dict[str, int], None] = None) -> bool:
+        """Set several keys in one round trip; ``ex`` is one TTL for all keys or a TTL per key"""
+        operations = [
+            ("set", key, value, ex.get(key) if isinstance(ex, dict) else ex)
+            for key, value in mapping.items()
+        ]
+        batch = self._active_batch()
+        if batch is not None:
+            for _, key, value, key_ex in operations:
+                batch.set(key, value, ex=key_ex)
+        elif operations:
+            self._flush(operations)
         return True
     
+    def _decode_fetched(self, key: str, raw: Optional[bytes], ttl_ms: Optional[int] = None) -> Optional[Any]:
+        """Decode a value read from Redis and keep hot keys in L1 for at most their remaining TTL"""
+        if not raw:
+            return None
+        self.metrics.observe_size(key, "get", len(raw))
+        try:
+            value = self.codec.decode(raw)
+        except CodecError as e:
+            print(f"Cache decode error for {key}: {e}")
+            self.metrics.incr(key, "errors")
+            return None
+        # PTTL 0 means the key is expiring right now; ex=0 would pin it in L1 for good
+        if ttl_ms is not None and ttl_ms != 0:
+            ttl = self.local_ttl if ttl_ms < 0 else min(self.local_ttl, ttl_ms / 1000)
+            self.local_cache.set(key, value, ex=ttl, size=len(raw))
+        return value
+    
     def get(self, key: str) -> Optional[Any]:
-        """Get a value by key"""
+        """Get a value by key, from the L1 tier for hot keys"""
+        batch = self._active_batch()
+        if batch is not None and key in batch.pending:
+            value = batch.pending[key]
+            return None if value is _MISSING else value
+        
         if self.use_redis and self.redis_client:
+            local = self._is_local(key)
+            if local:
+                cached = self.local_cache.get(key, _MISSING)
+                if cached is not _MISSING:
+                    self.metrics.incr(key, "l1_hits")
+                    return cached
             try:
-                value = self.redis_client.get(key)
-                if value:
-                    try:
-                        return json.loads(value)
-                    except json.JSONDecodeError:
-                        return value
-                return None
+                started = time.perf_counter()
+                if local:
+                    # Fetch the remaining TTL in the same round trip so L1 never outlives Redis
+                    raw, ttl_ms = self.redis_client.pipeline(transaction=False).get(key).pttl(key).execute()
+                else:
+                    raw, ttl_ms = self.redis_client.get(key), None
+                self.metrics.observe_latency((key,), "get", time.perf_counter() - started)
+                value = self._decode_fetched(key, raw, ttl_ms)
+                self._record_lookup(key, value)
+                return value
             except Exception as e:
                 print(f"Cache get error: {e}")
                 # Fall back to memory cache on Redis error
-                self.use_redis = False
+                self._redis_error(e)
+                self.metrics.incr(key, "errors")
         
         # Memory cache fallback
-        return self.memory_cache.get(key)
+        value = self.memory_cache.get(key)
+        self._record_lookup(key, value)
+        return value
+    
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several keys in one round trip (MGET), missing keys map to None"""
+        keys = list(dict.fromkeys(keys))
+        results = {}
+        
+        batch = self._active_batch()
+        if batch is not None:
+            for key in keys:
+                if key in batch.pending:
+                    value = batch.pending[key]
+                    results[key] = None if value is _MISSING else value
+        
+        remaining = [key for key in keys if key not in results]
+        if remaining and self.use_redis and self.redis_client:
+            to_fetch = []
+            for key in remaining:
+                cached = self.local_cache.get(key, _MISSING) if self._is_local(key) else _MISSING
+                if cached is _MISSING:
+                    to_fetch.append(key)
+                else:
+                    results[key] = cached
+                    self.metrics.incr(key, "l1_hits")
+            try:
+                if to_fetch:
+                    hot_keys = [key for key in to_fetch if self._is_local(key)]
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    pipe.mget(to_fetch)
+                    for key in hot_keys:
+                        pipe.pttl(key)
+                    started = time.perf_counter()
+                    raw_values, *ttls = pipe.execute()
+                    self.metrics.observe_latency(to_fetch, "mget", time.perf_counter() - started)
+                    ttl_by_key = dict(zip(hot_keys, ttls))
+                    for key, raw in zip(to_fetch, raw_values):
+                        results[key] = self._decode_fetched(key, raw, ttl_by_key.get(key))
+                        self._record_lookup(key, results[key])
+                remaining = []
+            except Exception as e:
+                print(f"Cache mget error: {e}")
+                # Fall back to memory cache on Redis error
+                self._redis_error(e)
+                for key in to_fetch:
+                    self.metrics.incr(key, "errors")
+                remaining = to_fetch
+        
+        # Memory cache fallback
+        for key in remaining:
+            results[key] = self.memory_cache.get(key)
+            self._record_lookup(key, results[key])
+        return {key: results.get(key) for key in keys}
     
     def delete(self, key: str) -> bool:
         """Delete a key"""
+        batch = self._active_batch()
+        if batch is not None:
+            batch.delete(key)
+            return True
+        
+        self.metrics.incr(key, "deletes")
+        try:
+            if self.use_redis:
+                deleted = bool(self.redis_client.delete(key))
+                # Invalidate after the DEL so a concurrent read cannot put the old value back in L1
+                if self._is_local(key):
+                    self._invalidate(key)
+                return deleted
+            else:
+                # Memory cache fallback
+                return self.memory_cache.delete(key)
+        except Exception as e:
+            print(f"Cache delete error: {e}")
+            self._redis_error(e)
+            self.metrics.incr(key, "errors")
+            return False
+    
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several keys in one round trip, returns the number deleted"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return 0
+        batch = self._active_batch()
+        if batch is not None:
+            for key in keys:
+                batch.delete(key)
+            return len(keys)
+        
+        for key in keys:
+            self.metrics.incr(key, "deletes")
         try:
             if self.use_redis:
-                return bool(self.redis_client.delete(key))
+                deleted = self.redis_client.unlink(*keys)
+                hot_keys = [key for key in keys if self._is_local(key)]
+                if hot_keys:
+                    self._invalidate(*hot_keys)
+                return deleted
             else:
                 # Memory cache fallback
-                if key in self.memory_cache:
-                    del self.memory_cache[key]
-                    return True
-                return False
+                return sum(self.memory_cache.delete(key) for key in keys)
         except Exception as e:
             print(f"Cache delete error: {e}")
+            self._redis_error(e)
+            return 0
+    
+    def expire(self, key: str, seconds: int) -> bool:
+        """Reset the time to live of an existing key"""
+        try:
+            if self.use_redis:
+                expired = bool(self.redis_client.expire(key, seconds))
+                if self._is_local(key):
+                    self._invalidate(key)
+                return expired
+            else:
+                # Memory cache fallback
+                return self.memory_cache.expire(key, seconds)
+        except Exception as e:
+            print(f"Cache expire error: {e}")
+            self._redis_error(e)
             return False
     
     def exists(self, key: str) -> bool:
         """Check if key exists"""
         try:
             if self.use_redis:
+                if self._is_local(key):
+                    # Hot keys (e.g. freshness markers) are answered from L1 after the first read
+                    return self.get(key) is not None
                 return bool(self.redis_client.exists(key))
             else:
                 # Memory cache fallback
                 return key in self.memory_cache
         except Exception as e:
             print(f"Cache exists error: {e}")
+            self._redis_error(e)
             return False
     
     def ping(self) -> bool:
@@ -99,43 +522,140 @@ class RedisClient:
                 return True
         except Exception as e:
             print(f"Cache ping error: {e}")
+            self._redis_error(e)
             return False
     
-    def clear_cache(self, pattern: str = "*") -> int:
-        """Clear cache entries matching pattern"""
+    def clear_cache(self, pattern: str = "*", scan_count: int = 1000, batch_size: int = 500) -> int:
+        """Clear cache entries matching pattern.
+        
+        Walks the keyspace with SCAN and frees keys with batched UNLINK so the
+        server is never blocked by KEYS or one huge DEL. Prefer
+        ``invalidate_namespace`` for key families built with ``namespaced_key``.
+        """
         try:
             if self.use_redis:
-                keys = self.redis_client.keys(pattern)
-                if keys:
-                    return self.redis_client.delete(*keys)
-                return 0
+                deleted = 0
+                batch = []
+                for key in self.redis_client.scan_iter(match=pattern, count=scan_count):
+                    batch.append(key)
+                    if len(batch) >= batch_size:
+                        deleted += self.redis_client.unlink(*batch)
+                        batch = []
+                if batch:
+                    deleted += self.redis_client.unlink(*batch)
+                # Invalidate after the UNLINKs so a concurrent read cannot put old values back in L1
+                if self.local_prefixes:
+                    self._invalidate(pattern=pattern)
+                return deleted
             else:
-                # Memory cache fallback - clear all for simplicity
-                count = len(self.memory_cache)
-                self.memory_cache.clear()
-                return count
+                # Memory cache fallback
+                return self.memory_cache.delete_matching(pattern)
         except Exception as e:
             print(f"Cache clear error: {e}")
+            self._redis_error(e)
             return 0
     
+    def _generation_key(self, namespace: str) -> str:
+        return f"ns:{namespace}:generation"
+    
+    def namespace_generation(self, namespace: str) -> int:
+        """Current generation of a key namespace, 0 until it is first invalidated"""
+        if self.use_redis and self.redis_client:
+            generation = self.generations.get(namespace)
+            if generation is not None:
+                return generation
+            try:
+                generation = int(self.redis_client.get(self._generation_key(namespace)) or 0)
+                if self.invalidation_thread is not None:
+                    # Kept locally only while bumps from other nodes can reach us
+                    self.generations.set(namespace, generation, ex=self.local_ttl)
+                return generation
+            except Exception as e:
+                print(f"Cache generation error: {e}")
+                # Fall back to memory cache on Redis error
+                self._redis_error(e)
+        
+        # Memory cache fallback
+        return self.memory_generations.get(namespace, 0)
+    
+    def namespaced_key(self, namespace: str, *parts: Any) -> str:
+        """Build a key inside a versioned namespace, e.g. ``agworld:activities:v3:...``"""
+        suffix = ":".join(str(part) for part in parts)
+        return f"{namespace}:v{self.namespace_generation(namespace)}:{suffix}"
+    
+    def invalidate_namespace(self, namespace: str) -> int:
+        """Invalidate every key of a namespace in O(1) by bumping its generation.
+        
+        Keys of older generations are no longer read and are left to expire.
+        Returns the new generation.
+        """
+        if self.use_redis and self.redis_client:
+            try:
+                generation = self.redis_client.incr(self._generation_key(namespace))
+                self._invalidate(namespace=namespace)
+                return generation
+            except Exception as e:
+                print(f"Cache generation bump error: {e}")
+                # Fall back to memory cache on Redis error
+                self._redis_error(e)
+        
+        # Memory cache fallback
+        self.memory_generations[namespace] = self.memory_generations.get(namespace, 0) + 1
+        return self.memory_generations[namespace]
+    
+    def eval(self, script: str, keys: list, args: list) -> Optional[Any]:
+        """Run a Lua script atomically, returns None when Redis is unavailable"""
+        if self.use_redis and self.redis_client:
+            try:
+                result = self.redis_client.eval(script, len(keys), *keys, *args)
+                return result.decode("utf-8") if isinstance(result, bytes) else result
+            except Exception as e:
+                print(f"Cache eval error: {e}")
+                self._redis_error(e)
+        return None
+    
     def set_hash(self, name: str, mapping: dict) -> bool:
         """Set multiple fields in a hash"""
         try:
             if self.use_redis:
                 return self.redis_client.hset(name, mapping=mapping)
             else:
-                # Memory cache fallback
-                self.memory_cache[name] = json.dumps(mapping)
+                # Memory cache fallback, merging like HSET does
+                current = self.get_hash(name)
+                current.update(mapping)
+                self.memory_cache.set(name, json.dumps(current))
                 return True
         except Exception as e:
             print(f"Cache hset error: {e}")
+            self._redis_error(e)
             return False
     
+    def delete_hash_fields(self, name: str, *fields: str) -> int:
+        """Remove fields from a hash"""
+        if not fields:
+            return 0
+        try:
+            if self.use_redis:
+                return self.redis_client.hdel(name, *fields)
+            else:
+                # Memory cache fallback
+                current = self.get_hash(name)
+                removed = [field for field in fields if current.pop(field, None) is not None]
+                self.memory_cache.set(name, json.dumps(current))
+                return len(removed)
+        except Exception as e:
+            print(f"Cache hdel error: {e}")
+            self._redis_error(e)
+            return 0
+    
     def get_hash(self, name: str) -> dict:
         """Get all fields and values in a hash"""
         try:
             if self.use_redis:
-                return self.redis_client.hgetall(name)
+                return {
+                    field.decode("utf-8"): value.decode("utf-8")
+                    for field, value in self.redis_client.hgetall(name).items()
+                }
             else:
                 # Memory cache fallback
                 value = self.memory_cache.get(name)
@@ -147,6 +667,7 @@ class RedisClient:
                 return {}
         except Exception as e:
             print(f"Cache hgetall error: {e}")
+            self._redis_error(e)
             return {}
 
 # Global Redis client instance
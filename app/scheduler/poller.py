@@ -0,0 +1,111 @@
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+
+from app.utils.logger import LoggerMixin
+from app.redis_client import redis_client
+from app.services.sync_engine import DeltaSyncEngine, sync_engine
+from app.services.reporter import reporter
+
+class AgworldPoller(LoggerMixin):
+    """Scheduled Agworld polling through the delta sync engine.
+    
+    Each poll only requests records updated since the stored watermark (with
+    a periodic full reconciliation), so steady-state polling costs one small
+    request per resource instead of a full collection fetch. Job outcomes
+    are written to ``polling:{job}:status|last_run|error``.
+    """
+    
+    def __init__(self, engine: Optional[DeltaSyncEngine] = None):
+        super().__init__()
+        self.engine = engine or sync_engine
+    
+    def _record_status(self, prefix: str, status: str, error: Optional[str] = None):
+        with redis_client.batch() as batch:
+            batch.set(f"{prefix}:status", status)
+            batch.set(f"{prefix}:last_run", datetime.utcnow().isoformat())
+            batch.set(f"{prefix}:error", error)
+    
+    def _poll(self, job: str, resources: List[str]) -> Dict[str, Any]:
+        prefix = f"polling:{job}"
+        try:
+            results = {resource: self.engine.sync_resource(resource) for resource in resources}
+            self._record_status(prefix, "completed")
+            return results
+        except Exception as e:
+            self.log_error(f"Polling {job} failed: {str(e)}")
+            self._record_status(prefix, "failed", str(e))
+            return {}
+    
+    def poll_field_data(self) -> Dict[str, Any]:
+        """Sync fields changed since the last poll"""
+        return self._poll("fields", ["fields"])
+    
+    def poll_activity_data(self) -> Dict[str, Any]:
+        """Sync activities changed since the last poll"""
+        return self._poll("activities", ["activities"])
+    
+    def generate_daily_report(self) -> Dict[str, Any]:
+        """Summarise the materialised fields and activities as a PDF report"""
+        prefix = "report:daily"
+        try:
+            # The report only counts records by type, so the synced records are used as they are
+            processed = [
+                {"data_type": data_type, "processed_data": record}
+                for resource, data_type in (("fields", "field"), ("activities", "activity"))
+                for record in self.engine.get_records(resource)
+            ]
+            result = reporter.generate_report(reporter.create_summary_report(processed), format_type="pdf")
+            self._record_status(prefix, "completed" if result["success"] else "failed", "; ".join(result["errors"]) or None)
+            return result
+        except Exception as e:
+            self.log_error(f"Daily report failed: {str(e)}")
+            self._record_status(prefix, "failed", str(e))
+            return {"success": False, "errors": [str(e)]}
+
+class TaskScheduler(LoggerMixin):
+    """Background scheduler running the polling jobs"""
+    
+    def __init__(self, poller: AgworldPoller):
+        super().__init__()
+        self.poller = poller
+        self._scheduler: Optional[BackgroundScheduler] = None
+    
+    @property
+    def is_running(self) -> bool:
+        return self._scheduler is not None and self._scheduler.running
+    
+    def start(self):
+        """Register the polling jobs and start the scheduler"""
+        if self.is_running:
+            return
+        self._scheduler = BackgroundScheduler()
+        self._scheduler.add_job(
+            self.poller.poll_field_data, IntervalTrigger(hours=1),
+            id="poll_fields", name="Field data polling", max_instances=1, coalesce=True
+        )
+        self._scheduler.add_job(
+            self.poller.poll_activity_data, IntervalTrigger(minutes=30),
+            id="poll_activities", name="Activity data polling", max_instances=1, coalesce=True
+        )
+        self._scheduler.add_job(
+            self.poller.generate_daily_report, CronTrigger(hour=8, minute=0),
+            id="daily_report", name="Daily summary report", max_instances=1, coalesce=True
+        )
+        self._scheduler.start()
+        self.log_info(f"Scheduler started with {len(self._scheduler.get_jobs())} jobs")
+    
+    def shutdown(self):
+        """Stop the scheduler, waiting for running jobs"""
+        if self.is_running:
+            self._scheduler.shutdown(wait=True)
+        self._scheduler = None
+    
+    def get_jobs(self) -> List[Any]:
+        return self._scheduler.get_jobs() if self._scheduler is not None else []
+
+# Global poller and scheduler instances
+agworld_poller = AgworldPoller()
+task_scheduler = TaskScheduler(agworld_poller)
@@ -0,0 +1,472 @@
+import asyncio
+import httpx
+from typing import Dict, Any, List, Optional, Callable
+from urllib.parse import urljoin, urlsplit, parse_qsl
+from app.config import settings
+from app.utils.logger import LoggerMixin
+from app.redis_async_client import async_redis_client
+from app.services.agworld_client import AgworldAPIClient, agworld_client
+from app.services.rate_limiter import RETRY_STATUSES
+from app.services.single_flight import single_flight
+from app.services.entity_store import entity_store
+
+class AsyncAgworldAPIClient(LoggerMixin):
+    """Asyncio client for Agworld API that fetches endpoints and pages concurrently.
+    
+    Resource mapping, mock fallbacks and cache keys are shared with the
+    synchronous AgworldAPIClient so both clients read and populate the same
+    cache entries. Cache, rate limiter and lock traffic goes through the
+    asyncio Redis client so it never blocks the event loop.
+    """
+    
+    def __init__(self, resources: Optional[AgworldAPIClient] = None, max_concurrency: Optional[int] = None):
+        super().__init__()
+        self.resources = resources or agworld_client
+        self.api_key = settings.AGWORLD_API_KEY
+        self.base_url = getattr(settings, 'AGWORLD_API_BASE_URL', "https://us.agworld.co/user_api/v1")
+        self.headers = {
+            "Content-Type": "application/vnd.api+json",
+            "Accept": "application/vnd.api+json",
+            "User-Agent": "SyndicAgent/1.0"
+        }
+        self.max_concurrency = max_concurrency or getattr(settings, 'AGWORLD_MAX_CONCURRENCY', 4)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lifetime = None
+    
+    async def _bind_loop(self):
+        """Create the HTTP client and concurrency limit for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._client is None:
+            previous, previous_loop = self._client, self._loop
+            self._loop = loop
+            self._client = httpx.AsyncClient(headers=self.headers, timeout=30)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            # asyncio.run() finalises async generators before closing its loop,
+            # which closes the client while its connections can still be shut down
+            self._lifetime = self._client_lifetime(self._client)
+            await self._lifetime.asend(None)
+            if previous is not None and previous_loop is not None and previous_loop.is_running():
+                # The previous loop still runs (in another thread): close its client there
+                asyncio.run_coroutine_threadsafe(self._close(previous), previous_loop)
+    
+    async def _client_lifetime(self, client: httpx.AsyncClient):
+        try:
+            yield
+        finally:
+            await self._close(client)
+    
+    async def _close(self, client: httpx.AsyncClient):
+        if self._client is client:
+            self._client = None
+        try:
+            await client.aclose()
+        except RuntimeError:
+            # Client was bound to an event loop that has already been closed
+            pass
+    
+    async def aclose(self):
+        """Close the underlying HTTP client"""
+        if self._lifetime is not None:
+            lifetime, self._lifetime = self._lifetime, None
+            await lifetime.aclose()
+        elif self._client is not None:
+            await self._close(self._client)
+    
+    async def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        data: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Make HTTP request to Agworld API under the shared concurrency limit"""
+        await self._bind_loop()
+        if endpoint.startswith(("http://", "https://")):
+            url = endpoint
+        else:
+            url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        
+        params = dict(params or {})
+        if self.api_key:
+            params["api_token"] = self.api_key
+        
+        # Revalidate a previously cached GET response instead of downloading it again
+        http_cache_key = self.resources._http_cache_key(url, params) if method == "GET" else None
+        headers = await self._conditional_headers(http_cache_key) if http_cache_key else {}
+        
+        limiter = self.resources.rate_limiter
+        async with self._semaphore:
+            try:
+                for attempt in range(limiter.max_retries + 1):
+                    # Wait for a token from the bucket shared with the sync client
+                    wait = await limiter.reserve_async()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    self.log_info(f"Making async {method} request to {url}")
+                    
+                    response = await self._client.request(method, url, params=params, json=data, headers=headers)
+                    
+                    if response.status_code in RETRY_STATUSES and attempt < limiter.max_retries:
+                        retry_after = limiter.parse_retry_after(response.headers.get("Retry-After"))
+                        if response.status_code == 429:
+                            await limiter.record_throttle_async(retry_after)
+                        delay = limiter.backoff_delay(attempt, retry_after)
+                        self.log_warning(
+                            f"{method} {endpoint} returned {response.status_code}, "
+                            f"retrying in {delay:.1f}s (attempt {attempt + 1}/{limiter.max_retries})"
+                        )
+                        await asyncio.sleep(delay)
+                        continue
+                    break
+                
+                if response.status_code == 304 and http_cache_key:
+                    limiter.record_success()
+                    cached_result = await self._revalidated_body(http_cache_key)
+                    if cached_result is not None:
+                        self.log_info(f"API response not modified, using cached body: {method} {endpoint}")
+                        return cached_result
+                else:
+                    response.raise_for_status()
+                    limiter.record_success()
+                    
+                    result = response.json()
+                    if http_cache_key:
+                        await self._store_validated_response(http_cache_key, response.headers, result)
+                    self.log_info(f"Async API request successful: {method} {endpoint}")
+                    return result
+            
+            except httpx.HTTPStatusError as e:
+                self.log_error(f"HTTP error for {method} {endpoint}: {e}")
+                if e.response.status_code == 429:  # Rate limited
+                    await limiter.record_throttle_async()
+                raise
+            except httpx.HTTPError as e:
+                self.log_error(f"Request error for {method} {endpoint}: {e}")
+                raise
+        
+        # Cached body is gone, the validators were dropped so this fetches it in full
+        return await self._make_request(method, endpoint, params=params, data=data)
+    
+    async def _cache_key(self, resource: str, *parts: Any) -> str:
+        """Key of a cached collection in the versioned ``agworld:{resource}`` namespace"""
+        return await async_redis_client.namespaced_key(f"agworld:{resource}", *parts)
+    
+    async def _conditional_headers(self, cache_key: str) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers from stored validators"""
+        return self.resources._validator_headers(await async_redis_client.get(f"{cache_key}:validators"))
+    
+    async def _store_validated_response(self, cache_key: str, response_headers: Any, result: Dict[str, Any]):
+        """Keep a response body together with its validators, if the API sent any"""
+        validators = self.resources._response_validators(response_headers)
+        if validators is None:
+            return
+        ttl = self.resources.http_cache_ttl
+        await async_redis_client.set_many({cache_key: result, f"{cache_key}:validators": validators}, ex=ttl)
+    
+    async def _revalidated_body(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Extend the lifetime of a response confirmed by a 304 and return its body"""
+        cached_result = await async_redis_client.get(cache_key)
+        if cached_result is None:
+            await async_redis_client.delete(f"{cache_key}:validators")
+            return None
+        ttl = self.resources.http_cache_ttl
+        await async_redis_client.expire(cache_key, ttl)
+        await async_redis_client.expire(f"{cache_key}:validators", ttl)
+        return cached_result
+    
+    async def _get_fresh(self, cache_key: str) -> Optional[Any]:
+        """Return a cached collection only while it is still fresh"""
+        if await async_redis_client.exists(f"{cache_key}:fresh"):
+            return await async_redis_client.get(cache_key)
+        return None
+    
+    async def _store_collection(self, cache_key: str, data: Any, ttl: int):
+        """Cache a collection with a freshness marker and a stale-while-revalidate grace period"""
+        await async_redis_client.set_many(
+            {cache_key: data, f"{cache_key}:fresh": 1},
+            ex={cache_key: ttl + self.resources.stale_ttl, f"{cache_key}:fresh": ttl}
+        )
+        # Indexes built from the previous copy are out of date
+        entity_store.discard(cache_key)
+    
+    def _last_page_number(self, document: Dict[str, Any]) -> Optional[int]:
+        """Read the total page count from JSON API links or meta, if advertised"""
+        last_link = (document.get("links") or {}).get("last")
+        if last_link:
+            query = dict(parse_qsl(urlsplit(urljoin(f"{self.base_url}/", last_link)).query))
+            if "page[number]" in query:
+                try:
+                    return int(query["page[number]"])
+                except ValueError:
+                    return None
+        
+        meta = document.get("meta") or {}
+        for key in ("total_pages", "page_count"):
+            if meta.get(key) is not None:
+                return int(meta[key])
+        return None
+    
+    async def _fetch_all_pages(self, endpoint: str, params: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        """Fetch every page of an endpoint.
+        
+        When the first page advertises the page count the remaining pages are
+        requested concurrently; otherwise ``links.next`` is followed in order.
+        """
+        params = dict(params or {})
+        params.setdefault("page[size]", str(self.resources.page_size))
+        params["page[number]"] = "1"
+        
+        first_page = await self._make_request("GET", endpoint, params=params)
+        pages = [first_page]
+        if not first_page.get("data"):
+            return pages
+        
+        last_page = self._last_page_number(first_page)
+        if last_page is not None:
+            pages.extend(await asyncio.gather(*(
+                self._make_request("GET", endpoint, params={**params, "page[number]": str(number)})
+                for number in range(2, last_page + 1)
+            )))
+            return pages
+        
+        document = first_page
+        while document.get("data"):
+            next_link = (document.get("links") or {}).get("next")
+            if next_link:
+                url, params = self.resources._split_link(next_link)
+                document = await self._make_request("GET", url, params=params)
+            elif "links" not in document and len(document["data"]) >= int(params["page[size]"]):
+                params = {**params, "page[number]": str(int(params["page[number]"]) + 1)}
+                document = await self._make_request("GET", endpoint, params=params)
+            else:
+                break
+            pages.append(document)
+        return pages
+    
+    async def _get_collection(
+        self,
+        label: str,
+        cache_key: str,
+        ttl: int,
+        endpoint: str,
+        resource_type: str,
+        mapper: Callable[[Dict[str, Any]], Dict[str, Any]],
+        mock: Callable[[], List[Dict[str, Any]]],
+        params: Optional[Dict] = None
+    ) -> List[Dict[str, Any]]:
+        """Fetch, map and cache one resource collection, falling back to mock data.
+        
+        Uses the same freshness markers and single-flight coordination as the
+        sync client, so a stale entry is served while one refresh runs.
+        """
+        self.log_info(f"Fetching {label} data from Agworld")
+        
+        async def fetch() -> List[Dict[str, Any]]:
+            pages = await self._fetch_all_pages(endpoint, params=params)
+            records = [
+                mapper(item)
+                for page in pages
+                for item in page.get("data") or []
+                if item.get("type") == resource_type
+            ]
+            return records
+        
+        async def fill(keep_stale: bool = False) -> List[Dict[str, Any]]:
+            try:
+                records = await fetch()
+                await self._store_collection(cache_key, records, ttl)
+                return records
+            except Exception as api_error:
+                if keep_stale:
+                    raise
+                self.log_warning(f"API call failed, using mock data: {api_error}")
+                mock_data = mock()
+                await self._store_collection(cache_key, mock_data, 300)
+                return mock_data
+        
+        cached_data = await async_redis_client.get(cache_key)
+        if cached_data is not None:
+            if await async_redis_client.exists(f"{cache_key}:fresh"):
+                self.log_info(f"Returning cached {label} data")
+                return cached_data
+            self.log_info(f"Returning stale {label} data while refreshing")
+            async_redis_client.metrics.incr(cache_key, "stale_serves")
+            single_flight.refresh_async(cache_key, lambda: fill(keep_stale=True))
+            return cached_data
+        
+        return await single_flight.do_async(
+            cache_key,
+            fill,
+            cached=lambda: self._get_fresh(cache_key)
+        )
+    
+    async def get_fields(self, farm_id: Optional[str] = None, season_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get field data from Agworld API"""
+        params = {}
+        if farm_id:
+            params["filter[farm_id]"] = farm_id
+        if season_id:
+            params["season_id"] = season_id
+        
+        return await self._get_collection(
+            "field",
+            await self._cache_key("fields", farm_id or 'all', season_id or 'all'),
+            3600,
+            "fields",
+            "fields",
+            lambda item: self.resources._map_field(item, season_id),
+            self.resources._get_mock_field_data,
+            params=params
+        )
+    
+    async def get_crops(self, field_id: Optional[str] = None, season_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get crop data from Agworld API (extracted from fields data)"""
+        collection_key = await self._cache_key("fields", 'all', season_id or 'all')
+        index = entity_store.get_crop_index(collection_key)
+        if index is None:
+            version = entity_store.version()
+            fields_data = await self.get_fields(farm_id=None, season_id=season_id)
+            index = entity_store.put_crop_index(collection_key, fields_data, version=version)
+        crops_data = index.for_field(field_id) if field_id else index.all()
+        return crops_data or self.resources._get_mock_crop_data()
+    
+    async def get_activities(
+        self,
+        field_id: Optional[str] = None,
+        company_id: Optional[str] = None,
+        activity_type: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get activity data from Agworld API"""
+        if field_id and "field_id" not in self.resources.ACTIVITY_FILTERS:
+            # Serve per-field queries from an index over the unfiltered collection
+            collection_key = await self._activities_cache_key(None, company_id, activity_type, start_date, end_date)
+            index = entity_store.get_activity_index(collection_key)
+            if index is None:
+                version = entity_store.version()
+                activities_data = await self.get_activities(
+                    company_id=company_id,
+                    activity_type=activity_type,
+                    start_date=start_date,
+                    end_date=end_date
+                )
+                index = entity_store.put_activity_index(collection_key, activities_data, version=version)
+            return index.for_field(field_id)
+        
+        return await self._get_collection(
+            "activity",
+            await self._activities_cache_key(field_id, company_id, activity_type, start_date, end_date),
+            1800,
+            "activities",
+            "activities",
+            self.resources._map_activity,
+            self.resources._get_mock_activity_data,
+            params=self.resources._activity_params(
+                field_id=field_id,
+                company_id=company_id,
+                activity_type=activity_type,
+                start_date=start_date
+            )
+        )
+    
+    async def _activities_cache_key(
+        self,
+        field_id: Optional[str],
+        company_id: Optional[str],
+        activity_type: Optional[str],
+        start_date: Optional[str],
+        end_date: Optional[str]
+    ) -> str:
+        return await self._cache_key(
+            "activities",
+            *self.resources._activities_cache_parts(field_id, company_id, activity_type, start_date, end_date)
+        )
+    
+    async def get_companies(self, company_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get company data from Agworld API"""
+        params = {}
+        if company_type:
+            params["filter[company_type]"] = company_type
+        
+        return await self._get_collection(
+            "company",
+            await self._cache_key("companies", company_type or 'all'),
+            3600,
+            "companies",
+            "companies",
+            self.resources._map_company,
+            self.resources._get_mock_company_data,
+            params=params
+        )
+    
+    async def get_farms(self, company_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get farm data from Agworld API"""
+        params = {}
+        if company_id:
+            params["filter[company_id]"] = company_id
+        
+        return await self._get_collection(
+            "farm",
+            await self._cache_key("farms", company_id or 'all'),
+            3600,
+            "farms",
+            "farms",
+            self.resources._map_farm,
+            self.resources._get_mock_farm_data,
+            params=params
+        )
+    
+    async def get_seasons(self, company_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get season data from Agworld API"""
+        params = {}
+        if company_id:
+            params["filter[company_id]"] = company_id
+        
+        return await self._get_collection(
+            "season",
+            await self._cache_key("seasons", company_id or 'all'),
+            3600,
+            "seasons",
+            "seasons",
+            self.resources._map_season,
+            self.resources._get_mock_season_data,
+            params=params
+        )
+    
+    async def fetch_company_snapshot(
+        self,
+        company_id: Optional[str] = None,
+        season_id: Optional[str] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Fetch every independent collection for a company concurrently"""
+        self.log_info(f"Fetching Agworld snapshot for company {company_id or 'all'}")
+        
+        fields_key = await self._cache_key("fields", 'all', season_id or 'all')
+        version = entity_store.version()
+        fields, activities, companies, farms, seasons = await asyncio.gather(
+            self.get_fields(season_id=season_id),
+            self.get_activities(company_id=company_id),
+            self.get_companies(),
+            self.get_farms(company_id=company_id),
+            self.get_seasons(company_id=company_id)
+        )
+        
+        # The index is only rebuilt when get_fields refilled the collection
+        crop_index = (
+            entity_store.get_crop_index(fields_key)
+            or entity_store.put_crop_index(fields_key, fields, version=version)
+        )
+        return {
+            "fields": fields,
+            "crops": crop_index.all() or self.resources._get_mock_crop_data(),
+            "activities": activities,
+            "companies": companies,
+            "farms": farms,
+            "seasons": seasons
+        }
+
+# Global async client instance
+async_agworld_client = AsyncAgworldAPIClient()
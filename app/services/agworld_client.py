@@ -1,14 +1,45 @@
 import requests
-from typing import Dict, Any, List, Optional
+import hashlib
+import json
+from typing import Dict, Any, List, Optional, Iterator, Callable, Tuple
 from datetime import datetime
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl
 import time
+from enum import Enum
 from app.config import settings
 from app.utils.logger import LoggerMixin
 from app.redis_client import redis_client
+from app.services.rate_limiter import agworld_rate_limiter, RETRY_STATUSES
+from app.services.single_flight import single_flight
+from app.services.entity_store import entity_store
+
+# Incremental JSON parser for large responses, optional
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+class AgworldResource(str, Enum):
+    """Cached Agworld collections, each in its own ``agworld:{resource}`` namespace"""
+    FIELDS = "fields"
+    ACTIVITIES = "activities"
+    WEATHER = "weather"
+    COMPANIES = "companies"
+    FARMS = "farms"
+    SEASONS = "seasons"
 
 class AgworldAPIClient(LoggerMixin):
     """Client for Agworld API integration following JSON API specification"""
     
+    # Activity filters applied server-side and the query parameter each maps to.
+    # Filters missing here (field_id) are answered from local indexes instead.
+    ACTIVITY_FILTERS = {
+        "company_id": "filter[company_id]",
+        "activity_type": "filter[activity_type]",
+        "start_date": "filter[updated_at]",  # Use updated_at for date filtering
+    }
+    
     def __init__(self):
         super().__init__()
         self.api_key = settings.AGWORLD_API_KEY
@@ -21,48 +52,111 @@ class AgworldAPIClient(LoggerMixin):
             "Accept": "application/vnd.api+json",
             "User-Agent": "SyndicAgent/1.0"
         })
-        self.rate_limit_delay = 1  # Delay between requests to respect rate limits
+        # Token bucket shared with every other Agworld client to respect rate limits
+        self.rate_limiter = agworld_rate_limiter
+        self.page_size = getattr(settings, 'AGWORLD_PAGE_SIZE', 100)
+        # How long raw responses and their ETag/Last-Modified validators are kept for revalidation
+        self.http_cache_ttl = getattr(settings, 'AGWORLD_HTTP_CACHE_TTL', 86400)
+        # Expired collections are still served for this long while a refresh runs
+        self.stale_ttl = getattr(settings, 'CACHE_STALE_TTL', 300)
+        # Parse the data array of each page incrementally instead of buffering the whole body
+        self.stream_json = getattr(settings, 'AGWORLD_STREAM_JSON', False) and IJSON_AVAILABLE
+        if getattr(settings, 'AGWORLD_STREAM_JSON', False) and not IJSON_AVAILABLE:
+            self.log_warning("AGWORLD_STREAM_JSON is set but ijson is not installed, using response.json()")
     
-    def _make_request(
+    def _request_url(self, endpoint: str, params: Optional[Dict]) -> Tuple[str, Dict]:
+        """Resolve an endpoint to a URL and add the API token to its parameters"""
+        # Pagination links are absolute URLs, everything else is relative to the base URL
+        if endpoint.startswith(("http://", "https://")):
+            url = endpoint
+        else:
+            url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        
+        # Add API token to params as per Agworld API docs
+        if params is None:
+            params = {}
+        if self.api_key:
+            params["api_token"] = self.api_key
+        return url, params
+    
+    def _send(
         self,
         method: str,
-        endpoint: str,
-        params: Optional[Dict] = None,
-        data: Optional[Dict] = None
-    ) -> Dict[str, Any]:
-        """Make HTTP request to Agworld API with error handling"""
-        try:
-            url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        url: str,
+        params: Dict,
+        data: Optional[Dict] = None,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False
+    ) -> requests.Response:
+        """Send a request through the rate limiter, retrying throttled and failed attempts"""
+        for attempt in range(self.rate_limiter.max_retries + 1):
+            # Wait for a token from the shared bucket
+            self.rate_limiter.acquire()
             self.log_info(f"Making {method} request to {url}")
             
-            # Add rate limiting
-            time.sleep(self.rate_limit_delay)
-            
-            # Add API token to params as per Agworld API docs
-            if params is None:
-                params = {}
-            if self.api_key:
-                params["api_token"] = self.api_key
-            
             response = self.session.request(
                 method=method,
                 url=url,
                 params=params,
                 json=data,
-                timeout=30
+                headers=headers or {},
+                timeout=30,
+                stream=stream
             )
             
-            response.raise_for_status()
+            if response.status_code in RETRY_STATUSES and attempt < self.rate_limiter.max_retries:
+                retry_after = self.rate_limiter.parse_retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 429:
+                    self.rate_limiter.record_throttle(retry_after)
+                delay = self.rate_limiter.backoff_delay(attempt, retry_after)
+                self.log_warning(
+                    f"{method} {url} returned {response.status_code}, "
+                    f"retrying in {delay:.1f}s (attempt {attempt + 1}/{self.rate_limiter.max_retries})"
+                )
+                response.close()
+                time.sleep(delay)
+                continue
+            break
+        
+        response.raise_for_status()
+        self.rate_limiter.record_success()
+        return response
+    
+    def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        data: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Make HTTP request to Agworld API with rate limiting, retries and error handling"""
+        try:
+            url, params = self._request_url(endpoint, params)
+            
+            # Revalidate a previously cached GET response instead of downloading it again
+            http_cache_key = self._http_cache_key(url, params) if method == "GET" else None
+            headers = self._conditional_headers(http_cache_key) if http_cache_key else {}
+            
+            response = self._send(method, url, params, data=data, headers=headers)
+            
+            if response.status_code == 304 and http_cache_key:
+                cached_result = self._revalidated_body(http_cache_key)
+                if cached_result is not None:
+                    self.log_info(f"API response not modified, using cached body: {method} {endpoint}")
+                    return cached_result
+                # Cached body is gone, the validators were dropped so this fetches it in full
+                return self._make_request(method, endpoint, params=params, data=data)
             
             result = response.json()
+            if http_cache_key:
+                self._store_validated_response(http_cache_key, response.headers, result)
             self.log_info(f"API request successful: {method} {endpoint}")
             return result
-            
+        
         except requests.exceptions.HTTPError as e:
             self.log_error(f"HTTP error for {method} {endpoint}: {e}")
             if e.response.status_code == 429:  # Rate limited
-                self.log_warning("Rate limited, increasing delay")
-                self.rate_limit_delay *= 2
+                self.rate_limiter.record_throttle()
             raise
         except requests.exceptions.RequestException as e:
             self.log_error(f"Request error for {method} {endpoint}: {e}")
@@ -71,70 +165,454 @@ class AgworldAPIClient(LoggerMixin):
             self.log_error(f"Unexpected error for {method} {endpoint}: {e}")
             raise
     
-    def get_fields(self, farm_id: Optional[str] = None, season_id: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get field data from Agworld API"""
+    def _stream_page(self, endpoint: str, params: Optional[Dict], page_info: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Yield the ``data`` resources of one GET response while it is downloading.
+        
+        Only one resource is held in memory at a time. The document's ``links``
+        and ``meta`` members and the number of resources are recorded in
+        ``page_info`` for pagination. Streamed pages bypass the ETag cache,
+        which needs the whole body.
+        """
         try:
-            self.log_info("Fetching field data from Agworld")
+            url, params = self._request_url(endpoint, params)
+            with self._send("GET", url, params, stream=True) as response:
+                # Let urllib3 undo any gzip/deflate transfer encoding
+                response.raw.decode_content = True
+                page_info["count"] = 0
+                member, builder, depth = None, None, 0
+                
+                for prefix, event, value in ijson.parse(response.raw, use_float=True):
+                    if member is None:
+                        if event != "start_map" or prefix not in ("data.item", "links", "meta"):
+                            continue
+                        member, builder, depth = prefix, ijson.ObjectBuilder(), 0
+                    
+                    builder.event(event, value)
+                    if event in ("start_map", "start_array"):
+                        depth += 1
+                    elif event in ("end_map", "end_array"):
+                        depth -= 1
+                    if depth:
+                        continue
+                    
+                    if member == "data.item":
+                        page_info["count"] += 1
+                        yield builder.value
+                    else:
+                        page_info[member] = builder.value
+                    member, builder = None, None
             
-            # Check cache first
-            cache_key = f"agworld:fields:{farm_id or 'all'}:{season_id or 'all'}"
-            cached_data = redis_client.get(cache_key)
-            if cached_data:
-                self.log_info("Returning cached field data")
-                return cached_data
+            self.log_info(f"Streamed {page_info['count']} resources from GET {endpoint}")
+        
+        except requests.exceptions.HTTPError as e:
+            self.log_error(f"HTTP error for GET {endpoint}: {e}")
+            if e.response.status_code == 429:  # Rate limited
+                self.rate_limiter.record_throttle()
+            raise
+        except requests.exceptions.RequestException as e:
+            self.log_error(f"Request error for GET {endpoint}: {e}")
+            raise
+        except Exception as e:
+            self.log_error(f"Unexpected error streaming GET {endpoint}: {e}")
+            raise
+    
+    def _http_cache_key(self, url: str, params: Dict[str, Any]) -> str:
+        """Cache key for a raw GET response, independent of the API token"""
+        signature = json.dumps([url, sorted((k, str(v)) for k, v in params.items() if k != "api_token")])
+        return f"agworld:http:{hashlib.sha1(signature.encode()).hexdigest()}"
+    
+    @staticmethod
+    def _validator_headers(validators: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for stored validators"""
+        validators = validators or {}
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+    
+    @staticmethod
+    def _response_validators(response_headers: Dict[str, str]) -> Optional[Dict[str, Optional[str]]]:
+        """ETag/Last-Modified validators of a response, None if it has neither"""
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return None
+        return {"etag": etag, "last_modified": last_modified}
+    
+    def _conditional_headers(self, cache_key: str) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers from stored validators"""
+        return self._validator_headers(redis_client.get(f"{cache_key}:validators"))
+    
+    def _store_validated_response(self, cache_key: str, response_headers: Dict[str, str], result: Dict[str, Any]):
+        """Keep a response body together with its validators, if the API sent any"""
+        validators = self._response_validators(response_headers)
+        if validators is None:
+            return
+        with redis_client.batch() as batch:
+            batch.set(cache_key, result, ex=self.http_cache_ttl)
+            batch.set(f"{cache_key}:validators", validators, ex=self.http_cache_ttl)
+    
+    def _revalidated_body(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Extend the lifetime of a response confirmed by a 304 and return its body"""
+        cached_result = redis_client.get(cache_key)
+        if cached_result is None:
+            redis_client.delete(f"{cache_key}:validators")
+            return None
+        redis_client.expire(cache_key, self.http_cache_ttl)
+        redis_client.expire(f"{cache_key}:validators", self.http_cache_ttl)
+        return cached_result
+    
+    def _split_link(self, link: str) -> Tuple[str, Dict[str, str]]:
+        """Split a JSON API pagination link into a URL and its query parameters"""
+        parts = urlsplit(urljoin(f"{self.base_url}/", link))
+        params = {k: v for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != "api_token"}
+        url = urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+        return url, params
+    
+    def _next_page(
+        self,
+        endpoint: str,
+        params: Dict[str, str],
+        document: Dict[str, Any],
+        count: int,
+        page_size: int
+    ) -> Optional[Tuple[str, Dict[str, str]]]:
+        """Endpoint and parameters of the page after ``document``, or None on the last page.
+        
+        Follows ``links.next`` when the API provides it and otherwise keeps
+        incrementing ``page[number]`` until a short or empty page is returned.
+        """
+        next_link = (document.get("links") or {}).get("next")
+        if not count:
+            return None
+        if next_link:
+            return self._split_link(next_link)
+        if "links" not in document and count >= page_size:
+            params = dict(params)
+            params["page[number]"] = str(int(params.get("page[number]", 1)) + 1)
+            return endpoint, params
+        return None
+    
+    def _first_page_params(self, params: Optional[Dict]) -> Dict[str, str]:
+        """Query parameters of the first page, with the configured page size"""
+        params = dict(params or {})
+        params.setdefault("page[size]", str(self.page_size))
+        params.setdefault("page[number]", "1")
+        return params
+    
+    def _iter_pages(self, endpoint: str, params: Optional[Dict] = None) -> Iterator[Dict[str, Any]]:
+        """Yield JSON API response documents page by page"""
+        params = self._first_page_params(params)
+        page_size = int(params["page[size]"])
+        
+        while True:
+            result = self._make_request("GET", endpoint, params=params)
+            yield result
             
-            params = {}
-            if farm_id:
-                params["filter[farm_id]"] = farm_id
-            if season_id:
-                params["season_id"] = season_id
+            next_page = self._next_page(endpoint, params, result, len(result.get("data") or []), page_size)
+            if next_page is None:
+                break
+            endpoint, params = next_page
+    
+    def _iter_streamed_items(self, endpoint: str, params: Optional[Dict] = None) -> Iterator[Dict[str, Any]]:
+        """Yield raw resources of every page, parsing each response incrementally"""
+        params = self._first_page_params(params)
+        page_size = int(params["page[size]"])
+        
+        while True:
+            page_info: Dict[str, Any] = {}
+            yield from self._stream_page(endpoint, params, page_info)
             
-            try:
-                # Use actual Agworld API endpoint
-                result = self._make_request("GET", "fields", params=params)
-                
-                # Extract data from JSON API response
-                fields_data = []
-                if "data" in result:
-                    for item in result["data"]:
-                        if item.get("type") == "fields":
-                            field_data = {
-                                "id": item.get("id"),
-                                "name": item.get("attributes", {}).get("name"),
-                                "area": item.get("attributes", {}).get("area"),
-                                "farm_id": item.get("attributes", {}).get("farm_id"),
-                                "description": item.get("attributes", {}).get("description"),
-                                "cropping_method": item.get("attributes", {}).get("cropping_method"),
-                                "boundary": item.get("attributes", {}).get("boundary"),
-                                "created_at": item.get("attributes", {}).get("created_at"),
-                                "updated_at": item.get("attributes", {}).get("updated_at")
-                            }
-                            # Add seasonal data if season_id was provided
-                            if season_id:
-                                attrs = item.get("attributes", {})
-                                field_data.update({
-                                    "crops": attrs.get("crops"),
-                                    "chemical_cost": attrs.get("chemical_cost"),
-                                    "fertilizer_cost": attrs.get("fertilizer_cost"),
-                                    "seed_cost": attrs.get("seed_cost"),
-                                    "harvested_area": attrs.get("harvested_area"),
-                                    "harvested_weight": attrs.get("harvested_weight"),
-                                    "planting_date": attrs.get("planting_date"),
-                                    "harvest_date": attrs.get("harvest_date")
-                                })
-                            fields_data.append(field_data)
-                
-                # Cache the results for 1 hour
-                redis_client.set(cache_key, fields_data, ex=3600)
-                return fields_data
-                
-            except Exception as api_error:
-                self.log_warning(f"API call failed, using mock data: {api_error}")
-                # Fall back to mock data if API is not available
-                mock_data = self._get_mock_field_data()
-                redis_client.set(cache_key, mock_data, ex=300)  # Cache for 5 minutes
-                return mock_data
+            next_page = self._next_page(endpoint, params, page_info, page_info.get("count", 0), page_size)
+            if next_page is None:
+                break
+            endpoint, params = next_page
+    
+    def _iter_resources(
+        self,
+        endpoint: str,
+        resource_type: str,
+        mapper: Callable[[Dict[str, Any]], Dict[str, Any]],
+        params: Optional[Dict] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield mapped resources of one type from every page of an endpoint"""
+        if self.stream_json:
+            items = self._iter_streamed_items(endpoint, params=params)
+        else:
+            items = (item for page in self._iter_pages(endpoint, params=params) for item in page.get("data") or [])
+        
+        for item in items:
+            if item.get("type") == resource_type:
+                yield mapper(item)
+    
+    def _map_field(self, item: Dict[str, Any], season_id: Optional[str] = None) -> Dict[str, Any]:
+        """Map a JSON API field resource to a flat field record"""
+        attrs = item.get("attributes", {})
+        field_data = {
+            "id": item.get("id"),
+            "name": attrs.get("name"),
+            "area": attrs.get("area"),
+            "farm_id": attrs.get("farm_id"),
+            "description": attrs.get("description"),
+            "cropping_method": attrs.get("cropping_method"),
+            "boundary": attrs.get("boundary"),
+            "created_at": attrs.get("created_at"),
+            "updated_at": attrs.get("updated_at")
+        }
+        # Add seasonal data if season_id was provided
+        if season_id:
+            field_data.update({
+                "crops": attrs.get("crops"),
+                "chemical_cost": attrs.get("chemical_cost"),
+                "fertilizer_cost": attrs.get("fertilizer_cost"),
+                "seed_cost": attrs.get("seed_cost"),
+                "harvested_area": attrs.get("harvested_area"),
+                "harvested_weight": attrs.get("harvested_weight"),
+                "planting_date": attrs.get("planting_date"),
+                "harvest_date": attrs.get("harvest_date")
+            })
+        return field_data
+    
+    def _map_activity(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a JSON API activity resource to a flat activity record"""
+        attrs = item.get("attributes", {})
+        return {
+            "id": item.get("id"),
+            "title": attrs.get("title"),
+            "activity_type": attrs.get("activity_type"),
+            "activity_category": attrs.get("activity_category"),
+            "approved": attrs.get("approved"),
+            "completed": attrs.get("completed"),
+            "area": attrs.get("area"),
+            "total_cost": attrs.get("total_cost"),
+            "chemical_cost": attrs.get("chemical_cost"),
+            "fertilizer_cost": attrs.get("fertilizer_cost"),
+            "seed_cost": attrs.get("seed_cost"),
+            "due_at": attrs.get("due_at"),
+            "completed_at": attrs.get("completed_at"),
+            "created_at": attrs.get("created_at"),
+            "updated_at": attrs.get("updated_at"),
+            "company_id": attrs.get("company_id"),
+            "company_name": attrs.get("company_name"),
+            "author_user_name": attrs.get("author_user_name"),
+            "activity_fields": attrs.get("activity_fields", []),
+            "activity_inputs": attrs.get("activity_inputs", [])
+        }
+    
+    def _activity_touches_field(self, activity_data: Dict[str, Any], field_id: str) -> bool:
+        """Check whether an activity was applied to the given field"""
+        return any(
+            af.get("field_id") == field_id
+            for af in activity_data.get("activity_fields") or []
+        )
+    
+    def _map_company(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a JSON API company resource to a flat company record"""
+        attrs = item.get("attributes", {})
+        return {
+            "id": item.get("id"),
+            "name": attrs.get("name"),
+            "company_type": attrs.get("company_type"),
+            "business_identifier": attrs.get("business_identifier"),
+            "contact_email": attrs.get("contact_email"),
+            "contact_name": attrs.get("contact_name"),
+            "description": attrs.get("description"),
+            "physical_location": attrs.get("physical_location"),
+            "created_at": attrs.get("created_at"),
+            "updated_at": attrs.get("updated_at")
+        }
+    
+    def _map_farm(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a JSON API farm resource to a flat farm record"""
+        attrs = item.get("attributes", {})
+        return {
+            "id": item.get("id"),
+            "name": attrs.get("name"),
+            "company_id": attrs.get("company_id"),
+            "description": attrs.get("description"),
+            "location": attrs.get("location"),
+            "reporting_region": attrs.get("reporting_region"),
+            "created_at": attrs.get("created_at"),
+            "updated_at": attrs.get("updated_at")
+        }
+    
+    def _map_season(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a JSON API season resource to a flat season record"""
+        attrs = item.get("attributes", {})
+        return {
+            "id": item.get("id"),
+            "name": attrs.get("name"),
+            "company_id": attrs.get("company_id"),
+            "approved": attrs.get("approved"),
+            "season_start_date": attrs.get("season_start_date"),
+            "season_end_date": attrs.get("season_end_date"),
+            "created_at": attrs.get("created_at"),
+            "updated_at": attrs.get("updated_at")
+        }
+    
+    def iter_fields(
+        self,
+        farm_id: Optional[str] = None,
+        season_id: Optional[str] = None,
+        updated_since: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream field records from Agworld API, one page at a time"""
+        params = {}
+        if farm_id:
+            params["filter[farm_id]"] = farm_id
+        if season_id:
+            params["season_id"] = season_id
+        if updated_since:
+            params["filter[updated_at]"] = updated_since
+        
+        return self._iter_resources(
+            "fields", "fields", lambda item: self._map_field(item, season_id), params=params
+        )
+    
+    def _activity_params(self, **filters: Optional[str]) -> Dict[str, str]:
+        """Translate activity filters the API supports into query parameters"""
+        return {
+            self.ACTIVITY_FILTERS[name]: value
+            for name, value in filters.items()
+            if value and name in self.ACTIVITY_FILTERS
+        }
+    
+    def iter_activities(
+        self,
+        field_id: Optional[str] = None,
+        company_id: Optional[str] = None,
+        activity_type: Optional[str] = None,
+        start_date: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream activity records from Agworld API, one page at a time"""
+        params = self._activity_params(
+            field_id=field_id,
+            company_id=company_id,
+            activity_type=activity_type,
+            start_date=start_date
+        )
+        filter_locally = field_id and "field_id" not in self.ACTIVITY_FILTERS
+        
+        for activity_data in self._iter_resources("activities", "activities", self._map_activity, params=params):
+            # Filter by field_id if the API could not
+            if filter_locally and not self._activity_touches_field(activity_data, field_id):
+                continue
+            yield activity_data
+    
+    def iter_companies(self, company_type: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Stream company records from Agworld API, one page at a time"""
+        params = {}
+        if company_type:
+            params["filter[company_type]"] = company_type
+        return self._iter_resources("companies", "companies", self._map_company, params=params)
+    
+    def iter_farms(self, company_id: Optional[str] = None, updated_since: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Stream farm records from Agworld API, one page at a time"""
+        params = {}
+        if company_id:
+            params["filter[company_id]"] = company_id
+        if updated_since:
+            params["filter[updated_at]"] = updated_since
+        return self._iter_resources("farms", "farms", self._map_farm, params=params)
+    
+    def iter_seasons(self, company_id: Optional[str] = None, updated_since: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Stream season records from Agworld API, one page at a time"""
+        params = {}
+        if company_id:
+            params["filter[company_id]"] = company_id
+        if updated_since:
+            params["filter[updated_at]"] = updated_since
+        return self._iter_resources("seasons", "seasons", self._map_season, params=params)
+    
+    def _cache_key(self, resource: str, *parts: Any) -> str:
+        """Key of a cached collection in the versioned ``agworld:{resource}`` namespace"""
+        return redis_client.namespaced_key(f"agworld:{resource}", *parts)
+    
+    def _get_fresh(self, cache_key: str) -> Optional[Any]:
+        """Return a cached collection only while it is still fresh"""
+        if redis_client.exists(f"{cache_key}:fresh"):
+            return redis_client.get(cache_key)
+        return None
+    
+    def _store_collection(self, cache_key: str, data: Any, ttl: int):
+        """Cache a collection with a freshness marker and a stale-while-revalidate grace period"""
+        with redis_client.batch() as batch:
+            batch.set(cache_key, data, ex=ttl + self.stale_ttl)
+            batch.set(f"{cache_key}:fresh", 1, ex=ttl)
+        # Indexes built from the previous copy are out of date
+        entity_store.discard(cache_key)
+    
+    def _fill_collection(
+        self,
+        cache_key: str,
+        ttl: int,
+        fetch: Callable[[], List[Dict[str, Any]]],
+        mock: Callable[[], List[Dict[str, Any]]],
+        keep_stale: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Fetch a collection from the API and cache it, falling back to mock data"""
+        try:
+            data = fetch()
+            self._store_collection(cache_key, data, ttl)
+            return data
+        except Exception as api_error:
+            if keep_stale:
+                # Background refresh: keep serving the stale copy rather than mock data
+                raise
+            self.log_warning(f"API call failed, using mock data: {api_error}")
+            # Fall back to mock data if API is not available
+            mock_data = mock()
+            self._store_collection(cache_key, mock_data, 300)  # Cache for 5 minutes
+            return mock_data
+    
+    def _cached_fetch(
+        self,
+        label: str,
+        cache_key: str,
+        ttl: int,
+        fetch: Callable[[], List[Dict[str, Any]]],
+        mock: Callable[[], List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Read-through cache for a collection with single-flight fills.
+        
+        Fresh entries are returned directly. Stale entries (past ``ttl`` but
+        within the grace period) are returned immediately while one background
+        refresh runs. On a miss, concurrent callers share a single fetch.
+        """
+        cached_data = redis_client.get(cache_key)
+        if cached_data is not None:
+            if redis_client.exists(f"{cache_key}:fresh"):
+                self.log_info(f"Returning cached {label} data")
+                return cached_data
+            self.log_info(f"Returning stale {label} data while refreshing")
+            redis_client.metrics.incr(cache_key, "stale_serves")
+            single_flight.refresh(
+                cache_key, lambda: self._fill_collection(cache_key, ttl, fetch, mock, keep_stale=True)
+            )
+            return cached_data
+        
+        return single_flight.do(
+            cache_key,
+            lambda: self._fill_collection(cache_key, ttl, fetch, mock),
+            cached=lambda: self._get_fresh(cache_key)
+        )
+    
+    def get_fields(self, farm_id: Optional[str] = None, season_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get field data from Agworld API"""
+        try:
+            self.log_info("Fetching field data from Agworld")
             
+            # Cache the results for 1 hour
+            return self._cached_fetch(
+                "field",
+                self._cache_key("fields", farm_id or 'all', season_id or 'all'),
+                3600,
+                lambda: list(self.iter_fields(farm_id=farm_id, season_id=season_id)),
+                self._get_mock_field_data
+            )
+        
         except Exception as e:
             self.log_error(f"Failed to get field data: {str(e)}")
             raise
@@ -144,55 +622,26 @@ class AgworldAPIClient(LoggerMixin):
         try:
             self.log_info("Fetching crop data from Agworld")
             
-            cache_key = f"agworld:crops:{field_id or 'all'}:{season_id or 'all'}"
-            cached_data = redis_client.get(cache_key)
-            if cached_data:
-                self.log_info("Returning cached crop data")
-                return cached_data
+            # Crops are indexed in-process from one field fetch instead of being cached separately
+            # Keyed like the field collection, so an invalidated namespace also invalidates the index
+            collection_key = self._cache_key("fields", 'all', season_id or 'all')
+            index = entity_store.get_crop_index(collection_key)
+            if index is None:
+                version = entity_store.version()
+                # Get fields data which contains crop information when season_id is provided
+                fields_data = self.get_fields(farm_id=None, season_id=season_id)
+                index = entity_store.put_crop_index(collection_key, fields_data, version=version)
+            else:
+                self.log_info("Returning indexed crop data")
             
-            # Get fields data which contains crop information when season_id is provided
-            fields_data = self.get_fields(farm_id=None, season_id=season_id)
-            
-            crops_data = []
-            for field in fields_data:
-                if field_id and field.get("id") != field_id:
-                    continue
-                    
-                crops = field.get("crops", [])
-                if crops:
-                    for crop in crops:
-                        crop_data = {
-                            "id": f"{field.get('id')}_crop_{crops.index(crop)}",
-                            "type": crop.get("crop_name"),
-                            "variety": crop.get("variety_name"),
-                            "field_id": field.get("id"),
-                            "crop_grade": crop.get("crop_grade"),
-                            "crop_use": crop.get("crop_use"),
-                            "crop_blend": crop.get("crop_blend"),
-                            "planting_date": field.get("planting_date"),
-                            "harvest_date": field.get("harvest_date")
-                        }
-                        crops_data.append(crop_data)
-                else:
-                    # If no crops data in field, create a placeholder
-                    crop_data = {
-                        "id": f"{field.get('id')}_crop_unknown",
-                        "type": "Unknown",
-                        "variety": "Unknown",
-                        "field_id": field.get("id"),
-                        "planting_date": field.get("planting_date"),
-                        "harvest_date": field.get("harvest_date")
-                    }
-                    crops_data.append(crop_data)
+            crops_data = index.for_field(field_id) if field_id else index.all()
             
             # If no crops found, fall back to mock data
             if not crops_data:
                 crops_data = self._get_mock_crop_data()
             
-            # Cache the results for 1 hour
-            redis_client.set(cache_key, crops_data, ex=3600)
             return crops_data
-            
+        
         except Exception as e:
             self.log_error(f"Failed to get crop data: {str(e)}")
             # Fall back to mock data
@@ -211,84 +660,75 @@ class AgworldAPIClient(LoggerMixin):
         try:
             self.log_info("Fetching activity data from Agworld")
             
-            cache_key = f"agworld:activities:{field_id or 'all'}:{company_id or 'all'}:{activity_type or 'all'}:{start_date or 'no_start'}:{end_date or 'no_end'}"
-            cached_data = redis_client.get(cache_key)
-            if cached_data:
-                self.log_info("Returning cached activity data")
-                return cached_data
-            
-            params = {}
-            if company_id:
-                params["filter[company_id]"] = company_id
-            if activity_type:
-                params["filter[activity_type]"] = activity_type
-            if start_date:
-                params["filter[updated_at]"] = start_date  # Use updated_at for date filtering
-                
-            try:
-                # Use actual Agworld API endpoint
-                result = self._make_request("GET", "activities", params=params)
-                
-                # Extract data from JSON API response
-                activities_data = []
-                if "data" in result:
-                    for item in result["data"]:
-                        if item.get("type") == "activities":
-                            attrs = item.get("attributes", {})
-                            activity_data = {
-                                "id": item.get("id"),
-                                "title": attrs.get("title"),
-                                "activity_type": attrs.get("activity_type"),
-                                "activity_category": attrs.get("activity_category"),
-                                "approved": attrs.get("approved"),
-                                "completed": attrs.get("completed"),
-                                "area": attrs.get("area"),
-                                "total_cost": attrs.get("total_cost"),
-                                "chemical_cost": attrs.get("chemical_cost"),
-                                "fertilizer_cost": attrs.get("fertilizer_cost"),
-                                "seed_cost": attrs.get("seed_cost"),
-                                "due_at": attrs.get("due_at"),
-                                "completed_at": attrs.get("completed_at"),
-                                "created_at": attrs.get("created_at"),
-                                "updated_at": attrs.get("updated_at"),
-                                "company_id": attrs.get("company_id"),
-                                "company_name": attrs.get("company_name"),
-                                "author_user_name": attrs.get("author_user_name"),
-                                "activity_fields": attrs.get("activity_fields", []),
-                                "activity_inputs": attrs.get("activity_inputs", [])
-                            }
-                            # Filter by field_id if specified
-                            if field_id:
-                                field_matches = any(
-                                    af.get("field_id") == field_id 
-                                    for af in activity_data.get("activity_fields", [])
-                                )
-                                if field_matches:
-                                    activities_data.append(activity_data)
-                            else:
-                                activities_data.append(activity_data)
-                
-                # Cache the results for 30 minutes (activities change more frequently)
-                redis_client.set(cache_key, activities_data, ex=1800)
-                return activities_data
-                
-            except Exception as api_error:
-                self.log_warning(f"API call failed, using mock data: {api_error}")
-                # Fall back to mock data if API is not available
-                mock_data = self._get_mock_activity_data()
-                redis_client.set(cache_key, mock_data, ex=300)  # Cache for 5 minutes
-                return mock_data
+            if field_id and "field_id" not in self.ACTIVITY_FILTERS:
+                # Serve per-field queries from an index over the unfiltered collection,
+                # so every field shares one download and one cache entry
+                collection_key = self._activities_cache_key(None, company_id, activity_type, start_date, end_date)
+                index = entity_store.get_activity_index(collection_key)
+                if index is None:
+                    version = entity_store.version()
+                    activities_data = self.get_activities(
+                        company_id=company_id,
+                        activity_type=activity_type,
+                        start_date=start_date,
+                        end_date=end_date
+                    )
+                    index = entity_store.put_activity_index(collection_key, activities_data, version=version)
+                return index.for_field(field_id)
             
+            # Cache the results for 30 minutes (activities change more frequently)
+            return self._cached_fetch(
+                "activity",
+                self._activities_cache_key(field_id, company_id, activity_type, start_date, end_date),
+                1800,
+                lambda: list(self.iter_activities(
+                    field_id=field_id,
+                    company_id=company_id,
+                    activity_type=activity_type,
+                    start_date=start_date
+                )),
+                self._get_mock_activity_data
+            )
+        
         except Exception as e:
             self.log_error(f"Failed to get activity data: {str(e)}")
             raise
     
+    def _activities_cache_key(
+        self,
+        field_id: Optional[str],
+        company_id: Optional[str],
+        activity_type: Optional[str],
+        start_date: Optional[str],
+        end_date: Optional[str]
+    ) -> str:
+        return self._cache_key(
+            "activities",
+            *self._activities_cache_parts(field_id, company_id, activity_type, start_date, end_date)
+        )
+    
+    @staticmethod
+    def _activities_cache_parts(
+        field_id: Optional[str],
+        company_id: Optional[str],
+        activity_type: Optional[str],
+        start_date: Optional[str],
+        end_date: Optional[str]
+    ) -> Tuple[str, ...]:
+        return (
+            field_id or 'all',
+            company_id or 'all',
+            activity_type or 'all',
+            start_date or 'no_start',
+            end_date or 'no_end'
+        )
+    
     def get_weather(self, field_id: str) -> Dict[str, Any]:
         """Get weather data for a field"""
         try:
             self.log_info(f"Fetching weather data for field {field_id}")
             
-            cache_key = f"agworld:weather:{field_id}"
+            cache_key = self._cache_key("weather", field_id)
             cached_data = redis_client.get(cache_key)
             if cached_data:
                 self.log_info("Returning cached weather data")
@@ -302,7 +742,7 @@ class AgworldAPIClient(LoggerMixin):
             redis_client.set(cache_key, mock_data, ex=900)
             
             return mock_data
-            
+        
         except Exception as e:
             self.log_error(f"Failed to get weather data: {str(e)}")
             raise
@@ -312,47 +752,14 @@ class AgworldAPIClient(LoggerMixin):
         try:
             self.log_info("Fetching company data from Agworld")
             
-            cache_key = f"agworld:companies:{company_type or 'all'}"
-            cached_data = redis_client.get(cache_key)
-            if cached_data:
-                self.log_info("Returning cached company data")
-                return cached_data
-            
-            params = {}
-            if company_type:
-                params["filter[company_type]"] = company_type
-            
-            try:
-                result = self._make_request("GET", "companies", params=params)
-                
-                companies_data = []
-                if "data" in result:
-                    for item in result["data"]:
-                        if item.get("type") == "companies":
-                            attrs = item.get("attributes", {})
-                            company_data = {
-                                "id": item.get("id"),
-                                "name": attrs.get("name"),
-                                "company_type": attrs.get("company_type"),
-                                "business_identifier": attrs.get("business_identifier"),
-                                "contact_email": attrs.get("contact_email"),
-                                "contact_name": attrs.get("contact_name"),
-                                "description": attrs.get("description"),
-                                "physical_location": attrs.get("physical_location"),
-                                "created_at": attrs.get("created_at"),
-                                "updated_at": attrs.get("updated_at")
-                            }
-                            companies_data.append(company_data)
-                
-                redis_client.set(cache_key, companies_data, ex=3600)
-                return companies_data
-                
-            except Exception as api_error:
-                self.log_warning(f"API call failed, using mock data: {api_error}")
-                mock_data = self._get_mock_company_data()
-                redis_client.set(cache_key, mock_data, ex=300)
-                return mock_data
-                
+            return self._cached_fetch(
+                "company",
+                self._cache_key("companies", company_type or 'all'),
+                3600,
+                lambda: list(self.iter_companies(company_type=company_type)),
+                self._get_mock_company_data
+            )
+        
         except Exception as e:
             self.log_error(f"Failed to get company data: {str(e)}")
             raise
@@ -362,45 +769,14 @@ class AgworldAPIClient(LoggerMixin):
         try:
             self.log_info("Fetching farm data from Agworld")
             
-            cache_key = f"agworld:farms:{company_id or 'all'}"
-            cached_data = redis_client.get(cache_key)
-            if cached_data:
-                self.log_info("Returning cached farm data")
-                return cached_data
-            
-            params = {}
-            if company_id:
-                params["filter[company_id]"] = company_id
-            
-            try:
-                result = self._make_request("GET", "farms", params=params)
-                
-                farms_data = []
-                if "data" in result:
-                    for item in result["data"]:
-                        if item.get("type") == "farms":
-                            attrs = item.get("attributes", {})
-                            farm_data = {
-                                "id": item.get("id"),
-                                "name": attrs.get("name"),
-                                "company_id": attrs.get("company_id"),
-                                "description": attrs.get("description"),
-                                "location": attrs.get("location"),
-                                "reporting_region": attrs.get("reporting_region"),
-                                "created_at": attrs.get("created_at"),
-                                "updated_at": attrs.get("updated_at")
-                            }
-                            farms_data.append(farm_data)
-                
-                redis_client.set(cache_key, farms_data, ex=3600)
-                return farms_data
-                
-            except Exception as api_error:
-                self.log_warning(f"API call failed, using mock data: {api_error}")
-                mock_data = self._get_mock_farm_data()
-                redis_client.set(cache_key, mock_data, ex=300)
-                return mock_data
-                
+            return self._cached_fetch(
+                "farm",
+                self._cache_key("farms", company_id or 'all'),
+                3600,
+                lambda: list(self.iter_farms(company_id=company_id)),
+                self._get_mock_farm_data
+            )
+        
         except Exception as e:
             self.log_error(f"Failed to get farm data: {str(e)}")
             raise
@@ -410,45 +786,14 @@ class AgworldAPIClient(LoggerMixin):
         try:
             self.log_info("Fetching season data from Agworld")
             
-            cache_key = f"agworld:seasons:{company_id or 'all'}"
-            cached_data = redis_client.get(cache_key)
-            if cached_data:
-                self.log_info("Returning cached season data")
-                return cached_data
-            
-            params = {}
-            if company_id:
-                params["filter[company_id]"] = company_id
-            
-            try:
-                result = self._make_request("GET", "seasons", params=params)
-                
-                seasons_data = []
-                if "data" in result:
-                    for item in result["data"]:
-                        if item.get("type") == "seasons":
-                            attrs = item.get("attributes", {})
-                            season_data = {
-                                "id": item.get("id"),
-                                "name": attrs.get("name"),
-                                "company_id": attrs.get("company_id"),
-                                "approved": attrs.get("approved"),
-                                "season_start_date": attrs.get("season_start_date"),
-                                "season_end_date": attrs.get("season_end_date"),
-                                "created_at": attrs.get("created_at"),
-                                "updated_at": attrs.get("updated_at")
-                            }
-                            seasons_data.append(season_data)
-                
-                redis_client.set(cache_key, seasons_data, ex=3600)
-                return seasons_data
-                
-            except Exception as api_error:
-                self.log_warning(f"API call failed, using mock data: {api_error}")
-                mock_data = self._get_mock_season_data()
-                redis_client.set(cache_key, mock_data, ex=300)
-                return mock_data
-                
+            return self._cached_fetch(
+                "season",
+                self._cache_key("seasons", company_id or 'all'),
+                3600,
+                lambda: list(self.iter_seasons(company_id=company_id)),
+                self._get_mock_season_data
+            )
+        
         except Exception as e:
             self.log_error(f"Failed to get season data: {str(e)}")
             raise
@@ -729,7 +1074,7 @@ class AgworldAPIClient(LoggerMixin):
                 self.log_warning(f"Agworld API connection test failed, but configuration is valid: {api_error}")
                 # Consider it successful if API key is configured, even if API is unreachable
                 return True
-            
+        
         except Exception as e:
             self.log_error(f"Agworld API connection test failed: {str(e)}")
             return False
@@ -0,0 +1,158 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from app.config import settings
+from app.utils.logger import LoggerMixin
+from app.redis_client import redis_client
+from app.redis_async_client import async_redis_client
+from app.services.agworld_client import AgworldAPIClient, agworld_client
+
+class BulkSyncOrchestrator(LoggerMixin):
+    """Sync many companies at once over a bounded worker pool.
+    
+    Every company is split into independent stage tasks (farms, activities,
+    seasons, and one fields task per farm once its farms are known) that all
+    share one thread pool. Throughput is therefore bounded by the shared rate
+    limiter rather than by the latency of each company in turn. Progress is
+    written to ``sync:bulk:{run_id}`` as tasks complete.
+    """
+    
+    def __init__(self, client: Optional[AgworldAPIClient] = None, max_workers: Optional[int] = None):
+        super().__init__()
+        self.client = client or agworld_client
+        self.max_workers = max_workers or settings.BULK_SYNC_MAX_WORKERS
+    
+    def new_run_id(self) -> str:
+        return uuid.uuid4().hex[:12]
+    
+    def _progress_key(self, run_id: str) -> str:
+        return f"sync:bulk:{run_id}"
+    
+    def get_progress(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Return the progress of a bulk sync run"""
+        return redis_client.get(self._progress_key(run_id))
+    
+    async def get_progress_async(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """``get_progress`` through the asyncio Redis client"""
+        return await async_redis_client.get(self._progress_key(run_id))
+    
+    def _run_stage(self, stage: str, company_id: str, farm_id: Optional[str], season_id: Optional[str]) -> Tuple[List[Dict[str, Any]], float]:
+        started = time.monotonic()
+        # The iter_* methods raise API errors instead of falling back to mock
+        # data, so a failed fetch is reported in the company's status
+        if stage == "farms":
+            records = list(self.client.iter_farms(company_id=company_id))
+            cache_key, ttl = self.client._cache_key("farms", company_id), 3600
+        elif stage == "fields":
+            records = list(self.client.iter_fields(farm_id=farm_id, season_id=season_id))
+            cache_key, ttl = self.client._cache_key("fields", farm_id or 'all', season_id or 'all'), 3600
+        elif stage == "activities":
+            records = list(self.client.iter_activities(company_id=company_id))
+            cache_key, ttl = self.client._activities_cache_key(None, company_id, None, None, None), 1800
+        elif stage == "seasons":
+            records = list(self.client.iter_seasons(company_id=company_id))
+            cache_key, ttl = self.client._cache_key("seasons", company_id), 3600
+        else:
+            raise ValueError(f"Unknown sync stage: {stage}")
+        # Warm the collection read by the matching get_* call
+        self.client._store_collection(cache_key, records, ttl)
+        return records, time.monotonic() - started
+    
+    def sync_companies(
+        self,
+        company_ids: Optional[List[str]] = None,
+        season_id: Optional[str] = None,
+        run_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Sync every given company (or every company visible to the API token)"""
+        run_id = run_id or self.new_run_id()
+        started = time.monotonic()
+        
+        progress = {
+            "run_id": run_id,
+            "status": "running",
+            "started_at": datetime.utcnow().isoformat(),
+            "total": len(company_ids) if company_ids else None,
+            "completed": 0,
+            "failed": 0,
+            "companies": {}
+        }
+        # Written before company discovery, so the run can be looked up (and its failure seen) at once
+        redis_client.set(self._progress_key(run_id), progress, ex=86400)
+        
+        if not company_ids:
+            try:
+                company_ids = [company["id"] for company in self.client.iter_companies()]
+            except Exception as e:
+                self.log_error(f"Bulk sync {run_id}: company discovery failed: {str(e)}")
+                progress["status"] = "failed"
+                progress["error"] = f"company discovery: {str(e)}"
+                progress["duration_seconds"] = round(time.monotonic() - started, 3)
+                redis_client.set(self._progress_key(run_id), progress, ex=86400)
+                return progress
+        
+        progress["total"] = len(company_ids)
+        progress["companies"] = {
+            company_id: {"status": "pending", "stages": {}, "errors": [], "pending_tasks": 0}
+            for company_id in company_ids
+        }
+        company_started = {}
+        self.log_info(f"Bulk sync {run_id}: {len(company_ids)} companies with {self.max_workers} workers")
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bulk-sync") as pool:
+            tasks: Dict[Future, Tuple[str, str, Optional[str]]] = {}
+            
+            def submit(stage: str, company_id: str, farm_id: Optional[str] = None) -> Future:
+                future = pool.submit(self._run_stage, stage, company_id, farm_id, season_id)
+                tasks[future] = (stage, company_id, farm_id)
+                progress["companies"][company_id]["pending_tasks"] += 1
+                return future
+            
+            for company_id in company_ids:
+                company_started[company_id] = time.monotonic()
+                progress["companies"][company_id]["status"] = "running"
+                for stage in ("farms", "activities", "seasons"):
+                    submit(stage, company_id)
+            redis_client.set(self._progress_key(run_id), progress, ex=86400)
+            
+            pending = set(tasks)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, company_id, farm_id = tasks.pop(future)
+                    company = progress["companies"][company_id]
+                    company["pending_tasks"] -= 1
+                    stage_progress = company["stages"].setdefault(stage, {"records": 0, "seconds": 0.0})
+                    
+                    try:
+                        records, seconds = future.result()
+                        stage_progress["records"] += len(records)
+                        stage_progress["seconds"] = round(stage_progress["seconds"] + seconds, 3)
+                        if stage == "farms":
+                            # Fields are fetched per farm as soon as the farms are known
+                            for farm in records:
+                                pending.add(submit("fields", company_id, farm.get("id")))
+                    except Exception as e:
+                        self.log_error(f"Bulk sync {run_id}: {stage} for company {company_id} failed: {str(e)}")
+                        company["errors"].append(f"{stage}{f' ({farm_id})' if farm_id else ''}: {str(e)}")
+                    
+                    if company["pending_tasks"] == 0:
+                        company["status"] = "failed" if company["errors"] else "completed"
+                        company["duration_seconds"] = round(time.monotonic() - company_started[company_id], 3)
+                        progress["failed" if company["errors"] else "completed"] += 1
+                
+                redis_client.set(self._progress_key(run_id), progress, ex=86400)
+        
+        progress["status"] = "completed" if progress["failed"] == 0 else "completed_with_errors"
+        progress["duration_seconds"] = round(time.monotonic() - started, 3)
+        redis_client.set(self._progress_key(run_id), progress, ex=86400)
+        self.log_info(
+            f"Bulk sync {run_id} finished in {progress['duration_seconds']}s: "
+            f"{progress['completed']} completed, {progress['failed']} failed"
+        )
+        return progress
+
+# Global bulk sync orchestrator instance
+bulk_sync = BulkSyncOrchestrator()
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from app.config import settings
+
+def crops_from_field(field: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Derive crop records from one seasonal field record"""
+    crops = field.get("crops") or []
+    if not crops:
+        # If no crops data in field, create a placeholder
+        return [{
+            "id": f"{field.get('id')}_crop_unknown",
+            "type": "Unknown",
+            "variety": "Unknown",
+            "field_id": field.get("id"),
+            "planting_date": field.get("planting_date"),
+            "harvest_date": field.get("harvest_date")
+        }]
+    
+    return [
+        {
+            "id": f"{field.get('id')}_crop_{position}",
+            "type": crop.get("crop_name"),
+            "variety": crop.get("variety_name"),
+            "field_id": field.get("id"),
+            "crop_grade": crop.get("crop_grade"),
+            "crop_use": crop.get("crop_use"),
+            "crop_blend": crop.get("crop_blend"),
+            "planting_date": field.get("planting_date"),
+            "harvest_date": field.get("harvest_date")
+        }
+        for position, crop in enumerate(crops)
+    ]
+
+class CropIndex:
+    """Crops derived once from a seasonal field payload, indexed by field id"""
+    
+    def __init__(self, fields_data: List[Dict[str, Any]]):
+        self.by_field: Dict[str, List[Dict[str, Any]]] = {}
+        self.crops: List[Dict[str, Any]] = []
+        for field in fields_data:
+            field_crops = crops_from_field(field)
+            self.by_field.setdefault(field.get("id"), []).extend(field_crops)
+            self.crops.extend(field_crops)
+    
+    def for_field(self, field_id: str) -> List[Dict[str, Any]]:
+        """Crops of a single field"""
+        return list(self.by_field.get(field_id, ()))
+    
+    def all(self) -> List[Dict[str, Any]]:
+        """Crops of every field"""
+        return list(self.crops)
+
+class ActivityIndex:
+    """Activities indexed by every field listed in their ``activity_fields``"""
+    
+    def __init__(self, activities: List[Dict[str, Any]]):
+        self.by_field: Dict[str, List[Dict[str, Any]]] = {}
+        for activity in activities:
+            field_ids = {af.get("field_id") for af in activity.get("activity_fields") or []}
+            for field_id in field_ids:
+                self.by_field.setdefault(field_id, []).append(activity)
+    
+    def for_field(self, field_id: str) -> List[Dict[str, Any]]:
+        """Activities applied to a single field"""
+        return list(self.by_field.get(field_id, ()))
+
+class EntityStore:
+    """In-process store of normalised Agworld entities derived from cached payloads.
+    
+    Indexes are keyed by the cache key of the collection they were built from,
+    which carries its namespace generation, and are rebuilt at most once per
+    ``ttl`` seconds or as soon as that collection is invalidated or refilled.
+    Repeated queries are therefore dictionary lookups instead of a fetch and
+    reparse of the source collection. Callers get shallow copies of the
+    indexed lists.
+    
+    Each kind of index keeps at most ``max_entries`` collections, least
+    recently used first out. Callers take a ``version()`` before reading the
+    source collection; an index built from data that was refilled (discarded)
+    in the meantime is returned to the caller but not stored.
+    """
+    
+    def __init__(self, ttl: Optional[int] = None, max_entries: Optional[int] = None):
+        self.ttl = ttl or settings.ENTITY_INDEX_TTL
+        self.max_entries = max_entries or settings.ENTITY_INDEX_MAX_ENTRIES
+        self._crop_indexes: "OrderedDict[str, Tuple[float, CropIndex]]" = OrderedDict()
+        self._activity_indexes: "OrderedDict[str, Tuple[float, ActivityIndex]]" = OrderedDict()
+        # Version at which each collection was last discarded; keys pushed out of
+        # the bounded map are treated as discarded at the newest evicted version
+        self._version = 0
+        self._discarded: "OrderedDict[str, int]" = OrderedDict()
+        self._discarded_floor = 0
+        self._lock = threading.Lock()
+    
+    def version(self) -> int:
+        """Token to pass to ``put_*`` for an index built from data read after this call"""
+        return self._version
+    
+    def _get(self, indexes: OrderedDict, collection_key: str) -> Optional[Any]:
+        with self._lock:
+            entry = indexes.get(collection_key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del indexes[collection_key]
+                return None
+            indexes.move_to_end(collection_key)
+            return entry[1]
+    
+    def _put(self, indexes: OrderedDict, collection_key: str, index: Any, version: Optional[int]):
+        with self._lock:
+            if version is not None and version < self._discarded.get(collection_key, self._discarded_floor):
+                # Built from a copy that was replaced while the caller was reading it
+                return
+            now = time.monotonic()
+            for key in [key for key, (expires_at, _) in indexes.items() if expires_at <= now]:
+                del indexes[key]
+            indexes[collection_key] = (now + self.ttl, index)
+            indexes.move_to_end(collection_key)
+            while len(indexes) > self.max_entries:
+                indexes.popitem(last=False)
+    
+    def get_crop_index(self, collection_key: str) -> Optional[CropIndex]:
+        """Return the crop index of a field collection if it has not expired"""
+        return self._get(self._crop_indexes, collection_key)
+    
+    def put_crop_index(
+        self, collection_key: str, fields_data: List[Dict[str, Any]], version: Optional[int] = None
+    ) -> CropIndex:
+        """Build and store the crop index of a field collection"""
+        index = CropIndex(fields_data)
+        self._put(self._crop_indexes, collection_key, index, version)
+        return index
+    
+    def get_activity_index(self, collection_key: str) -> Optional[ActivityIndex]:
+        """Return the field index of an activity collection if it has not expired"""
+        return self._get(self._activity_indexes, collection_key)
+    
+    def put_activity_index(
+        self, collection_key: str, activities: List[Dict[str, Any]], version: Optional[int] = None
+    ) -> ActivityIndex:
+        """Build and store the field index of an activity collection"""
+        index = ActivityIndex(activities)
+        self._put(self._activity_indexes, collection_key, index, version)
+        return index
+    
+    def discard(self, collection_key: str):
+        """Drop the indexes built from a collection, e.g. when it is refilled"""
+        with self._lock:
+            self._crop_indexes.pop(collection_key, None)
+            self._activity_indexes.pop(collection_key, None)
+            self._version += 1
+            self._discarded[collection_key] = self._version
+            self._discarded.move_to_end(collection_key)
+            while len(self._discarded) > self.max_entries:
+                _, version = self._discarded.popitem(last=False)
+                self._discarded_floor = max(self._discarded_floor, version)
+    
+    def clear(self):
+        """Drop every index"""
+        with self._lock:
+            self._crop_indexes.clear()
+            self._activity_indexes.clear()
+
+# Global entity store instance
+entity_store = EntityStore()
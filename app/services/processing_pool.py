@@ -0,0 +1,157 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Union
+from app.config import settings
+from app.utils.logger import LoggerMixin
+from app.utils.hashing import content_hashes
+from app.redis_client import redis_client
+from app.transforms import RecordError, load_plugins, transform_chunk, transform_registry, transform_signatures
+
+def available_cores() -> int:
+    """CPU cores this process may run on (respects affinity masks and cgroup cpusets)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+class ProcessingPool(LoggerMixin):
+    """Executors for large processing jobs.
+    
+    Hashing and transforms are CPU-bound, so with ``kind="process"`` record
+    lists are split into chunks that run on a process pool sized to the
+    available cores (``kind="thread"`` uses threads, ``kind="serial"`` the
+    caller). Chunk functions live outside ``app.services`` so workers import
+    no Redis client. Results come back in input order, with a
+    ``RecordError`` in place of each record that failed. Cache writes are I/O-bound and are spread over
+    a small thread pool instead. Jobs below ``min_records`` run inline,
+    where the pool would cost more than it saves.
+    """
+    
+    KINDS = ("process", "thread", "serial")
+    
+    def __init__(
+        self,
+        kind: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        min_records: Optional[int] = None,
+        io_workers: Optional[int] = None
+    ):
+        super().__init__()
+        self.kind = kind or settings.PROCESSING_EXECUTOR
+        if self.kind not in self.KINDS:
+            raise ValueError(f"Unknown processing executor: {self.kind}")
+        # 0 means one worker per available core
+        self.max_workers = max_workers or settings.PROCESSING_MAX_WORKERS or available_cores()
+        self.chunk_size = chunk_size or settings.PROCESSING_CHUNK_SIZE
+        self.min_records = settings.PROCESSING_PARALLEL_MIN_RECORDS if min_records is None else min_records
+        self.io_workers = io_workers or settings.PROCESSING_IO_WORKERS
+        self.plugins = [module.strip() for module in settings.TRANSFORM_PLUGINS.split(",") if module.strip()]
+        self._executor: Optional[Executor] = None
+        # Transform signatures reported by a process worker, see _workers_match
+        self._worker_signatures: Optional[Dict[str, Any]] = None
+        self._io_executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+    
+    def _cpu_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    # Workers are started fresh rather than forked from a process
+                    # that holds Redis connections and background threads
+                    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context(method),
+                        initializer=load_plugins,
+                        initargs=(self.plugins,)
+                    )
+                    # Workers only know the built-in and plugin transforms, not ones
+                    # registered at runtime in this process
+                    self._worker_signatures = self._executor.submit(transform_signatures).result()
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="processing")
+                self.log_info(f"Started {self.kind} processing pool with {self.max_workers} workers")
+            return self._executor
+    
+    def _io(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._io_executor is None:
+                self._io_executor = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="cache-write")
+            return self._io_executor
+    
+    def _map_chunks(self, function: Callable[[List[Any]], List[Any]], items: List[Any]) -> List[Any]:
+        """Apply a chunk function to chunks of ``items`` in parallel and concatenate the results in order"""
+        if self.kind == "serial" or len(items) < max(self.min_records, 2):
+            return function(items)
+        
+        chunk_size = self.chunk_size
+        # Keep every worker busy on jobs smaller than workers * chunk_size
+        if len(items) < self.max_workers * chunk_size:
+            chunk_size = max(1, -(-len(items) // self.max_workers))
+        try:
+            chunks = self._cpu_executor().map(
+                function, [items[offset:offset + chunk_size] for offset in range(0, len(items), chunk_size)]
+            )
+            return [result for chunk in chunks for result in chunk]
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a new pool next time
+            with self._lock:
+                self._executor = self._worker_signatures = None
+            raise
+    
+    def hash(self, records: List[Any]) -> List[str]:
+        """Content hashes of records, computed in parallel chunks"""
+        return self._map_chunks(content_hashes, records)
+    
+    def _workers_match(self, data_type: str) -> bool:
+        """Whether process workers transform ``data_type`` the way this process does"""
+        self._cpu_executor()
+        worker_signature = (self._worker_signatures or {}).get(data_type)
+        return worker_signature == transform_registry.signatures().get(data_type)
+    
+    def transform(
+        self, data_type: str, records: List[Dict[str, Any]]
+    ) -> List[Union[Any, RecordError]]:
+        """Transform records in parallel chunks, preserving their order.
+        
+        Types the process workers lack (or transform differently) run on the
+        calling thread instead.
+        """
+        if (
+            self.kind == "process"
+            and len(records) >= max(self.min_records, 2)
+            and not self._workers_match(data_type)
+        ):
+            self.log_warning(f"Transform of {data_type} is not available to the process workers, running inline")
+            return transform_chunk(data_type, records)
+        results = self._map_chunks(partial(transform_chunk, data_type), records)
+        for index, result in enumerate(results):
+            if isinstance(result, RecordError) and result.index != index:
+                # Chunks number their errors from zero
+                results[index] = RecordError(index, data_type, result.message)
+        return results
+    
+    def write_many(self, mapping: Dict[str, Any], ex: Optional[int] = None) -> bool:
+        """Write cache entries in chunks over the I/O thread pool"""
+        if len(mapping) <= self.chunk_size or redis_client._active_batch() is not None:
+            # Small writes, and writes buffered by a batch() block, stay on this thread
+            return redis_client.set_many(mapping, ex=ex)
+        items = list(mapping.items())
+        chunks = [dict(items[offset:offset + self.chunk_size]) for offset in range(0, len(items), self.chunk_size)]
+        return all(self._io().map(lambda chunk: redis_client.set_many(chunk, ex=ex), chunks))
+    
+    def shutdown(self):
+        """Stop the worker pools"""
+        with self._lock:
+            executors = [self._executor, self._io_executor]
+            self._executor = self._io_executor = None
+        for executor in executors:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+# Global processing pool
+processing_pool = ProcessingPool()
@@ -1,155 +1,209 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
-import json
+import asyncio
+import threading
 from app.utils.logger import LoggerMixin
+from app.utils.hashing import content_hash
+from app.config import settings
+from app.models.records import RecordMixin, ProcessedRecord
+from app.transforms import RecordError, generic_transform, transform_registry
 from app.redis_client import redis_client
+from app.services.processing_pool import processing_pool
+
+# pandas is optional, process_batch(output="dataframe") needs it
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
 
 class DataProcessor(LoggerMixin):
     """Handles data extraction and transformation logic"""
     
+    # Part of every processed cache key; bump it when the processed output changes
+    SCHEMA_VERSION = 5
+    
     def __init__(self):
         super().__init__()
         self.cache_ttl = 3600  # 1 hour cache
+        # Read-through counters of the processed cache
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._stats_lock = threading.Lock()
+        # Plugin modules register transforms for extra data types when imported
+        plugins = [module.strip() for module in settings.TRANSFORM_PLUGINS.split(",") if module.strip()]
+        for module, error in transform_registry.load_plugins(plugins).items():
+            self.log_error(f"Failed to load transform plugin {module}: {error}")
     
-    def process_agworld_data(self, raw_data: Dict[str, Any], data_type: str) -> Dict[str, Any]:
-        """Process raw data from Agworld API"""
+    def _record_lookup(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+    
+    def process_agworld_data(self, raw_data: Dict[str, Any], data_type: str, use_cache: bool = True) -> ProcessedRecord:
+        """Process raw data from Agworld API.
+        
+        Results are cached under the content hash of the raw record, so an
+        unchanged record processed by any worker is returned from the cache
+        without running the transform again. Pass ``use_cache=False`` to
+        force reprocessing.
+        """
         try:
-            self.log_info(f"Processing {data_type} data")
+            # Content-addressed, so every worker maps the same record to the same cache entry
+            data_hash = content_hash(raw_data)
+            if use_cache:
+                cached = self.get_cached_data(data_type, data_hash)
+                self._record_lookup(cached is not None)
+                if cached is not None:
+                    self.log_debug(f"Using cached {data_type} data {data_hash}")
+                    return cached
             
-            processed_data = {
-                "data_type": data_type,
-                "processed_at": datetime.utcnow().isoformat(),
-                "source": "agworld",
-                "raw_data_hash": hash(json.dumps(raw_data, sort_keys=True)),
-                "processed_data": {}
-            }
+            self.log_info(f"Processing {data_type} data")
             
-            # Basic processing based on data type
-            if data_type == "field":
-                processed_data["processed_data"] = self._process_field_data(raw_data)
-            elif data_type == "crop":
-                processed_data["processed_data"] = self._process_crop_data(raw_data)
-            elif data_type == "activity":
-                processed_data["processed_data"] = self._process_activity_data(raw_data)
-            elif data_type == "company":
-                processed_data["processed_data"] = self._process_company_data(raw_data)
-            elif data_type == "farm":
-                processed_data["processed_data"] = self._process_farm_data(raw_data)
-            elif data_type == "season":
-                processed_data["processed_data"] = self._process_season_data(raw_data)
-            else:
-                processed_data["processed_data"] = self._process_generic_data(raw_data)
+            processed_data = ProcessedRecord(
+                data_type=data_type,
+                processed_at=datetime.utcnow().isoformat(),
+                source="agworld",
+                raw_data_hash=data_hash,
+                processed_data=self._transform(raw_data, data_type)
+            )
             
-            # Cache processed data
-            cache_key = f"processed:{data_type}:{processed_data['raw_data_hash']}"
-            redis_client.set(cache_key, processed_data, ex=self.cache_ttl)
+            # Cache processed data; callers looping over records inside their own
+            # batch() block get every write flushed in one round trip
+            with redis_client.batch() as batch:
+                batch.set(self._cache_key(data_type, data_hash), processed_data, ex=self.cache_ttl)
             
             self.log_info(f"Successfully processed {data_type} data")
             return processed_data
-            
+        
         except Exception as e:
             self.log_error(f"Error processing {data_type} data: {str(e)}")
             raise
     
-    def _process_field_data(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process field-specific data"""
-        return {
-            "field_id": raw_data.get("id"),
-            "field_name": raw_data.get("name"),
-            "area": raw_data.get("area"),
-            "farm_id": raw_data.get("farm_id"),
-            "description": raw_data.get("description"),
-            "cropping_method": raw_data.get("cropping_method"),
-            "crops": raw_data.get("crops", []),
-            "chemical_cost": raw_data.get("chemical_cost"),
-            "fertilizer_cost": raw_data.get("fertilizer_cost"),
-            "seed_cost": raw_data.get("seed_cost"),
-            "summary": f"Field: {raw_data.get('name', 'Unknown')} - Area: {raw_data.get('area', 'N/A')} - Farm: {raw_data.get('farm_id', 'N/A')}"
-        }
-    
-    def _process_crop_data(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process crop-specific data"""
-        return {
-            "crop_id": raw_data.get("id"),
-            "crop_type": raw_data.get("type"),
-            "variety": raw_data.get("variety"),
-            "field_id": raw_data.get("field_id"),
-            "crop_grade": raw_data.get("crop_grade"),
-            "crop_use": raw_data.get("crop_use"),
-            "crop_blend": raw_data.get("crop_blend"),
-            "planting_date": raw_data.get("planting_date"),
-            "harvest_date": raw_data.get("harvest_date"),
-            "summary": f"Crop: {raw_data.get('type', 'Unknown')} - Variety: {raw_data.get('variety', 'N/A')} - Field: {raw_data.get('field_id', 'N/A')}"
-        }
-    
-    def _process_activity_data(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process activity-specific data"""
-        return {
-            "activity_id": raw_data.get("id"),
-            "title": raw_data.get("title"),
-            "activity_type": raw_data.get("activity_type"),
-            "activity_category": raw_data.get("activity_category"),
-            "approved": raw_data.get("approved"),
-            "completed": raw_data.get("completed"),
-            "area": raw_data.get("area"),
-            "total_cost": raw_data.get("total_cost"),
-            "chemical_cost": raw_data.get("chemical_cost"),
-            "fertilizer_cost": raw_data.get("fertilizer_cost"),
-            "seed_cost": raw_data.get("seed_cost"),
-            "due_at": raw_data.get("due_at"),
-            "completed_at": raw_data.get("completed_at"),
-            "company_name": raw_data.get("company_name"),
-            "author_user_name": raw_data.get("author_user_name"),
-            "activity_fields": raw_data.get("activity_fields", []),
-            "activity_inputs": raw_data.get("activity_inputs", []),
-            "summary": f"Activity: {raw_data.get('title', 'Unknown')} - Type: {raw_data.get('activity_type', 'N/A')} - Status: {'Completed' if raw_data.get('completed') else 'Pending'}"
-        }
+    def process_batch(
+        self,
+        records: List[Dict[str, Any]],
+        data_type: str,
+        use_cache: bool = True,
+        output: str = "records",
+        errors: str = "raise"
+    ) -> Union[List[Union[ProcessedRecord, RecordError]], Dict[str, List[Any]], "pd.DataFrame"]:
+        """Process a whole collection of raw records of one type.
+        
+        Looks every record up in the processed cache with one MGET, transforms
+        only the misses (identical records once, on the processing pool for
+        large lists) and writes the new results in pipelined chunks.
+        ``output`` selects the result shape: ``"records"`` (a list in input
+        order, like ``process_agworld_data``), ``"columns"`` (a dict of lists)
+        or ``"dataframe"`` (requires pandas). Records that fail to transform
+        raise a ``RecordError`` once the others are cached, or with
+        ``errors="collect"`` are returned as a ``RecordError`` in their place
+        (and left out of columnar output).
+        """
+        try:
+            hashes = processing_pool.hash(records)
+            keys = {data_hash: self._cache_key(data_type, data_hash) for data_hash in hashes}
+            
+            results: Dict[str, ProcessedRecord] = {}
+            if use_cache and keys:
+                cached = redis_client.get_many(keys.values())
+                results = {
+                    data_hash: cached[key] for data_hash, key in keys.items() if cached[key] is not None
+                }
+                with self._stats_lock:
+                    self.cache_hits += len(results)
+                    self.cache_misses += len(keys) - len(results)
+            
+            # Each distinct record that is not cached yet is transformed once
+            misses: Dict[str, Dict[str, Any]] = {}
+            for raw_data, data_hash in zip(records, hashes):
+                if data_hash not in results and data_hash not in misses:
+                    misses[data_hash] = raw_data
+            
+            processed_at = datetime.utcnow().isoformat()
+            new_results = {}
+            failed = {}
+            registered = transform_registry.get(data_type)
+            for data_hash, transformed in zip(misses, processing_pool.transform(data_type, list(misses.values()))):
+                if isinstance(transformed, RecordError):
+                    failed[data_hash] = transformed.message
+                    continue
+                if registered is not None and not isinstance(transformed, registered.record_type):
+                    # Never cache the output of another transform under a registered type's key
+                    failed[data_hash] = f"expected a {registered.record_type.__name__}, got {type(transformed).__name__}"
+                    continue
+                new_results[data_hash] = ProcessedRecord(
+                    data_type=data_type,
+                    processed_at=processed_at,
+                    source="agworld",
+                    raw_data_hash=data_hash,
+                    processed_data=transformed
+                )
+            
+            if new_results:
+                processing_pool.write_many(
+                    {keys[data_hash]: result for data_hash, result in new_results.items()}, ex=self.cache_ttl
+                )
+                results.update(new_results)
+            
+            self.log_info(
+                f"Processed {len(records)} {data_type} records "
+                f"({len(new_results)} transformed, {len(failed)} failed, "
+                f"{len(records) - len(new_results) - len(failed)} from cache or duplicates)"
+            )
+            
+            processed = [
+                results[data_hash] if data_hash not in failed else RecordError(index, data_type, failed[data_hash])
+                for index, data_hash in enumerate(hashes)
+            ]
+            if failed:
+                if errors == "raise":
+                    raise next(result for result in processed if isinstance(result, RecordError))
+                self.log_warning(f"{len(failed)} {data_type} records failed to process")
+            if output == "records":
+                return processed
+            columns = self.to_columns([result for result in processed if not isinstance(result, RecordError)])
+            if output == "dataframe":
+                if PANDAS_AVAILABLE:
+                    return pd.DataFrame(columns)
+                self.log_warning("pandas not available, returning columns")
+            return columns
+        
+        except Exception as e:
+            self.log_error(f"Error processing {data_type} batch: {str(e)}")
+            raise
     
-    def _process_generic_data(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process generic data when type is unknown"""
-        return {
-            "id": raw_data.get("id"),
-            "data": raw_data,
-            "summary": f"Generic data with {len(raw_data)} fields"
+    @staticmethod
+    def to_columns(processed: List[ProcessedRecord]) -> Dict[str, List[Any]]:
+        """Turn processed records into one list per field (missing fields are None)"""
+        fields = {}
+        for result in processed:
+            fields.update(dict.fromkeys(result.processed_data))
+        columns = {
+            "data_type": [result.data_type for result in processed],
+            "processed_at": [result.processed_at for result in processed],
+            "raw_data_hash": [result.raw_data_hash for result in processed]
         }
+        for field in fields:
+            columns[field] = [result.processed_data.get(field) for result in processed]
+        return columns
     
-    def _process_company_data(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process company-specific data"""
-        return {
-            "company_id": raw_data.get("id"),
-            "company_name": raw_data.get("name"),
-            "company_type": raw_data.get("company_type"),
-            "business_identifier": raw_data.get("business_identifier"),
-            "contact_email": raw_data.get("contact_email"),
-            "contact_name": raw_data.get("contact_name"),
-            "description": raw_data.get("description"),
-            "physical_location": raw_data.get("physical_location"),
-            "summary": f"Company: {raw_data.get('name', 'Unknown')} - Type: {raw_data.get('company_type', 'N/A')}"
-        }
+    async def process_agworld_data_async(
+        self, raw_data: Dict[str, Any], data_type: str, use_cache: bool = True
+    ) -> ProcessedRecord:
+        """``process_agworld_data`` on a worker thread, so async callers do not block the event loop"""
+        return await asyncio.to_thread(self.process_agworld_data, raw_data, data_type, use_cache)
     
-    def _process_farm_data(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process farm-specific data"""
-        return {
-            "farm_id": raw_data.get("id"),
-            "farm_name": raw_data.get("name"),
-            "company_id": raw_data.get("company_id"),
-            "description": raw_data.get("description"),
-            "location": raw_data.get("location"),
-            "reporting_region": raw_data.get("reporting_region"),
-            "summary": f"Farm: {raw_data.get('name', 'Unknown')} - Region: {raw_data.get('reporting_region', 'N/A')}"
-        }
+    async def process_batch_async(self, records: List[Dict[str, Any]], data_type: str, **kwargs) -> Any:
+        """``process_batch`` on a worker thread, so async callers do not block the event loop"""
+        return await asyncio.to_thread(self.process_batch, records, data_type, **kwargs)
     
-    def _process_season_data(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process season-specific data"""
-        return {
-            "season_id": raw_data.get("id"),
-            "season_name": raw_data.get("name"),
-            "company_id": raw_data.get("company_id"),
-            "approved": raw_data.get("approved"),
-            "season_start_date": raw_data.get("season_start_date"),
-            "season_end_date": raw_data.get("season_end_date"),
-            "summary": f"Season: {raw_data.get('name', 'Unknown')} - Status: {'Approved' if raw_data.get('approved') else 'Draft'}"
-        }
+    def _transform(self, raw_data: Dict[str, Any], data_type: str) -> Union[RecordMixin, Dict[str, Any]]:
+        """Run the registered transform of ``data_type``, or the generic one for unknown types"""
+        transform = transform_registry.get(data_type) or generic_transform
+        return transform(raw_data)
     
     def aggregate_data(self, data_list: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Aggregate multiple data points for reporting"""
@@ -173,15 +227,33 @@ class DataProcessor(LoggerMixin):
                     aggregated["summaries"].append(data["processed_data"]["summary"])
             
             return aggregated
-            
+        
         except Exception as e:
             self.log_error(f"Error aggregating data: {str(e)}")
             raise
     
-    def get_cached_data(self, data_type: str, data_hash: str) -> Optional[Dict[str, Any]]:
-        """Retrieve cached processed data"""
-        cache_key = f"processed:{data_type}:{data_hash}"
-        return redis_client.get(cache_key)
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit ratio of the read-through processed cache"""
+        with self._stats_lock:
+            hits, misses = self.cache_hits, self.cache_misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0
+        }
+    
+    @staticmethod
+    def _cache_key(data_type: str, data_hash: str) -> str:
+        if transform_registry.get(data_type) is None:
+            # Unregistered types come straight from request input; group them under
+            # one metrics namespace instead of one per type
+            return f"processed:other:{data_type}:v{DataProcessor.SCHEMA_VERSION}:{data_hash}"
+        return f"processed:{data_type}:v{DataProcessor.SCHEMA_VERSION}:{data_hash}"
+    
+    def get_cached_data(self, data_type: str, data_hash: str) -> Optional[ProcessedRecord]:
+        """Retrieve cached processed data by the ``content_hash`` of its raw record"""
+        return redis_client.get(self._cache_key(data_type, data_hash))
 
 # Global processor instance
 processor = DataProcessor()
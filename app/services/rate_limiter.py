@@ -0,0 +1,204 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Optional
+from app.config import settings
+from app.utils.logger import LoggerMixin
+from app.redis_client import redis_client
+from app.redis_async_client import async_redis_client
+
+# Status codes that are worth retrying after a backoff
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Refill the bucket from the Redis clock, take the requested tokens and
+# return how long the caller has to wait (including any Retry-After block)
+RESERVE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - requested
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+local wait = 0
+if tokens < 0 then
+    wait = -tokens / rate
+end
+local blocked_until = tonumber(redis.call('GET', KEYS[2]) or '0')
+if blocked_until - now > wait then
+    wait = blocked_until - now
+end
+return tostring(wait)
+"""
+
+# Push the shared Retry-After block forward (never backwards)
+BLOCK_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local blocked_until = now + tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if blocked_until > current then
+    redis.call('SET', KEYS[1], tostring(blocked_until), 'EX', math.ceil(tonumber(ARGV[1])) + 1)
+end
+return tostring(blocked_until)
+"""
+
+class TokenBucket:
+    """Thread-safe in-process token bucket"""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+    
+    def reserve(self, tokens: float = 1, rate: Optional[float] = None) -> float:
+        """Take tokens and return the number of seconds the caller must wait"""
+        rate = rate or self.rate
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * rate) - tokens
+            self.updated_at = now
+            wait = -self.tokens / rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+    
+    def block(self, seconds: float):
+        """Refuse tokens for the given number of seconds"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+class RateLimiter(LoggerMixin):
+    """Token bucket rate limiter with adaptive backoff.
+    
+    The bucket lives in Redis when it is available so every process using the
+    same name shares one quota, and falls back to an in-process bucket
+    otherwise. A 429 multiplies the slowdown factor applied to the refill rate
+    and each successful request removes ``recovery_step`` from it again.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        capacity: float,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        recovery_step: float = 0.1,
+        max_slowdown: float = 32.0
+    ):
+        super().__init__()
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.recovery_step = recovery_step
+        self.max_slowdown = max_slowdown
+        self.slowdown = 1.0
+        self.local_bucket = TokenBucket(rate, capacity)
+        self.bucket_key = f"ratelimit:{name}:bucket"
+        self.block_key = f"ratelimit:{name}:blocked_until"
+        self._lock = threading.Lock()
+    
+    @property
+    def effective_rate(self) -> float:
+        """Refill rate after applying the adaptive slowdown"""
+        return self.rate / self.slowdown
+    
+    def reserve(self, tokens: float = 1) -> float:
+        """Take tokens from the shared bucket and return the required wait in seconds"""
+        rate = self.effective_rate
+        wait = redis_client.eval(
+            RESERVE_SCRIPT,
+            [self.bucket_key, self.block_key],
+            [rate, self.capacity, tokens]
+        )
+        if wait is not None:
+            return float(wait)
+        return self.local_bucket.reserve(tokens, rate=rate)
+    
+    async def reserve_async(self, tokens: float = 1) -> float:
+        """Asyncio counterpart of ``reserve`` that does not block the event loop"""
+        rate = self.effective_rate
+        wait = await async_redis_client.eval(
+            RESERVE_SCRIPT,
+            [self.bucket_key, self.block_key],
+            [rate, self.capacity, tokens]
+        )
+        if wait is not None:
+            return float(wait)
+        return self.local_bucket.reserve(tokens, rate=rate)
+    
+    def acquire(self, tokens: float = 1):
+        """Block the calling thread until tokens are available"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+    
+    def record_success(self):
+        """Recover the refill rate additively after a successful request"""
+        if self.slowdown > 1.0:
+            with self._lock:
+                self.slowdown = max(1.0, self.slowdown - self.recovery_step)
+    
+    def _slow_down(self):
+        with self._lock:
+            self.slowdown = min(self.max_slowdown, self.slowdown * 2)
+        self.log_warning(f"Rate limited on {self.name}, refill rate now {self.effective_rate:.3f}/s")
+    
+    def record_throttle(self, retry_after: Optional[float] = None):
+        """Slow down after a 429 and honour the server's Retry-After for everyone"""
+        self._slow_down()
+        if retry_after:
+            if redis_client.eval(BLOCK_SCRIPT, [self.block_key], [retry_after]) is None:
+                self.local_bucket.block(retry_after)
+    
+    async def record_throttle_async(self, retry_after: Optional[float] = None):
+        """Asyncio counterpart of ``record_throttle``"""
+        self._slow_down()
+        if retry_after:
+            if await async_redis_client.eval(BLOCK_SCRIPT, [self.block_key], [retry_after]) is None:
+                self.local_bucket.block(retry_after)
+    
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number ``attempt`` (0-based), using full jitter"""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header given either as seconds or as an HTTP date"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+# Shared limiter for every Agworld client in this process (and, via Redis, across processes)
+agworld_rate_limiter = RateLimiter(
+    name="agworld",
+    rate=settings.AGWORLD_RATE_LIMIT,
+    capacity=settings.AGWORLD_RATE_LIMIT_BURST,
+    max_retries=settings.AGWORLD_MAX_RETRIES,
+    backoff_base=settings.AGWORLD_BACKOFF_BASE,
+    backoff_max=settings.AGWORLD_BACKOFF_MAX
+)
@@ -0,0 +1,203 @@
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.config import settings
+from app.utils.logger import LoggerMixin
+from app.redis_client import redis_client
+from app.redis_async_client import async_redis_client
+
+# Delete the lock only if this caller still owns it
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+class SingleFlight(LoggerMixin):
+    """Coalesce concurrent cache fills so only one fetch per key is in flight.
+    
+    Callers in the same process share one future per key. Across processes a
+    short Redis lock elects a single fetcher; the others poll the cache until
+    the winner has filled it (or the lock expires, in which case they fetch
+    themselves).
+    """
+    
+    def __init__(self, lock_ttl: Optional[int] = None, poll_interval: float = 0.05):
+        super().__init__()
+        self.lock_ttl = lock_ttl or settings.CACHE_LOCK_TTL
+        self.poll_interval = poll_interval
+        self._calls: Dict[str, Future] = {}
+        self._async_calls: Dict[str, asyncio.Future] = {}
+        self._background: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+    
+    def _acquire(self, key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if redis_client.set_if_absent(f"lock:{key}", token, ex=self.lock_ttl):
+            return token
+        return None
+    
+    def _release(self, key: str, token: str):
+        if redis_client.eval(RELEASE_SCRIPT, [f"lock:{key}"], [token]) is None:
+            redis_client.delete(f"lock:{key}")
+    
+    def _locked_elsewhere(self, key: str) -> bool:
+        return redis_client.exists(f"lock:{key}")
+    
+    async def _acquire_async(self, key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if await async_redis_client.set_if_absent(f"lock:{key}", token, ex=self.lock_ttl):
+            return token
+        return None
+    
+    async def _release_async(self, key: str, token: str):
+        if await async_redis_client.eval(RELEASE_SCRIPT, [f"lock:{key}"], [token]) is None:
+            await async_redis_client.delete(f"lock:{key}")
+    
+    def do(self, key: str, fn: Callable[[], Any], cached: Optional[Callable[[], Any]] = None) -> Any:
+        """Run ``fn`` once for all concurrent callers of ``key`` and share its result.
+        
+        ``cached`` reads the value another process may have stored while this
+        one was waiting for the cross-process lock.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        
+        if not leader:
+            self.log_debug(f"Waiting for in-flight fetch of {key}")
+            return future.result()
+        
+        try:
+            result = self._run_locked(key, fn, cached)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+    
+    def _run_locked(self, key: str, fn: Callable[[], Any], cached: Optional[Callable[[], Any]]) -> Any:
+        deadline = time.monotonic() + self.lock_ttl
+        while True:
+            token = self._acquire(key)
+            if token:
+                try:
+                    return fn()
+                finally:
+                    self._release(key, token)
+            
+            # Another process holds the lock: wait for it to fill the cache
+            while time.monotonic() < deadline:
+                value = cached() if cached else None
+                if value is not None:
+                    return value
+                if not self._locked_elsewhere(key):
+                    break
+                time.sleep(self.poll_interval)
+            else:
+                return fn()
+    
+    async def do_async(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        cached: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> Any:
+        """Asyncio counterpart of ``do`` for coroutines on the running loop.
+        
+        ``cached`` is a coroutine function, and the lock is taken and polled
+        through the asyncio Redis client, so waiting never blocks the loop.
+        """
+        loop = asyncio.get_running_loop()
+        future = self._async_calls.get(key)
+        if future is not None and future.get_loop() is loop:
+            return await asyncio.shield(future)
+        
+        future = loop.create_future()
+        self._async_calls[key] = future
+        try:
+            result = await self._run_locked_async(key, fn, cached)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            if self._async_calls.get(key) is future:
+                del self._async_calls[key]
+    
+    async def _run_locked_async(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        cached: Optional[Callable[[], Awaitable[Any]]]
+    ) -> Any:
+        deadline = time.monotonic() + self.lock_ttl
+        while True:
+            token = await self._acquire_async(key)
+            if token:
+                try:
+                    return await fn()
+                finally:
+                    await self._release_async(key, token)
+            
+            # Another process holds the lock: wait for it to fill the cache
+            while time.monotonic() < deadline:
+                value = await cached() if cached else None
+                if value is not None:
+                    return value
+                if not await async_redis_client.exists(f"lock:{key}"):
+                    break
+                await asyncio.sleep(self.poll_interval)
+            else:
+                return await fn()
+    
+    def refresh(self, key: str, fn: Callable[[], Any]):
+        """Refresh ``key`` on a background thread unless a refresh is already running"""
+        with self._lock:
+            if key in self._calls or key in self._background:
+                return
+            thread = threading.Thread(target=self._run_refresh, args=(key, fn), daemon=True)
+            self._background[key] = thread
+        thread.start()
+    
+    def _run_refresh(self, key: str, fn: Callable[[], Any]):
+        try:
+            self.do(key, fn)
+        except Exception as e:
+            self.log_warning(f"Background refresh of {key} failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._background.pop(key, None)
+    
+    def refresh_async(self, key: str, fn: Callable[[], Awaitable[Any]]):
+        """Refresh ``key`` in a background task on the running loop"""
+        with self._lock:
+            if key in self._async_calls or key in self._background:
+                return
+            
+            async def run():
+                try:
+                    await self.do_async(key, fn)
+                except Exception as e:
+                    self.log_warning(f"Background refresh of {key} failed: {str(e)}")
+                finally:
+                    with self._lock:
+                        self._background.pop(key, None)
+            
+            self._background[key] = asyncio.get_running_loop().create_task(run())
+
+# Global single-flight coordinator shared by the Agworld clients
+single_flight = SingleFlight()
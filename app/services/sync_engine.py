@@ -0,0 +1,146 @@
+import json
+import time
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Any, List, Optional, Iterator
+from app.config import settings
+from app.utils.logger import LoggerMixin
+from app.redis_client import redis_client
+from app.redis_async_client import async_redis_client
+from app.services.agworld_client import AgworldAPIClient, agworld_client
+
+class DeltaSyncEngine(LoggerMixin):
+    """Incremental Agworld sync driven by per-resource ``updated_at`` watermarks.
+    
+    Each (resource, company) pair keeps a materialised copy of its records in
+    a Redis hash keyed by record id. Regular cycles only request records
+    updated since the stored watermark and merge them into that hash; a full
+    reconciliation every ``reconcile_interval`` seconds refetches everything
+    and drops records that no longer exist upstream.
+    """
+    
+    # Sync order matters: fields are discovered through the company's farms
+    RESOURCES = ("farms", "fields", "activities", "seasons")
+    
+    def __init__(self, client: Optional[AgworldAPIClient] = None, reconcile_interval: Optional[int] = None):
+        super().__init__()
+        self.client = client or agworld_client
+        self.reconcile_interval = reconcile_interval or settings.SYNC_RECONCILE_INTERVAL
+    
+    def _key(self, resource: str, company_id: Optional[str], suffix: str) -> str:
+        return f"sync:{resource}:{company_id or 'all'}:{suffix}"
+    
+    def get_watermark(self, resource: str, company_id: Optional[str] = None) -> Optional[str]:
+        """Return the highest ``updated_at`` seen for a resource"""
+        return redis_client.get(self._key(resource, company_id, "watermark"))
+    
+    def get_records(self, resource: str, company_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return the materialised records for a resource"""
+        stored = redis_client.get_hash(self._key(resource, company_id, "records"))
+        return [json.loads(value) for value in stored.values()]
+    
+    def _reconcile_due(self, resource: str, company_id: Optional[str]) -> bool:
+        reconciled_at = redis_client.get(self._key(resource, company_id, "reconciled_at"))
+        return reconciled_at is None or time.time() - float(reconciled_at) >= self.reconcile_interval
+    
+    def _fetch(self, resource: str, company_id: Optional[str], since: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """Stream records updated since the watermark (everything when ``since`` is None)"""
+        if resource == "activities":
+            return self.client.iter_activities(company_id=company_id, start_date=since)
+        if resource == "farms":
+            return self.client.iter_farms(company_id=company_id, updated_since=since)
+        if resource == "seasons":
+            return self.client.iter_seasons(company_id=company_id, updated_since=since)
+        if resource == "fields":
+            if company_id is None:
+                return self.client.iter_fields(updated_since=since)
+            farm_ids = [farm["id"] for farm in self.get_records("farms", company_id)]
+            return chain.from_iterable(
+                self.client.iter_fields(farm_id=farm_id, updated_since=since) for farm_id in farm_ids
+            )
+        raise ValueError(f"Unsupported sync resource: {resource}")
+    
+    def sync_resource(self, resource: str, company_id: Optional[str] = None, full: bool = False) -> Dict[str, Any]:
+        """Bring the materialised copy of one resource up to date"""
+        started = time.monotonic()
+        records_key = self._key(resource, company_id, "records")
+        watermark = self.get_watermark(resource, company_id)
+        full = full or watermark is None or self._reconcile_due(resource, company_id)
+        
+        self.log_info(
+            f"Syncing {resource} for company {company_id or 'all'} "
+            f"({'full reconciliation' if full else f'changes since {watermark}'})"
+        )
+        
+        try:
+            existing_ids = set(redis_client.get_hash(records_key)) if full else set()
+            changed = {}
+            new_watermark = watermark
+            for record in self._fetch(resource, company_id, None if full else watermark):
+                record_id = str(record.get("id"))
+                changed[record_id] = json.dumps(record)
+                updated_at = record.get("updated_at")
+                # ISO 8601 timestamps in one format compare correctly as strings
+                if updated_at and (new_watermark is None or updated_at > new_watermark):
+                    new_watermark = updated_at
+            
+            if changed:
+                redis_client.set_hash(records_key, changed)
+            
+            deleted = []
+            if full:
+                deleted = sorted(existing_ids - set(changed))
+                redis_client.delete_hash_fields(records_key, *deleted)
+                redis_client.set(self._key(resource, company_id, "reconciled_at"), str(time.time()))
+            
+            if new_watermark:
+                redis_client.set(self._key(resource, company_id, "watermark"), new_watermark)
+            
+            result = {
+                "resource": resource,
+                "company_id": company_id,
+                "mode": "full" if full else "delta",
+                "fetched": len(changed),
+                "deleted": len(deleted),
+                "watermark": new_watermark,
+                "duration_seconds": round(time.monotonic() - started, 3)
+            }
+            self.log_info(f"Synced {resource}: {result['fetched']} changed, {result['deleted']} deleted")
+            return result
+        
+        except Exception as e:
+            self.log_error(f"Failed to sync {resource} for company {company_id or 'all'}: {str(e)}")
+            raise
+    
+    def sync_company(self, company_id: Optional[str] = None, full: bool = False) -> Dict[str, Any]:
+        """Sync every resource for a company and record the outcome"""
+        results = {resource: self.sync_resource(resource, company_id, full=full) for resource in self.RESOURCES}
+        summary = {
+            "company_id": company_id,
+            "synced_at": datetime.utcnow().isoformat(),
+            "resources": results
+        }
+        redis_client.set(f"sync:{company_id or 'all'}:last_result", summary)
+        return summary
+    
+    def get_status(self, company_id: Optional[str] = None) -> Dict[str, Any]:
+        """Watermarks and last result for a company"""
+        return {
+            "company_id": company_id,
+            "watermarks": {resource: self.get_watermark(resource, company_id) for resource in self.RESOURCES},
+            "last_result": redis_client.get(f"sync:{company_id or 'all'}:last_result")
+        }
+    
+    async def get_status_async(self, company_id: Optional[str] = None) -> Dict[str, Any]:
+        """``get_status`` through the asyncio Redis client, in one round trip"""
+        watermark_keys = {resource: self._key(resource, company_id, "watermark") for resource in self.RESOURCES}
+        last_result_key = f"sync:{company_id or 'all'}:last_result"
+        values = await async_redis_client.get_many([*watermark_keys.values(), last_result_key])
+        return {
+            "company_id": company_id,
+            "watermarks": {resource: values[key] for resource, key in watermark_keys.items()},
+            "last_result": values[last_result_key]
+        }
+
+# Global sync engine instance
+sync_engine = DeltaSyncEngine()
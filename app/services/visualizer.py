@@ -12,6 +12,7 @@ import tempfile
 import os
 
 from app.utils.logger import LoggerMixin
+from app.utils.units import to_hectares
 
 class PlotlyVisualizer(LoggerMixin):
     """Creates interactive visualizations using Plotly"""
@@ -28,7 +29,7 @@ class PlotlyVisualizer(LoggerMixin):
             
             # Extract data for visualization
             field_names = [field.get('name', 'Unknown') for field in field_data]
-            field_areas = [field.get('area', 0) for field in field_data]
+            field_areas = [to_hectares(field.get('area')) or 0.0 for field in field_data]
             
             # Create bar chart
             fig = go.Figure(data=[
@@ -140,7 +141,7 @@ class PlotlyVisualizer(LoggerMixin):
             if 'fields' in data:
                 field_data = data['fields']
                 field_names = [f.get('name', 'Unknown') for f in field_data]
-                field_areas = [f.get('area', 0) for f in field_data]
+                field_areas = [to_hectares(f.get('area')) or 0.0 for f in field_data]
                 
                 fig.add_trace(
                     go.Bar(x=field_names, y=field_areas, name="Fields"),
@@ -300,7 +301,7 @@ class MatplotlibVisualizer(LoggerMixin):
                 return self._create_empty_plot("No field data available", output_path)
             
             field_names = [field.get('name', 'Unknown') for field in field_data]
-            field_areas = [field.get('area', 0) for field in field_data]
+            field_areas = [to_hectares(field.get('area')) or 0.0 for field in field_data]
             
             # Create horizontal bar chart
             fig, ax = plt.subplots(figsize=(10, 6))
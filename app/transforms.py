@@ -0,0 +1,272 @@
+import importlib
+import threading
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type, Union
+from app.models.records import (
+    RecordMixin, FieldRecord, CropRecord, ActivityRecord, CompanyRecord, FarmRecord, SeasonRecord
+)
+from app.utils.units import AREA_UNIT, parse_quantity, to_hectares
+
+# A field source is the raw key to copy, or a callable computing the value from the raw record
+FieldSource = Union[str, Callable[[Dict[str, Any]], Any]]
+
+class CompiledTransform:
+    """Raw record -> typed record extractor compiled from a transform spec.
+    
+    Keys copied as they are go through one precompiled ``itemgetter``; when a
+    record lacks one of them, the present keys are copied and the record
+    type's defaults fill in the rest. Computed fields run after that.
+    """
+    
+    def __init__(self, data_type: str, record_type: Type[RecordMixin], fields: Dict[str, FieldSource]):
+        unknown = set(fields) - set(record_type._field_names)
+        if unknown:
+            raise ValueError(f"{record_type.__name__} has no fields {sorted(unknown)}")
+        self.data_type = data_type
+        self.record_type = record_type
+        self.signature = (f"{record_type.__module__}.{record_type.__qualname__}", tuple(sorted(fields)))
+        self._copied: List[Tuple[str, str]] = [
+            (name, source) for name, source in fields.items() if isinstance(source, str)
+        ]
+        self._computed: List[Tuple[str, Callable[[Dict[str, Any]], Any]]] = [
+            (name, source) for name, source in fields.items() if not isinstance(source, str)
+        ]
+        self._names = tuple(name for name, _ in self._copied)
+        keys = [key for _, key in self._copied]
+        if len(keys) > 1:
+            self._getter = itemgetter(*keys)
+        elif keys:
+            # itemgetter with a single key returns the value, not a tuple
+            single = itemgetter(keys[0])
+            self._getter = lambda raw: (single(raw),)
+        else:
+            self._getter = lambda raw: ()
+    
+    def __call__(self, raw_data: Dict[str, Any]) -> RecordMixin:
+        try:
+            values = dict(zip(self._names, self._getter(raw_data)))
+        except KeyError:
+            values = {name: raw_data[key] for name, key in self._copied if key in raw_data}
+        for name, compute in self._computed:
+            values[name] = compute(raw_data)
+        return self.record_type(**values)
+
+class TransformRegistry:
+    """Compiled transforms by data type"""
+    
+    def __init__(self):
+        self._transforms: Dict[str, CompiledTransform] = {}
+        self._lock = threading.Lock()
+    
+    def register(
+        self,
+        data_type: str,
+        record_type: Type[RecordMixin],
+        fields: Dict[str, FieldSource],
+        replace: bool = False
+    ) -> CompiledTransform:
+        """Compile and register the transform of a data type"""
+        transform = CompiledTransform(data_type, record_type, fields)
+        with self._lock:
+            if data_type in self._transforms and not replace:
+                raise ValueError(f"A transform for {data_type} is already registered")
+            self._transforms[data_type] = transform
+        return transform
+    
+    def get(self, data_type: str) -> Optional[CompiledTransform]:
+        return self._transforms.get(data_type)
+    
+    def data_types(self) -> List[str]:
+        return sorted(self._transforms)
+    
+    def signatures(self) -> Dict[str, Tuple[str, Tuple[str, ...]]]:
+        """Record type and field names of every transform, to compare registries across processes"""
+        with self._lock:
+            transforms = list(self._transforms.items())
+        return {data_type: transform.signature for data_type, transform in transforms}
+    
+    def load_plugins(self, modules: Iterable[str]) -> Dict[str, str]:
+        """Import plugin modules, which register their transforms at import time.
+        
+        A module that fails to import is skipped; the failures are returned by module name.
+        """
+        failures = {}
+        for module in modules:
+            try:
+                importlib.import_module(module)
+            except Exception as e:
+                failures[module] = f"{type(e).__name__}: {e}"
+        return failures
+
+# Global transform registry
+transform_registry = TransformRegistry()
+
+class RecordError(Exception):
+    """A record that failed to transform, reported in place of its result"""
+    
+    def __init__(self, index: int, data_type: str, message: str):
+        super().__init__(f"{data_type} record {index}: {message}")
+        self.index = index
+        self.data_type = data_type
+        self.message = message
+    
+    def __reduce__(self):
+        return RecordError, (self.index, self.data_type, self.message)
+
+# Generic records keep at most this many top-level scalar fields, with text cut
+# to GENERIC_MAX_TEXT characters; ProcessedRecord.raw_data_hash still names the full record
+GENERIC_MAX_FIELDS = 20
+GENERIC_MAX_TEXT = 256
+
+def generic_transform(raw_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Process generic data when type is unknown.
+    
+    Keeps a bounded selection of the top-level scalar fields, so records of
+    unknown (and possibly huge) types do not end up in the cache whole.
+    """
+    data = {}
+    for key, value in raw_data.items():
+        if len(data) >= GENERIC_MAX_FIELDS:
+            break
+        if isinstance(value, str):
+            data[key] = value[:GENERIC_MAX_TEXT]
+        elif value is None or isinstance(value, (bool, int, float)):
+            data[key] = value
+    return {
+        "id": raw_data.get("id"),
+        "data": data,
+        "omitted_fields": len(raw_data) - len(data),
+        "summary": f"Generic data with {len(raw_data)} fields"
+    }
+
+def transform_chunk(
+    data_type: str, records: List[Dict[str, Any]]
+) -> List[Union[RecordMixin, Dict[str, Any], RecordError]]:
+    """Transform a list of records, returning a RecordError in place of each failure.
+    
+    Module-level (and free of Redis or logging state) so worker processes can run it.
+    """
+    transform = transform_registry.get(data_type) or generic_transform
+    results = []
+    for index, raw_data in enumerate(records):
+        try:
+            results.append(transform(raw_data))
+        except Exception as e:
+            results.append(RecordError(index, data_type, f"{type(e).__name__}: {e}"))
+    return results
+
+def register_transform(
+    data_type: str,
+    record_type: Type[RecordMixin],
+    fields: Dict[str, FieldSource],
+    replace: bool = False
+) -> CompiledTransform:
+    """Register a transform with the global registry (for plugin modules)"""
+    return transform_registry.register(data_type, record_type, fields, replace=replace)
+
+def load_plugins(modules: Iterable[str]) -> Dict[str, str]:
+    """Import transform plugins into the global registry (also the process pool initializer)"""
+    return transform_registry.load_plugins(modules)
+
+def transform_signatures() -> Dict[str, Tuple[str, Tuple[str, ...]]]:
+    """Signatures of the global registry (asked of a pool worker after it starts)"""
+    return transform_registry.signatures()
+
+def area(key: str = "area") -> Callable[[Dict[str, Any]], Optional[float]]:
+    """Field source: an area value converted to hectares"""
+    return lambda raw_data: to_hectares(raw_data.get(key))
+
+def amount(key: str) -> Callable[[Dict[str, Any]], Optional[float]]:
+    """Field source: the number of a quantity value such as ``"1000 dollar"``"""
+    return lambda raw_data: parse_quantity(raw_data.get(key))[0]
+
+def common_unit(*keys: str) -> Callable[[Dict[str, Any]], Optional[str]]:
+    """Field source: the unit shared by every one of ``keys`` that has one, e.g. the currency of the costs.
+    
+    None when the values carry different units, so amounts in different
+    currencies are never reported under one of them.
+    """
+    def compute(raw_data: Dict[str, Any]) -> Optional[str]:
+        units = {parse_quantity(raw_data.get(key))[1] for key in keys} - {None}
+        return units.pop() if len(units) == 1 else None
+    return compute
+
+def constant(value: Any) -> Callable[[Dict[str, Any]], Any]:
+    """Field source: the same value for every record"""
+    return lambda raw_data: value
+
+FIELD_COSTS = ("chemical_cost", "fertilizer_cost", "seed_cost")
+ACTIVITY_COSTS = ("total_cost",) + FIELD_COSTS
+
+register_transform("field", FieldRecord, {
+    "field_id": "id",
+    "field_name": "name",
+    "area": area(),
+    "area_unit": constant(AREA_UNIT),
+    "farm_id": "farm_id",
+    "description": "description",
+    "cropping_method": "cropping_method",
+    "crops": "crops",
+    "cost_unit": common_unit(*FIELD_COSTS),
+    **{cost: amount(cost) for cost in FIELD_COSTS}
+})
+
+register_transform("crop", CropRecord, {
+    "crop_id": "id",
+    "crop_type": "type",
+    "variety": "variety",
+    "field_id": "field_id",
+    "crop_grade": "crop_grade",
+    "crop_use": "crop_use",
+    "crop_blend": "crop_blend",
+    "planting_date": "planting_date",
+    "harvest_date": "harvest_date"
+})
+
+register_transform("activity", ActivityRecord, {
+    "activity_id": "id",
+    "title": "title",
+    "activity_type": "activity_type",
+    "activity_category": "activity_category",
+    "approved": "approved",
+    "completed": "completed",
+    "area": area(),
+    "area_unit": constant(AREA_UNIT),
+    "cost_unit": common_unit(*ACTIVITY_COSTS),
+    **{cost: amount(cost) for cost in ACTIVITY_COSTS},
+    "due_at": "due_at",
+    "completed_at": "completed_at",
+    "company_name": "company_name",
+    "author_user_name": "author_user_name",
+    "activity_fields": "activity_fields",
+    "activity_inputs": "activity_inputs"
+})
+
+register_transform("company", CompanyRecord, {
+    "company_id": "id",
+    "company_name": "name",
+    "company_type": "company_type",
+    "business_identifier": "business_identifier",
+    "contact_email": "contact_email",
+    "contact_name": "contact_name",
+    "description": "description",
+    "physical_location": "physical_location"
+})
+
+register_transform("farm", FarmRecord, {
+    "farm_id": "id",
+    "farm_name": "name",
+    "company_id": "company_id",
+    "description": "description",
+    "location": "location",
+    "reporting_region": "reporting_region"
+})
+
+register_transform("season", SeasonRecord, {
+    "season_id": "id",
+    "season_name": "name",
+    "company_id": "company_id",
+    "approved": "approved",
+    "season_start_date": "season_start_date",
+    "season_end_date": "season_end_date"
+})
@@ -0,0 +1,32 @@
+import hashlib
+import json
+from typing import Any, List
+
+# Digest size in bytes; 16 bytes (32 hex characters) keeps keys short with negligible collision risk
+DIGEST_SIZE = 16
+
+def canonical_json(value: Any) -> bytes:
+    """Encode a value the same way on every process and host.
+    
+    Keys are sorted, separators carry no whitespace and non-ASCII text is
+    kept as UTF-8, so equal values always produce equal bytes.
+    """
+    return json.dumps(
+        value,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str
+    ).encode("utf-8")
+
+def content_hash(value: Any) -> str:
+    """Stable hex digest of a value, identical across workers and restarts.
+    
+    Unlike the built-in ``hash()``, this is not salted per process
+    (PYTHONHASHSEED), so it can address shared cache entries.
+    """
+    return hashlib.blake2b(canonical_json(value), digest_size=DIGEST_SIZE).hexdigest()
+
+def content_hashes(values: List[Any]) -> List[str]:
+    """``content_hash`` of every value, in order (a processing pool chunk function)"""
+    return [content_hash(value) for value in values]
@@ -0,0 +1,100 @@
+import re
+import sys
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Tuple
+
+# Canonical area unit is hectares; values in other area units are converted
+AREA_UNIT = "ha"
+AREA_UNITS = {
+    "ha": 1.0,
+    "hectare": 1.0,
+    "hectares": 1.0,
+    "ac": 0.40468564224,
+    "acre": 0.40468564224,
+    "acres": 0.40468564224,
+    "m2": 0.0001,
+    "m²": 0.0001,
+    "sqm": 0.0001,
+    "km2": 100.0,
+    "km²": 100.0
+}
+
+# Currencies are only given a canonical name, amounts are never converted
+CURRENCY_UNITS = {
+    "$": "dollar",
+    "dollar": "dollar",
+    "dollars": "dollar",
+    "aud": "AUD",
+    "usd": "USD",
+    "nzd": "NZD",
+    "cad": "CAD",
+    "gbp": "GBP",
+    "£": "GBP",
+    "eur": "EUR",
+    "€": "EUR"
+}
+
+# "25.5 ha", "1,000 dollar", "$ 500", "-3.2e2 ac"; the number may also follow the unit.
+# Commas only group thousands, and the unit may not start with a digit or separator,
+# so decimal-comma numbers such as "1.000,5 ha" or "2,5 ha" are rejected, not misread.
+_QUANTITY = re.compile(
+    r"^\s*(?:(?P<prefix>[^\d\s.,+-]+)\s*)?"
+    r"(?P<number>[-+]?(?:(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)"
+    r"\s*(?P<unit>[^\d\s.,+-].*?)?\s*$"
+)
+
+# Millions of values share a handful of unit spellings, so each is resolved once.
+# The cache is bounded and safe to use from processing pool threads.
+@lru_cache(maxsize=1024)
+def normalize_unit(unit: Optional[str]) -> Tuple[Optional[str], float]:
+    """Canonical unit and conversion factor of a unit string, e.g. ``"acres"`` -> ``("ha", 0.4047)``"""
+    if not unit:
+        return None, 1.0
+    key = unit.strip().lower()
+    if key in AREA_UNITS:
+        return AREA_UNIT, AREA_UNITS[key]
+    if key in CURRENCY_UNITS:
+        return sys.intern(CURRENCY_UNITS[key]), 1.0
+    # Unknown units (e.g. "kg/ha") are kept as written, interned
+    return (sys.intern(key) if key else None), 1.0
+
+@lru_cache(maxsize=65536)
+def _parse_text(text: str) -> Tuple[Optional[float], Optional[str]]:
+    match = _QUANTITY.match(text)
+    if not match:
+        return None, None
+    unit, factor = normalize_unit(match.group("unit") or match.group("prefix"))
+    return float(match.group("number").replace(",", "")) * factor, unit
+
+def parse_quantity(value: Any, default_unit: Optional[str] = None) -> Tuple[Optional[float], Optional[str]]:
+    """Parse ``"25.5 ha"`` into ``(25.5, "ha")``, converting to canonical units.
+    
+    Numbers pass through with ``default_unit``; anything that cannot be
+    parsed gives ``(None, None)``.
+    """
+    # Strings first: Agworld sends almost every quantity as text
+    if isinstance(value, str):
+        number, unit = _parse_text(value)
+        if number is not None and unit is None:
+            unit = default_unit
+        return number, unit
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value), default_unit
+    return None, None
+
+def parse_quantities(
+    values: Iterable[Any], default_unit: Optional[str] = None
+) -> Tuple[List[Optional[float]], List[Optional[str]]]:
+    """Parse a column of quantity values into parallel lists of numbers and units"""
+    numbers = []
+    units = []
+    for value in values:
+        number, unit = parse_quantity(value, default_unit)
+        numbers.append(number)
+        units.append(unit)
+    return numbers, units
+
+def to_hectares(value: Any) -> Optional[float]:
+    """Area in hectares, or None when the value is missing or not an area"""
+    number, unit = parse_quantity(value, AREA_UNIT)
+    return number if unit == AREA_UNIT else None
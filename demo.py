@@ -37,36 +37,32 @@ def demo_data_collection():
     """Demonstrate data collection from Agworld API"""
     print_section("📊 Data Collection")
     
-    from app.services.agworld_client import agworld_client
+    import asyncio
+    from app.services.agworld_async_client import async_agworld_client
     
     print("Connecting to Agworld API...")
     print("(Note: Using mock data since no API token is configured)")
     
-    # Collect data from different endpoints
-    data_sources = [
-        ('Fields', agworld_client.get_fields),
-        ('Crops', agworld_client.get_crops),
-        ('Activities', agworld_client.get_activities),
-        ('Companies', agworld_client.get_companies),
-        ('Farms', agworld_client.get_farms),
-        ('Seasons', agworld_client.get_seasons)
-    ]
+    async def collect():
+        # Fetch all endpoints concurrently, then release the HTTP client
+        try:
+            return await async_agworld_client.fetch_company_snapshot()
+        finally:
+            await async_agworld_client.aclose()
     
-    collected_data = {}
+    try:
+        collected_data = asyncio.run(collect())
+    except Exception as e:
+        print(f"❌ Data collection error: {e}")
+        return {}
     
-    for name, method in data_sources:
-        try:
-            data = method()
-            collected_data[name.lower()] = data
-            print(f"✅ {name}: {len(data)} records retrieved")
-            
-            # Show sample data
-            if data and len(data) > 0:
-                sample = data[0]
-                print(f"   Sample: {sample.get('name', sample.get('title', sample.get('type', 'N/A')))}")
-        except Exception as e:
-            print(f"❌ {name}: Error - {e}")
-            collected_data[name.lower()] = []
+    for name, data in collected_data.items():
+        print(f"✅ {name.capitalize()}: {len(data)} records retrieved")
+        
+        # Show sample data
+        if data and len(data) > 0:
+            sample = data[0]
+            print(f"   Sample: {sample.get('name', sample.get('title', sample.get('type', 'N/A')))}")
     
     return collected_data
 
@@ -95,17 +91,19 @@ def demo_data_processing(collected_data):
             items = collected_data[data_source]
             print(f"\n🔄 Processing {len(items)} {data_type} records...")
             
-            for i, item in enumerate(items[:3], 1):  # Process first 3 for demo
-                try:
-                    result = processor.process_agworld_data(item, data_type)
-                    processed_data.append(result)
-                    
-                    # Show processing result
-                    summary = result.get('processed_data', {}).get('summary', 'No summary')
-                    print(f"   {i}. {summary}")
-                    
-                except Exception as e:
-                    print(f"   {i}. Error processing {data_type}: {e}")
+            # The whole group is hashed, looked up and cached in bulk
+            try:
+                results = processor.process_batch(items[:3], data_type)  # Process first 3 for demo
+            except Exception as e:
+                print(f"   Error processing {data_type}: {e}")
+                continue
+            
+            for i, result in enumerate(results, 1):
+                processed_data.append(result)
+                
+                # Show processing result
+                summary = result.get('processed_data', {}).get('summary', 'No summary')
+                print(f"   {i}. {summary}")
     
     # Aggregate the processed data
     if processed_data:
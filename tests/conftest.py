@@ -0,0 +1,106 @@
+import fakeredis
+import fakeredis.aioredis
+import httpx
+import pytest
+import redis
+from app.redis_client import RedisClient, redis_client
+from app.redis_async_client import aioredis, async_redis_client
+from app.services.agworld_client import AgworldAPIClient
+from app.services.entity_store import entity_store
+from app.services.rate_limiter import RateLimiter
+
+class FakeAgworldAPI:
+    """JSON:API collections by endpoint name, served through ``httpx.MockTransport``.
+    
+    ``handler`` may return a response of its own for a request, or None for the default.
+    """
+    
+    def __init__(self):
+        self.collections = {}
+        self.requests = []
+        self.handler = None
+    
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.handler is not None:
+            response = self.handler(request)
+            if response is not None:
+                return response
+        endpoint = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, json={"data": self.collections.get(endpoint, []), "links": {}})
+
+@pytest.fixture
+def memory_redis(monkeypatch):
+    """Run the global Redis client on its in-process fallback, starting empty"""
+    monkeypatch.setattr(redis_client, "redis_client", None)
+    redis_client.memory_cache.clear()
+    redis_client.memory_generations.clear()
+    redis_client.local_cache.clear()
+    entity_store.clear()
+    yield redis_client
+    redis_client.memory_cache.clear()
+    redis_client.memory_generations.clear()
+    redis_client.local_cache.clear()
+    entity_store.clear()
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Point the global Redis client at an empty fake Redis server with a closed circuit"""
+    monkeypatch.setattr(redis_client, "redis_client", fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+    monkeypatch.setattr(redis_client.breaker, "state", redis_client.breaker.CLOSED)
+    redis_client.local_cache.clear()
+    redis_client.generations.clear()
+    entity_store.clear()
+    yield redis_client
+    redis_client.local_cache.clear()
+    redis_client.generations.clear()
+    entity_store.clear()
+
+@pytest.fixture
+def async_fake_redis(fake_redis, monkeypatch):
+    """Serve the asyncio Redis client from the same fake server as ``fake_redis``"""
+    server = fake_redis.redis_client.connection_pool.connection_kwargs["server"]
+    monkeypatch.setattr(
+        aioredis, "Redis",
+        lambda connection_pool=None, **kwargs: fakeredis.aioredis.FakeRedis(server=server, **kwargs)
+    )
+    monkeypatch.setattr(async_redis_client, "redis_client", None)
+    monkeypatch.setattr(async_redis_client, "_loop", None)
+    monkeypatch.setattr(async_redis_client, "_lifetime", None)
+    yield async_redis_client
+
+@pytest.fixture
+def redis_nodes(monkeypatch):
+    """Factory of RedisClient instances ("nodes") sharing one fake Redis server"""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis, "Redis",
+        lambda connection_pool=None, **kwargs: fakeredis.FakeRedis(server=server, **kwargs)
+    )
+    nodes = []
+    
+    def make_node() -> RedisClient:
+        node = RedisClient()
+        nodes.append(node)
+        return node
+    
+    yield make_node
+    for node in nodes:
+        if node.invalidation_thread is not None:
+            node.invalidation_thread.stop()
+
+@pytest.fixture
+def agworld_api(monkeypatch):
+    """Serve every httpx.AsyncClient created during the test from a FakeAgworldAPI"""
+    api = FakeAgworldAPI()
+    transport = httpx.MockTransport(api)
+    async_client = httpx.AsyncClient
+    monkeypatch.setattr(httpx, "AsyncClient", lambda **kwargs: async_client(transport=transport, **kwargs))
+    return api
+
+@pytest.fixture
+def agworld_client():
+    """A sync Agworld client with its own limiter, so tests never wait for tokens"""
+    client = AgworldAPIClient()
+    client.rate_limiter = RateLimiter("test", rate=1000.0, capacity=1000, max_retries=2, backoff_max=0.01)
+    return client
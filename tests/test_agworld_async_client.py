@@ -0,0 +1,95 @@
+import asyncio
+import httpx
+from app.services.agworld_async_client import AsyncAgworldAPIClient
+from app.services.entity_store import entity_store
+
+def field(field_id, crop):
+    return {"type": "fields", "id": field_id, "attributes": {"name": field_id, "crops": [{"crop_name": crop}]}}
+
+def test_new_event_loop_closes_previous_client(agworld_api):
+    client = AsyncAgworldAPIClient()
+    
+    async def bind():
+        await client._bind_loop()
+        return client._client
+    
+    first = asyncio.run(bind())
+    second = asyncio.run(bind())
+    assert second is not first
+    assert first.is_closed
+    assert second.is_closed
+
+def test_aclose_closes_client(agworld_api):
+    client = AsyncAgworldAPIClient()
+    
+    async def run():
+        await client._bind_loop()
+        http_client = client._client
+        await client.aclose()
+        return http_client
+    
+    assert asyncio.run(run()).is_closed
+    assert client._client is None
+
+def test_snapshot_reuses_crop_index(memory_redis, agworld_api, agworld_client, monkeypatch):
+    agworld_api.collections["fields"] = [field("f1", "Wheat"), field("f2", "Barley")]
+    builds = []
+    put_crop_index = entity_store.put_crop_index
+    monkeypatch.setattr(
+        entity_store, "put_crop_index",
+        lambda key, fields, **kwargs: builds.append(key) or put_crop_index(key, fields, **kwargs)
+    )
+    client = AsyncAgworldAPIClient(resources=agworld_client)
+    
+    async def snapshots():
+        results = [await client.fetch_company_snapshot(company_id="c1", season_id="s1") for _ in range(3)]
+        await client.aclose()
+        return results
+    
+    first, second, third = asyncio.run(snapshots())
+    assert [crop["type"] for crop in first["crops"]] == ["Wheat", "Barley"]
+    assert second["crops"] == third["crops"] == first["crops"]
+    # The first index is built while its collection is being refilled, so it is not kept
+    assert len(builds) == 2
+
+def test_not_modified_serves_the_cached_body(memory_redis, agworld_api, agworld_client):
+    body = {"data": [field("f1", "Wheat")]}
+    responses = [
+        httpx.Response(200, json=body, headers={"ETag": '"v1"'}),
+        httpx.Response(304)
+    ]
+    agworld_api.handler = lambda request: responses.pop(0)
+    client = AsyncAgworldAPIClient(resources=agworld_client)
+    
+    async def fetch_twice():
+        first = await client._make_request("GET", "fields", params={"page[number]": "1"})
+        second = await client._make_request("GET", "fields", params={"page[number]": "1"})
+        await client.aclose()
+        return first, second
+    
+    assert asyncio.run(fetch_twice()) == (body, body)
+    assert "if-none-match" not in agworld_api.requests[0].headers
+    assert agworld_api.requests[1].headers["if-none-match"] == '"v1"'
+
+def test_not_modified_without_a_cached_body_refetches(memory_redis, agworld_api, agworld_client):
+    old, new = {"data": [field("f1", "Wheat")]}, {"data": [field("f1", "Barley")]}
+    responses = [
+        httpx.Response(200, json=old, headers={"ETag": '"v1"'}),
+        httpx.Response(304),
+        httpx.Response(200, json=new, headers={"ETag": '"v2"'})
+    ]
+    agworld_api.handler = lambda request: responses.pop(0)
+    client = AsyncAgworldAPIClient(resources=agworld_client)
+    params = {"page[number]": "1"}
+    
+    async def fetch_twice():
+        await client._make_request("GET", "fields", params=params)
+        # The body expired before its validators
+        memory_redis.delete(agworld_client._http_cache_key(f"{client.base_url}/fields", params))
+        result = await client._make_request("GET", "fields", params=params)
+        await client.aclose()
+        return result
+    
+    assert asyncio.run(fetch_twice()) == new
+    assert agworld_api.requests[1].headers["if-none-match"] == '"v1"'
+    assert "if-none-match" not in agworld_api.requests[2].headers
@@ -0,0 +1,72 @@
+import io
+import json
+import pytest
+import requests
+
+def response(status, body=None, headers=None):
+    result = requests.Response()
+    result.status_code = status
+    result._content = b"" if body is None else json.dumps(body).encode("utf-8")
+    result.headers.update(headers or {})
+    result.url = "https://agworld.test/fields"
+    result.raw = io.BytesIO(result._content)
+    return result
+
+class FakeSession:
+    """Replays canned responses and records the headers of every request"""
+    
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent_headers = []
+    
+    def request(self, method, url, params=None, json=None, headers=None, timeout=None, stream=False):
+        self.sent_headers.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+BODY = {"data": [{"type": "fields", "id": "f1", "attributes": {"name": "North"}}]}
+
+def test_etag_is_revalidated(memory_redis, agworld_client):
+    session = agworld_client.session = FakeSession(response(200, BODY, {"ETag": '"v1"'}), response(304))
+    assert agworld_client._make_request("GET", "fields") == BODY
+    assert agworld_client._make_request("GET", "fields") == BODY
+    assert session.sent_headers == [{}, {"If-None-Match": '"v1"'}]
+
+def test_last_modified_is_revalidated(memory_redis, agworld_client):
+    modified = "Wed, 01 May 2024 10:00:00 GMT"
+    session = agworld_client.session = FakeSession(
+        response(200, BODY, {"Last-Modified": modified}), response(304)
+    )
+    agworld_client._make_request("GET", "fields")
+    assert agworld_client._make_request("GET", "fields") == BODY
+    assert session.sent_headers[1] == {"If-Modified-Since": modified}
+
+def test_not_modified_without_a_cached_body_refetches(memory_redis, agworld_client):
+    new_body = {"data": []}
+    session = agworld_client.session = FakeSession(
+        response(200, BODY, {"ETag": '"v1"'}), response(304), response(200, new_body, {"ETag": '"v2"'})
+    )
+    agworld_client._make_request("GET", "fields")
+    url, params = agworld_client._request_url("fields", None)
+    cache_key = agworld_client._http_cache_key(url, params)
+    memory_redis.delete(cache_key)
+    
+    assert agworld_client._make_request("GET", "fields") == new_body
+    assert session.sent_headers == [{}, {"If-None-Match": '"v1"'}, {}]
+    assert memory_redis.get(f"{cache_key}:validators") == {"etag": '"v2"', "last_modified": None}
+
+def test_responses_without_validators_are_not_stored(memory_redis, agworld_client):
+    session = agworld_client.session = FakeSession(response(200, BODY), response(200, BODY))
+    agworld_client._make_request("GET", "fields")
+    agworld_client._make_request("GET", "fields")
+    assert session.sent_headers == [{}, {}]
+
+def test_throttled_requests_are_retried(memory_redis, agworld_client):
+    agworld_client.session = FakeSession(response(429, headers={"Retry-After": "0"}), response(200, BODY))
+    assert agworld_client._make_request("GET", "fields") == BODY
+    # Slowed down by the 429, then recovered one step by the success
+    assert agworld_client.rate_limiter.slowdown == pytest.approx(1.9)
+
+def test_errors_raise_after_the_retries(memory_redis, agworld_client):
+    agworld_client.session = FakeSession(*(response(503) for _ in range(3)))
+    with pytest.raises(requests.exceptions.HTTPError):
+        agworld_client._make_request("GET", "fields")
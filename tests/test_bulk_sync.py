@@ -0,0 +1,57 @@
+from app.services.bulk_sync import BulkSyncOrchestrator
+
+def stub_api(client, monkeypatch, fail_stage=None):
+    def records(stage, rows):
+        def iterate(**kwargs):
+            if stage == fail_stage:
+                raise RuntimeError(f"{stage} unavailable")
+            return iter(rows)
+        return iterate
+    
+    monkeypatch.setattr(client, "iter_companies", records("companies", [{"id": "c1"}, {"id": "c2"}]))
+    monkeypatch.setattr(client, "iter_farms", records("farms", [{"id": "farm1"}, {"id": "farm2"}]))
+    monkeypatch.setattr(client, "iter_fields", records("fields", [{"id": "f1"}]))
+    monkeypatch.setattr(client, "iter_activities", records("activities", [{"id": "a1"}]))
+    monkeypatch.setattr(client, "iter_seasons", records("seasons", [{"id": "s1"}]))
+
+def test_syncs_every_discovered_company(memory_redis, agworld_client, monkeypatch):
+    stub_api(agworld_client, monkeypatch)
+    orchestrator = BulkSyncOrchestrator(client=agworld_client, max_workers=4)
+    progress = orchestrator.sync_companies(run_id="run1")
+    assert progress["status"] == "completed"
+    assert (progress["total"], progress["completed"], progress["failed"]) == (2, 2, 0)
+    stages = progress["companies"]["c1"]["stages"]
+    assert {stage: stages[stage]["records"] for stage in stages} == {
+        "farms": 2, "fields": 2, "activities": 1, "seasons": 1
+    }
+    assert orchestrator.get_progress("run1") == progress
+    # The synced collections are what the matching get_* calls read
+    assert memory_redis.get(agworld_client._cache_key("farms", "c1")) == [{"id": "farm1"}, {"id": "farm2"}]
+
+def test_failed_stage_is_reported_per_company(memory_redis, agworld_client, monkeypatch):
+    stub_api(agworld_client, monkeypatch, fail_stage="seasons")
+    progress = BulkSyncOrchestrator(client=agworld_client).sync_companies(["c1"], run_id="run2")
+    assert progress["status"] == "completed_with_errors"
+    assert progress["companies"]["c1"]["status"] == "failed"
+    assert progress["companies"]["c1"]["errors"] == ["seasons: seasons unavailable"]
+
+def test_failed_discovery_is_recorded(memory_redis, agworld_client, monkeypatch):
+    stub_api(agworld_client, monkeypatch, fail_stage="companies")
+    orchestrator = BulkSyncOrchestrator(client=agworld_client)
+    progress = orchestrator.sync_companies(run_id="run3")
+    assert progress["status"] == "failed"
+    assert progress["error"] == "company discovery: companies unavailable"
+    assert orchestrator.get_progress("run3") == progress
+
+def test_progress_exists_while_discovering(fake_redis, agworld_client, monkeypatch):
+    orchestrator = BulkSyncOrchestrator(client=agworld_client)
+    seen = []
+    
+    def discover(**kwargs):
+        seen.append(orchestrator.get_progress("run4"))
+        return iter([])
+    
+    monkeypatch.setattr(agworld_client, "iter_companies", discover)
+    orchestrator.sync_companies(run_id="run4")
+    assert seen[0]["status"] == "running"
+    assert seen[0]["total"] is None
@@ -0,0 +1,70 @@
+from app.cache_metrics import OTHER_NAMESPACE, CacheMetrics, escape_label, key_namespace
+from app.redis_client import redis_client
+
+def test_key_namespace():
+    assert key_namespace("agworld:fields:v3:all:all") == "agworld:fields"
+    assert key_namespace("polling:activities:status") == "polling:activities"
+    assert key_namespace("lock") == "lock"
+
+def test_snapshot_counts_and_hit_ratio():
+    metrics = CacheMetrics()
+    for counter in ("hits", "hits", "l1_hits", "misses"):
+        metrics.incr("agworld:fields:v0:all", counter)
+    metrics.observe_latency(["agworld:fields:v0:all", "agworld:farms:v0:c1"], "mget", 0.002)
+    metrics.observe_size("agworld:fields:v0:all", "get", 2000)
+    
+    fields = metrics.snapshot()["agworld:fields"]
+    assert (fields["hits"], fields["l1_hits"], fields["misses"]) == (2, 1, 1)
+    assert fields["hit_ratio"] == 0.75
+    assert fields["latency_seconds"]["mget"]["count"] == 1
+    assert fields["latency_seconds"]["mget"]["buckets"]["0.001"] == 0
+    assert fields["latency_seconds"]["mget"]["buckets"]["0.0025"] == 1
+    assert fields["payload_bytes"]["get"]["buckets"]["+Inf"] == 1
+    assert metrics.snapshot()["agworld:farms"]["latency_seconds"]["mget"]["count"] == 1
+
+def test_render_prometheus():
+    metrics = CacheMetrics()
+    metrics.incr("agworld:fields:v0:all", "hits", 3)
+    metrics.observe_latency(["agworld:fields:v0:all"], "get", 0.003)
+    metrics.observe_latency(["agworld:fields:v0:all"], "get", 2.0)
+    text = metrics.render_prometheus()
+    
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    assert "# TYPE cache_events_total counter" in lines
+    assert 'cache_events_total{namespace="agworld:fields",event="hits"} 3' in lines
+    assert 'cache_events_total{namespace="agworld:fields",event="misses"} 0' in lines
+    assert "# TYPE cache_operation_seconds histogram" in lines
+    labels = 'namespace="agworld:fields",operation="get"'
+    assert f'cache_operation_seconds_bucket{{{labels},le="0.0025"}} 0' in lines
+    assert f'cache_operation_seconds_bucket{{{labels},le="0.005"}} 1' in lines
+    assert f'cache_operation_seconds_bucket{{{labels},le="1.0"}} 1' in lines
+    assert f'cache_operation_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+    assert f"cache_operation_seconds_count{{{labels}}} 2" in lines
+    assert "# TYPE cache_payload_bytes histogram" in lines
+
+def test_label_values_are_escaped():
+    assert escape_label('a"b\\c\nd') == 'a\\"b\\\\c\\nd'
+    metrics = CacheMetrics()
+    metrics.incr('weird:"name"\n:key', "sets")
+    assert 'cache_events_total{namespace="weird:\\"name\\"\\n",event="sets"} 1' in metrics.render_prometheus()
+
+def test_namespaces_are_bounded():
+    metrics = CacheMetrics(max_namespaces=2)
+    for company in range(5):
+        metrics.incr(f"sync:company-{company}:last_result", "sets")
+        metrics.observe_size(f"sync:company-{company}:last_result", "set", 100)
+    snapshot = metrics.snapshot()
+    assert set(snapshot) == {"sync:company-0", "sync:company-1", OTHER_NAMESPACE}
+    assert snapshot[OTHER_NAMESPACE]["sets"] == 3
+    assert snapshot[OTHER_NAMESPACE]["payload_bytes"]["set"]["count"] == 3
+
+def test_redis_client_records_metrics(fake_redis):
+    redis_client.metrics.reset()
+    redis_client.set("polling:fields:status", "completed")
+    redis_client.get("polling:fields:status")
+    redis_client.get("polling:fields:missing")
+    polling = redis_client.metrics.snapshot()["polling:fields"]
+    assert (polling["sets"], polling["hits"], polling["misses"]) == (1, 1, 1)
+    assert polling["payload_bytes"]["set"]["count"] == 1
+    assert polling["latency_seconds"]["get"]["count"] == 2
@@ -0,0 +1,102 @@
+import time
+import redis
+from app.circuit_breaker import CircuitBreaker
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+class Probe:
+    """Fails a given number of times, then succeeds"""
+    
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = 0
+    
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("still down")
+
+def test_opens_after_threshold_failures():
+    breaker = CircuitBreaker("test", probe=Probe(failures=1000), failure_threshold=3, recovery_timeout=60)
+    breaker.record_failure(ConnectionError("1"))
+    breaker.record_failure(ConnectionError("2"))
+    assert breaker.allow_request()
+    breaker.record_failure(ConnectionError("3"))
+    assert not breaker.allow_request()
+    stats = breaker.stats()
+    assert stats["state"] == CircuitBreaker.OPEN
+    assert stats["transitions"] == {"closed->open": 1}
+    assert stats["total_failures"] == 3
+    assert stats["last_failure"] == "3"
+
+def test_failures_outside_the_window_do_not_count():
+    breaker = CircuitBreaker("test", probe=Probe(), failure_threshold=2, failure_window=0.05, recovery_timeout=60)
+    breaker.record_failure()
+    time.sleep(0.1)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_probe_closes_the_circuit_after_failed_attempts():
+    probe = Probe(failures=2)
+    closed = []
+    breaker = CircuitBreaker(
+        "test", probe=probe, recovery_timeout=0.01, on_close=lambda: closed.append(True)
+    )
+    breaker.trip()
+    wait_for(lambda: breaker.state == CircuitBreaker.CLOSED)
+    assert probe.calls == 3
+    assert closed == [True]
+    stats = breaker.stats()
+    assert stats["probes"] == 3
+    assert stats["transitions"] == {
+        "closed->open": 1, "open->half_open": 3, "half_open->open": 2, "half_open->closed": 1
+    }
+    assert stats["open_for_seconds"] == 0.0
+
+def test_manual_close_runs_the_hook_once():
+    closed = []
+    breaker = CircuitBreaker("test", probe=Probe(failures=1000), recovery_timeout=60, on_close=lambda: closed.append(True))
+    breaker.close()
+    assert closed == []
+    breaker.trip()
+    breaker.close()
+    breaker.close()
+    assert closed == [True]
+
+def test_failing_close_hook_does_not_reopen():
+    def hook():
+        raise RuntimeError("boom")
+    breaker = CircuitBreaker("test", probe=Probe(), recovery_timeout=0.01, on_close=hook)
+    breaker.trip()
+    wait_for(lambda: breaker.state == CircuitBreaker.CLOSED)
+
+def test_redis_outage_falls_back_and_recovers(redis_nodes, monkeypatch):
+    node = redis_nodes()
+    node.breaker.recovery_timeout = 0.01
+    node.set("polling:fields:status", "completed")
+    
+    def down(*args, **kwargs):
+        raise redis.exceptions.ConnectionError("connection refused")
+    
+    server = node.redis_client
+    for command in ("get", "set", "ping"):
+        monkeypatch.setattr(server, command, down)
+    for _ in range(node.breaker.failure_threshold):
+        assert node.get("polling:fields:status") is None
+    assert not node.use_redis
+    
+    # Served from the memory fallback while the circuit is open
+    node.set("polling:fields:status", "failed")
+    assert node.get("polling:fields:status") == "failed"
+    time.sleep(0.05)
+    assert node.breaker.state != node.breaker.CLOSED
+    
+    for command in ("get", "set", "ping"):
+        monkeypatch.delattr(server, command)
+    wait_for(lambda: node.use_redis)
+    assert len(node.memory_cache) == 0
+    assert node.get("polling:fields:status") == "completed"
@@ -0,0 +1,41 @@
+import json
+import pytest
+from app.codec import CODEC_VERSION, CacheCodec, CodecError
+
+@pytest.mark.parametrize("serializer", ["json", "orjson", "msgpack"])
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_round_trip(serializer, compression):
+    codec = CacheCodec(serializer=serializer, compression=compression, compress_min_bytes=64)
+    values = [
+        "plain text",
+        "",
+        {"id": "f1", "area": 25.5, "crops": ["wheat"] * 50},
+        [1, 2.5, None, True],
+        42
+    ]
+    for value in values:
+        encoded = codec.encode(value)
+        assert encoded[0] & 0xF0 == CODEC_VERSION
+        assert codec.decode(encoded) == value
+
+def test_large_values_are_compressed():
+    codec = CacheCodec(serializer="json", compression="zlib", compress_min_bytes=64)
+    value = {"notes": "x" * 10000}
+    encoded = codec.encode(value)
+    assert len(encoded) < 1000
+    assert codec.decode(encoded) == value
+
+def test_legacy_values_decode():
+    codec = CacheCodec()
+    legacy = {"id": "f1", "area": 25.5}
+    assert codec.decode(json.dumps(legacy).encode("utf-8")) == legacy
+    assert codec.decode(json.dumps(legacy)) == legacy
+    assert codec.decode(b"not json") == "not json"
+    assert codec.decode(None) is None
+    assert codec.decode(b"") is None
+
+def test_corrupt_value_raises():
+    codec = CacheCodec(serializer="json", compression="zlib", compress_min_bytes=64)
+    encoded = codec.encode({"notes": "x" * 10000})
+    with pytest.raises(CodecError):
+        codec.decode(encoded[:20])
@@ -0,0 +1,143 @@
+import pytest
+from app.services import entity_store as entity_store_module
+from app.services.entity_store import ActivityIndex, CropIndex, EntityStore, crops_from_field
+
+FIELDS = [
+    {"id": "f1", "crops": [{"crop_name": "Wheat", "variety_name": "Scout"}, {"crop_name": "Canola"}]},
+    {"id": "f2", "crops": []}
+]
+
+ACTIVITIES = [
+    {"id": "a1", "activity_fields": [{"field_id": "f1"}, {"field_id": "f2"}, {"field_id": "f1"}]},
+    {"id": "a2", "activity_fields": [{"field_id": "f2"}]},
+    {"id": "a3", "activity_fields": None}
+]
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(entity_store_module, "time", clock)
+    return clock
+
+def test_crops_from_field():
+    crops = crops_from_field(FIELDS[0])
+    assert [(crop["id"], crop["type"], crop["variety"]) for crop in crops] == [
+        ("f1_crop_0", "Wheat", "Scout"), ("f1_crop_1", "Canola", None)
+    ]
+    placeholder, = crops_from_field(FIELDS[1])
+    assert placeholder["id"] == "f2_crop_unknown"
+    assert placeholder["field_id"] == "f2"
+
+def test_crop_index():
+    index = CropIndex(FIELDS)
+    assert [crop["type"] for crop in index.for_field("f1")] == ["Wheat", "Canola"]
+    assert index.for_field("missing") == []
+    assert len(index.all()) == 3
+    # Callers get copies
+    index.all().clear()
+    index.for_field("f1").clear()
+    assert len(index.all()) == 3
+    assert len(index.for_field("f1")) == 2
+
+def test_indexes_expire(clock):
+    store = EntityStore(ttl=60, max_entries=10)
+    index = store.put_crop_index("fields:a", FIELDS)
+    assert store.get_crop_index("fields:a") is index
+    clock.now += 61
+    assert store.get_crop_index("fields:a") is None
+
+def test_expired_indexes_are_purged_on_put(clock):
+    store = EntityStore(ttl=60, max_entries=10)
+    store.put_crop_index("fields:a", FIELDS)
+    store.put_crop_index("fields:b", FIELDS)
+    clock.now += 61
+    store.put_crop_index("fields:c", FIELDS)
+    assert list(store._crop_indexes) == ["fields:c"]
+
+def test_least_recently_used_indexes_are_dropped(clock):
+    store = EntityStore(ttl=60, max_entries=2)
+    store.put_crop_index("fields:a", FIELDS)
+    store.put_crop_index("fields:b", FIELDS)
+    store.get_crop_index("fields:a")
+    store.put_crop_index("fields:c", FIELDS)
+    assert store.get_crop_index("fields:b") is None
+    assert store.get_crop_index("fields:a") is not None
+    assert store.get_crop_index("fields:c") is not None
+
+def test_discard_drops_the_index():
+    store = EntityStore(ttl=60, max_entries=10)
+    store.put_crop_index("fields:a", FIELDS)
+    store.discard("fields:a")
+    assert store.get_crop_index("fields:a") is None
+
+def test_index_of_a_replaced_copy_is_not_stored():
+    store = EntityStore(ttl=60, max_entries=10)
+    version = store.version()
+    # A refresh refills the collection while the caller still holds the old copy
+    store.discard("fields:a")
+    index = store.put_crop_index("fields:a", FIELDS, version=version)
+    assert len(index.all()) == 3
+    assert store.get_crop_index("fields:a") is None
+    
+    version = store.version()
+    store.discard("fields:b")
+    assert store.put_crop_index("fields:a", FIELDS, version=version) is store.get_crop_index("fields:a")
+
+def test_discards_pushed_out_of_the_bounded_map_stay_conservative():
+    store = EntityStore(ttl=60, max_entries=2)
+    version = store.version()
+    for key in ("fields:a", "fields:b", "fields:c"):
+        store.discard(key)
+    assert len(store._discarded) == 2
+    store.put_crop_index("fields:a", FIELDS, version=version)
+    assert store.get_crop_index("fields:a") is None
+    store.put_crop_index("fields:a", FIELDS, version=store.version())
+    assert store.get_crop_index("fields:a") is not None
+
+def test_get_crops_uses_the_index(memory_redis, agworld_client, monkeypatch):
+    fetches = []
+    monkeypatch.setattr(agworld_client, "get_fields", lambda **kwargs: fetches.append(kwargs) or FIELDS)
+    assert [crop["type"] for crop in agworld_client.get_crops(field_id="f1", season_id="s1")] == ["Wheat", "Canola"]
+    assert agworld_client.get_crops(field_id="f2", season_id="s1")[0]["type"] == "Unknown"
+    assert len(agworld_client.get_crops(season_id="s1")) == 3
+    assert len(fetches) == 1
+
+def test_activity_index():
+    index = ActivityIndex(ACTIVITIES)
+    assert [activity["id"] for activity in index.for_field("f1")] == ["a1"]
+    assert [activity["id"] for activity in index.for_field("f2")] == ["a1", "a2"]
+    assert index.for_field("f3") == []
+
+def test_activity_indexes_are_bounded(clock):
+    store = EntityStore(ttl=60, max_entries=3)
+    # Every start_date a caller asks for is a collection of its own
+    for day in range(1, 11):
+        store.put_activity_index(f"activities:2024-01-{day:02d}", ACTIVITIES)
+    assert list(store._activity_indexes) == [f"activities:2024-01-{day:02d}" for day in (8, 9, 10)]
+
+def test_activity_index_of_a_replaced_copy_is_not_stored():
+    store = EntityStore(ttl=60, max_entries=10)
+    version = store.version()
+    store.discard("activities:a")
+    store.put_activity_index("activities:a", ACTIVITIES, version=version)
+    assert store.get_activity_index("activities:a") is None
+
+def test_get_activities_for_a_field_uses_the_index(memory_redis, agworld_client, monkeypatch):
+    fetches = []
+    
+    def cached_fetch(label, cache_key, ttl, fetch, mock):
+        fetches.append(cache_key)
+        return ACTIVITIES
+    
+    monkeypatch.setattr(agworld_client, "_cached_fetch", cached_fetch)
+    assert [activity["id"] for activity in agworld_client.get_activities(field_id="f2", company_id="c1")] == ["a1", "a2"]
+    assert [activity["id"] for activity in agworld_client.get_activities(field_id="f1", company_id="c1")] == ["a1"]
+    # Both fields are answered from one unfiltered collection
+    assert len(fetches) == 1
@@ -0,0 +1,111 @@
+import pytest
+from app import memory_cache as memory_cache_module
+from app.memory_cache import MemoryCache
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(memory_cache_module, "time", clock)
+    return clock
+
+def test_get_set_delete():
+    cache = MemoryCache()
+    assert cache.set("a", {"x": 1})
+    assert cache.get("a") == {"x": 1}
+    assert "a" in cache
+    assert cache.delete("a")
+    assert not cache.delete("a")
+    assert cache.get("a", "missing") == "missing"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_entries_expire(clock):
+    cache = MemoryCache()
+    cache.set("a", "value", ex=10)
+    cache.set("b", "value")
+    assert cache.ttl("a") == pytest.approx(10)
+    assert cache.ttl("b") is None
+    clock.now += 10
+    assert cache.get("a") is None
+    assert cache.get("b") == "value"
+    assert cache.stats()["expirations"] == 1
+
+def test_expire_resets_the_ttl(clock):
+    cache = MemoryCache()
+    cache.set("a", "value", ex=10)
+    clock.now += 9
+    assert cache.expire("a", 10)
+    clock.now += 9
+    assert cache.get("a") == "value"
+    assert not cache.expire("missing", 10)
+
+def test_nx_only_sets_absent_keys(clock):
+    cache = MemoryCache()
+    assert cache.set("lock", "first", ex=5, nx=True)
+    assert not cache.set("lock", "second", ex=5, nx=True)
+    clock.now += 5
+    assert cache.set("lock", "third", ex=5, nx=True)
+    assert cache.get("lock") == "third"
+
+def test_least_recently_used_is_evicted():
+    evicted = []
+    cache = MemoryCache(max_entries=3, on_evict=evicted.append)
+    for key in "abc":
+        cache.set(key, key)
+    cache.get("a")
+    cache.set("d", "d")
+    assert evicted == ["b"]
+    assert sorted(cache.keys()) == ["a", "c", "d"]
+    assert cache.stats()["evictions"] == 1
+
+def test_byte_budget():
+    cache = MemoryCache(max_bytes=100)
+    cache.set("a", "x" * 40)
+    cache.set("b", "x" * 40)
+    cache.set("c", "x" * 40)
+    assert cache.keys() == ["b", "c"]
+    assert cache.stats()["bytes"] == 80
+    # Replacing a key releases its old size first
+    cache.set("c", "x" * 10)
+    assert cache.stats()["bytes"] == 50
+
+def test_oversized_values_are_rejected():
+    cache = MemoryCache(max_bytes=10)
+    cache.set("a", "small")
+    assert not cache.set("b", "x" * 11)
+    assert cache.get("a") == "small"
+    assert cache.stats()["rejections"] == 1
+
+def test_expired_entries_go_before_live_ones(clock):
+    evicted = []
+    cache = MemoryCache(max_entries=2, on_evict=evicted.append)
+    cache.set("live", 1)
+    cache.set("expiring", 2, ex=1)
+    clock.now += 2
+    cache.set("new", 3)
+    assert evicted == []
+    assert sorted(cache.keys()) == ["live", "new"]
+
+def test_delete_matching():
+    cache = MemoryCache()
+    for key in ("agworld:fields:1", "agworld:fields:2", "agworld:farms:1"):
+        cache.set(key, 1)
+    assert cache.delete_matching("agworld:fields:*") == 2
+    assert cache.keys() == ["agworld:farms:1"]
+    assert cache.delete_matching("*") == 1
+    assert len(cache) == 0
+    assert cache.stats()["bytes"] == 0
+
+def test_redis_client_falls_back_to_the_memory_cache(memory_redis):
+    memory_redis.set("agworld:test", [1, 2], ex=60)
+    assert memory_redis.get("agworld:test") == [1, 2]
+    assert memory_redis.memory_cache.ttl("agworld:test") == pytest.approx(60, abs=1)
+    assert memory_redis.get_many(["agworld:test", "missing"]) == {"agworld:test": [1, 2], "missing": None}
+    assert memory_redis.delete_many(["agworld:test", "missing"]) == 1
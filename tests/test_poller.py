@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip("apscheduler")
+
+from app.scheduler import poller as poller_module
+from app.scheduler.poller import AgworldPoller, TaskScheduler
+
+class FakeEngine:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.synced = []
+    
+    def sync_resource(self, resource):
+        if self.fail:
+            raise RuntimeError("API down")
+        self.synced.append(resource)
+        return {"resource": resource, "upserted": 1}
+    
+    def get_records(self, resource):
+        return [{"id": f"{resource}-1"}, {"id": f"{resource}-2"}]
+
+def test_polls_sync_through_the_engine(memory_redis):
+    engine = FakeEngine()
+    poller = AgworldPoller(engine=engine)
+    assert poller.poll_field_data() == {"fields": {"resource": "fields", "upserted": 1}}
+    poller.poll_activity_data()
+    assert engine.synced == ["fields", "activities"]
+    assert memory_redis.get("polling:fields:status") == "completed"
+    assert memory_redis.get("polling:fields:last_run") is not None
+    assert memory_redis.get("polling:fields:error") is None
+
+def test_failed_poll_records_the_error(memory_redis):
+    assert AgworldPoller(engine=FakeEngine(fail=True)).poll_field_data() == {}
+    assert memory_redis.get("polling:fields:status") == "failed"
+    assert memory_redis.get("polling:fields:error") == "API down"
+
+def test_daily_report_counts_synced_records(memory_redis, monkeypatch):
+    reports = []
+    monkeypatch.setattr(
+        poller_module.reporter, "generate_report",
+        lambda report, format_type: reports.append(report) or {"success": True, "errors": []}
+    )
+    assert AgworldPoller(engine=FakeEngine()).generate_daily_report()["success"]
+    assert reports[0]["data"]["data_types"] == {"field": 2, "activity": 2}
+    assert memory_redis.get("report:daily:status") == "completed"
+
+def test_scheduler_registers_jobs(memory_redis):
+    scheduler = TaskScheduler(AgworldPoller(engine=FakeEngine()))
+    scheduler.start()
+    try:
+        assert scheduler.is_running
+        assert {job.id for job in scheduler.get_jobs()} == {"poll_fields", "poll_activities", "daily_report"}
+    finally:
+        scheduler.shutdown()
+    assert not scheduler.is_running
+    assert scheduler.get_jobs() == []
@@ -0,0 +1,93 @@
+import importlib
+from functools import partial
+import pytest
+from app.models.records import ActivityRecord, FieldRecord, ProcessedRecord
+from app.services.processor import DataProcessor
+from app.services.processing_pool import ProcessingPool
+from app.transforms import RecordError, register_transform, transform_registry
+
+# app.services re-exports the processor instance under the module's name
+processor_module = importlib.import_module("app.services.processor")
+
+def fields(count):
+    return [{"id": f"f{index}", "name": f"Field {index}", "area": f"{index} ha"} for index in range(count)]
+
+class WorkersWithoutRuntimeTransforms:
+    """Stands in for process workers that know only the built-in transforms"""
+    
+    def map(self, function, chunks):
+        if isinstance(function, partial) and function.args == ("test_plot",):
+            raise AssertionError("records were sent to workers that lack their transform")
+        return map(function, chunks)
+    
+    def shutdown(self, **kwargs):
+        pass
+
+@pytest.fixture
+def processor(memory_redis):
+    return DataProcessor()
+
+def test_thread_pool_matches_serial_results():
+    pool = ProcessingPool(kind="thread", max_workers=2, min_records=1, chunk_size=3)
+    try:
+        records = fields(10)
+        assert pool.hash(records) == ProcessingPool(kind="serial").hash(records)
+        results = pool.transform("field", records)
+        assert [result.field_id for result in results] == [f"f{index}" for index in range(10)]
+    finally:
+        pool.shutdown()
+
+def test_chunk_errors_keep_their_position():
+    pool = ProcessingPool(kind="thread", max_workers=2, min_records=1, chunk_size=2)
+    try:
+        results = pool.transform("activity", [{"id": "a0"}, {"id": "a1"}, {"id": "a2"}, "not a record"])
+        assert isinstance(results[3], RecordError)
+        assert results[3].index == 3
+    finally:
+        pool.shutdown()
+
+def test_process_batch_transforms_duplicates_once(processor, monkeypatch):
+    calls = []
+    transform = processor_module.processing_pool.transform
+    monkeypatch.setattr(
+        processor_module.processing_pool, "transform",
+        lambda data_type, records: calls.append(len(records)) or transform(data_type, records)
+    )
+    records = fields(2) * 3
+    results = processor.process_batch(records, "field", use_cache=False)
+    assert calls == [2]
+    assert [result.processed_data.field_id for result in results] == ["f0", "f1"] * 3
+
+def test_process_batch_errors(processor):
+    records = [{"id": "a1", "area": "5 ha"}, "not a record", {"id": "a2"}]
+    with pytest.raises(RecordError) as error:
+        processor.process_batch(records, "activity")
+    assert error.value.index == 1
+    
+    results = processor.process_batch(records, "activity", errors="collect")
+    assert isinstance(results[0], ProcessedRecord)
+    assert isinstance(results[0].processed_data, ActivityRecord)
+    assert isinstance(results[1], RecordError)
+    assert results[1].index == 1
+    assert results[2].processed_data.activity_id == "a2"
+    
+    columns = processor.process_batch(records, "activity", output="columns", errors="collect")
+    assert columns["activity_id"] == ["a1", "a2"]
+
+def test_runtime_transform_runs_inline_on_process_pool(processor, monkeypatch):
+    if transform_registry.get("test_plot") is None:
+        register_transform("test_plot", FieldRecord, {"field_id": "id", "field_name": "name"})
+    pool = ProcessingPool(kind="process", max_workers=2, min_records=1)
+    # Workers started from the plugin list know only the built-in transforms
+    pool._executor = WorkersWithoutRuntimeTransforms()
+    pool._worker_signatures = {
+        data_type: signature for data_type, signature in transform_registry.signatures().items()
+        if data_type != "test_plot"
+    }
+    monkeypatch.setattr(processor_module, "processing_pool", pool)
+    try:
+        results = processor.process_batch(fields(4), "test_plot", use_cache=False)
+        assert all(isinstance(result.processed_data, FieldRecord) for result in results)
+        assert pool._workers_match("field")
+    finally:
+        pool.shutdown()
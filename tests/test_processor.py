@@ -0,0 +1,44 @@
+import pytest
+from app.redis_client import redis_client
+from app.services.processor import DataProcessor
+
+def fields(count):
+    return [{"id": f"f{index}", "name": f"Field {index}", "area": f"{index} ha"} for index in range(count)]
+
+@pytest.fixture
+def processor(memory_redis):
+    return DataProcessor()
+
+def test_process_batch_caches_results(processor):
+    records = fields(3)
+    first = processor.process_batch(records, "field")
+    assert [result["processed_data"]["field_id"] for result in first] == ["f0", "f1", "f2"]
+    assert processor.cache_stats()["misses"] == 3
+    
+    second = processor.process_batch(records + fields(4)[3:], "field")
+    assert processor.cache_stats() == {"hits": 3, "misses": 4, "hit_ratio": round(3 / 7, 4)}
+    assert [result["raw_data_hash"] for result in second[:3]] == [result["raw_data_hash"] for result in first]
+    assert second[3]["processed_data"]["field_id"] == "f3"
+
+def test_process_batch_writes_duplicates_once(processor, monkeypatch):
+    writes = []
+    set_many = redis_client.set_many
+    monkeypatch.setattr(
+        redis_client, "set_many", lambda mapping, ex=None: writes.append(len(mapping)) or set_many(mapping, ex=ex)
+    )
+    results = processor.process_batch(fields(2) * 3, "field", use_cache=False)
+    assert writes == [2]
+    assert [result["processed_data"]["field_id"] for result in results] == ["f0", "f1"] * 3
+
+def test_process_batch_matches_single_record_processing(processor):
+    records = fields(2)
+    batch = processor.process_batch(records, "field", use_cache=False)
+    single = [processor.process_agworld_data(record, "field", use_cache=False) for record in records]
+    assert [result["processed_data"] for result in batch] == [result["processed_data"] for result in single]
+    assert [result["raw_data_hash"] for result in batch] == [result["raw_data_hash"] for result in single]
+
+def test_process_batch_columns(processor):
+    columns = processor.process_batch(fields(2), "field", output="columns")
+    assert columns["data_type"] == ["field", "field"]
+    assert columns["field_id"] == ["f0", "f1"]
+    assert len(columns["raw_data_hash"]) == 2
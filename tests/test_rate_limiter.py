@@ -0,0 +1,91 @@
+import time
+import pytest
+from types import SimpleNamespace
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from app.services import rate_limiter as rate_limiter_module
+from app.services.rate_limiter import RateLimiter, TokenBucket
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter_module, "time", SimpleNamespace(monotonic=clock, sleep=time.sleep))
+    return clock
+
+def test_bucket_allows_a_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+def test_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    bucket.reserve(2)
+    clock.now += 60
+    assert bucket.reserve(2) == 0.0
+    assert bucket.reserve() == pytest.approx(1.0)
+
+def test_bucket_block(clock):
+    bucket = TokenBucket(rate=10.0, capacity=10)
+    bucket.block(5)
+    bucket.block(2)
+    assert bucket.reserve() == pytest.approx(5.0)
+    clock.now += 5
+    assert bucket.reserve() == 0.0
+
+def test_local_fallback_without_redis(memory_redis, clock):
+    limiter = RateLimiter("test-local", rate=1.0, capacity=2)
+    assert [limiter.reserve() for _ in range(2)] == [0.0, 0.0]
+    assert limiter.reserve() == pytest.approx(1.0)
+    limiter.record_throttle(retry_after=30)
+    assert limiter.reserve() == pytest.approx(30.0)
+
+def test_limiters_share_the_redis_bucket(fake_redis):
+    first = RateLimiter("test-shared", rate=1.0, capacity=2)
+    second = RateLimiter("test-shared", rate=1.0, capacity=2)
+    assert first.reserve() == 0.0
+    assert second.reserve() == 0.0
+    assert first.reserve() == pytest.approx(1.0, abs=0.1)
+    # The in-process buckets were never used
+    assert first.local_bucket.tokens == 2
+
+def test_retry_after_blocks_every_limiter(fake_redis):
+    first = RateLimiter("test-block", rate=100.0, capacity=100)
+    second = RateLimiter("test-block", rate=100.0, capacity=100)
+    first.record_throttle(retry_after=20)
+    assert second.reserve() == pytest.approx(20.0, abs=0.5)
+    # A shorter Retry-After never shortens the block
+    second.record_throttle(retry_after=1)
+    assert first.reserve() == pytest.approx(20.0, abs=0.5)
+
+def test_throttles_slow_down_and_successes_recover(memory_redis):
+    limiter = RateLimiter("test-adaptive", rate=4.0, capacity=4, recovery_step=0.5, max_slowdown=4.0)
+    limiter.record_throttle()
+    limiter.record_throttle()
+    limiter.record_throttle()
+    assert limiter.slowdown == 4.0
+    assert limiter.effective_rate == 1.0
+    for _ in range(10):
+        limiter.record_success()
+    assert limiter.slowdown == 1.0
+
+def test_backoff_delay():
+    limiter = RateLimiter("test-backoff", rate=1.0, capacity=1, backoff_base=1.0, backoff_max=10.0)
+    assert all(0 <= limiter.backoff_delay(attempt) <= min(10.0, 2 ** attempt) for attempt in range(8))
+    assert limiter.backoff_delay(0, retry_after=3) == 3
+    assert limiter.backoff_delay(0, retry_after=300) == 10.0
+
+def test_parse_retry_after():
+    assert RateLimiter.parse_retry_after("7") == 7.0
+    assert RateLimiter.parse_retry_after("-1") == 0.0
+    assert RateLimiter.parse_retry_after(None) is None
+    assert RateLimiter.parse_retry_after("soon") is None
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=120)
+    assert RateLimiter.parse_retry_after(format_datetime(retry_at, usegmt=True)) == pytest.approx(120, abs=2)
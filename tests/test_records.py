@@ -0,0 +1,31 @@
+from app.codec import CacheCodec
+from app.models.records import ActivityRecord, FieldRecord, ProcessedRecord
+from app.transforms import transform_registry
+
+def test_records_read_like_dicts():
+    record = FieldRecord(field_id="f1", field_name="North", area=12.5, area_unit="ha")
+    assert record["field_id"] == "f1"
+    assert record.get("missing", "default") == "default"
+    assert "summary" in record and "missing" not in record
+    assert record.to_dict()["area"] == 12.5
+    assert not hasattr(record, "__dict__")
+
+def test_records_round_trip_through_the_codec():
+    codec = CacheCodec(serializer="json", compression="none")
+    record = ProcessedRecord(
+        data_type="field",
+        processed_at="2024-01-01T00:00:00",
+        source="agworld",
+        raw_data_hash="abc",
+        processed_data=FieldRecord(field_id="f1", field_name="North", area=12.5, area_unit="ha")
+    )
+    decoded = codec.decode(codec.encode(record))
+    assert isinstance(decoded, ProcessedRecord)
+    assert isinstance(decoded.processed_data, FieldRecord)
+    assert decoded == record
+
+def test_transforms_return_records():
+    assert isinstance(transform_registry.get("field")({"id": "f1", "area": "2 ha"}), FieldRecord)
+    activity = transform_registry.get("activity")({"id": "a1"})
+    assert isinstance(activity, ActivityRecord)
+    assert activity.activity_id == "a1"
@@ -0,0 +1,60 @@
+import asyncio
+from app.redis_client import redis_client
+from app.redis_async_client import async_redis_client
+from app.services.bulk_sync import bulk_sync
+from app.services.sync_engine import sync_engine
+
+HOT_KEY = "agworld:farms:v0:c1"
+
+def run(coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await async_redis_client.aclose()
+    return asyncio.run(main())
+
+def test_shares_entries_with_the_sync_client(async_fake_redis):
+    run(async_fake_redis.set("polling:fields:status", {"state": "completed"}, ex=60))
+    assert redis_client.get("polling:fields:status") == {"state": "completed"}
+    redis_client.set("polling:fields:error", "API down")
+    assert run(async_fake_redis.get("polling:fields:error")) == "API down"
+    assert run(async_fake_redis.get_many(["polling:fields:error", "polling:fields:missing"])) == {
+        "polling:fields:error": "API down", "polling:fields:missing": None
+    }
+    assert run(async_fake_redis.delete("polling:fields:error"))
+    assert redis_client.get("polling:fields:error") is None
+
+def test_hot_keys_use_the_shared_l1(async_fake_redis):
+    redis_client.set(HOT_KEY, ["farm"], ex=2)
+    assert run(async_fake_redis.get(HOT_KEY)) == ["farm"]
+    assert 0 < redis_client.local_cache.ttl(HOT_KEY) <= 2
+    run(async_fake_redis.set(HOT_KEY, ["changed"]))
+    assert HOT_KEY not in redis_client.local_cache
+    assert redis_client.get(HOT_KEY) == ["changed"]
+
+def test_namespace_generations_are_shared(async_fake_redis):
+    assert run(async_fake_redis.invalidate_namespace("agworld:fields")) == 1
+    assert redis_client.namespaced_key("agworld:fields", "all") == "agworld:fields:v1:all"
+    assert run(async_fake_redis.namespaced_key("agworld:fields", "all")) == "agworld:fields:v1:all"
+
+def test_each_event_loop_gets_its_own_pool(async_fake_redis):
+    for _ in range(3):
+        assert run(async_fake_redis.ping())
+    assert async_fake_redis.redis_client is None
+
+def test_open_circuit_falls_back_to_memory_with_the_sync_client(memory_redis):
+    run(async_redis_client.set("polling:fields:status", "completed"))
+    assert redis_client.get("polling:fields:status") == "completed"
+    assert run(async_redis_client.get("polling:fields:status")) == "completed"
+    # The memory fallback is always available
+    assert run(async_redis_client.ping()) is True
+
+def test_sync_status_and_bulk_progress_read_through_the_async_client(async_fake_redis):
+    redis_client.set(sync_engine._key("fields", "c1", "watermark"), "2024-01-02T00:00:00Z")
+    redis_client.set("sync:c1:last_result", {"fields": {"upserted": 3}})
+    assert run(sync_engine.get_status_async("c1")) == sync_engine.get_status("c1")
+    
+    redis_client.set(bulk_sync._progress_key("run-1"), {"status": "running"})
+    assert run(bulk_sync.get_progress_async("run-1")) == {"status": "running"}
+    assert run(bulk_sync.get_progress_async("missing")) is None
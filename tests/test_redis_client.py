@@ -0,0 +1,198 @@
+import time
+import pytest
+from app.redis_client import redis_client
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+HOT_KEY = "agworld:farms:v0:c1"
+
+def test_hot_keys_are_served_from_l1(redis_nodes):
+    node = redis_nodes()
+    node.set(HOT_KEY, ["farm"], ex=60)
+    assert node.get(HOT_KEY) == ["farm"]
+    node.redis_client.set(HOT_KEY, node.codec.encode(["changed behind its back"]))
+    assert node.get(HOT_KEY) == ["farm"]
+    assert node.local_cache.ttl(HOT_KEY) <= node.local_ttl
+
+def test_l1_never_outlives_the_redis_ttl(redis_nodes):
+    node = redis_nodes()
+    node.set(HOT_KEY, ["farm"], ex=2)
+    node.get(HOT_KEY)
+    assert node.local_cache.ttl(HOT_KEY) <= 2
+    # PTTL 0: the key is expiring right now and must not be pinned
+    node.local_cache.clear()
+    node._decode_fetched(HOT_KEY, node.codec.encode(["farm"]), 0)
+    assert HOT_KEY not in node.local_cache
+
+def test_cold_keys_skip_l1(redis_nodes):
+    node = redis_nodes()
+    node.set("agworld:fields:v0:all", ["field"])
+    assert node.get("agworld:fields:v0:all") == ["field"]
+    assert len(node.local_cache) == 0
+
+def test_writes_invalidate_l1_on_other_nodes(redis_nodes):
+    reader, writer = redis_nodes(), redis_nodes()
+    writer.set(HOT_KEY, ["old"])
+    assert reader.get(HOT_KEY) == ["old"]
+    writer.set(HOT_KEY, ["new"])
+    wait_for(lambda: HOT_KEY not in reader.local_cache)
+    assert reader.get(HOT_KEY) == ["new"]
+    
+    writer.delete(HOT_KEY)
+    wait_for(lambda: HOT_KEY not in reader.local_cache)
+    assert reader.get(HOT_KEY) is None
+
+def test_batched_writes_invalidate_l1_on_other_nodes(redis_nodes):
+    reader, writer = redis_nodes(), redis_nodes()
+    writer.set(HOT_KEY, ["old"])
+    reader.get(HOT_KEY)
+    writer.set_many({HOT_KEY: ["new"], "agworld:fields:v0:all": []})
+    wait_for(lambda: HOT_KEY not in reader.local_cache)
+
+def test_own_invalidations_are_ignored(redis_nodes):
+    node = redis_nodes()
+    node.set(HOT_KEY, ["farm"])
+    node.get(HOT_KEY)
+    node._on_invalidation({"data": f'{{"node": "{node.node_id}", "keys": ["{HOT_KEY}"]}}'})
+    assert HOT_KEY in node.local_cache
+
+def test_clear_cache_invalidates_after_unlinking(redis_nodes, monkeypatch):
+    reader, writer = redis_nodes(), redis_nodes()
+    writer.set(HOT_KEY, ["farm"])
+    writer.set("agworld:farms:v0:c2", ["farm"])
+    reader.get(HOT_KEY)
+    
+    remaining_at_invalidation = []
+    invalidate = writer._invalidate
+    
+    def record(*keys, **kwargs):
+        remaining_at_invalidation.append(writer.redis_client.exists(HOT_KEY, "agworld:farms:v0:c2"))
+        invalidate(*keys, **kwargs)
+    
+    monkeypatch.setattr(writer, "_invalidate", record)
+    assert writer.clear_cache("agworld:farms:*", batch_size=1) == 2
+    assert remaining_at_invalidation == [0]
+    wait_for(lambda: HOT_KEY not in reader.local_cache)
+
+def test_reconnect_drops_entries_from_the_outage(redis_nodes):
+    node = redis_nodes()
+    node.breaker.trip()
+    node.set("agworld:fields:v0:all", ["written during the outage"])
+    assert node.get("agworld:fields:v0:all") == ["written during the outage"]
+    node.breaker.close()
+    assert len(node.memory_cache) == 0
+    assert node.get("agworld:fields:v0:all") is None
+
+def test_clear_cache_unlinks_matching_keys_in_batches(fake_redis, monkeypatch):
+    for i in range(7):
+        redis_client.set(f"polling:fields:{i}", i)
+    redis_client.set("polling:activities:0", 0)
+    unlinks = []
+    server = fake_redis.redis_client
+    unlink = server.unlink
+    monkeypatch.setattr(server, "unlink", lambda *keys: unlinks.append(len(keys)) or unlink(*keys))
+    monkeypatch.setattr(server, "keys", lambda *args: pytest.fail("clear_cache must not use KEYS"))
+    
+    assert redis_client.clear_cache("polling:fields:*", batch_size=3) == 7
+    assert sum(unlinks) == 7 and max(unlinks) <= 3
+    assert redis_client.get("polling:activities:0") == 0
+    assert redis_client.clear_cache("polling:fields:*") == 0
+
+def test_clear_cache_memory_fallback(memory_redis):
+    redis_client.set("polling:fields:1", 1)
+    redis_client.set("polling:activities:1", 1)
+    assert redis_client.clear_cache("polling:fields:*") == 1
+    assert redis_client.get("polling:fields:1") is None
+    assert redis_client.get("polling:activities:1") == 1
+
+@pytest.mark.parametrize("backend", ["fake_redis", "memory_redis"])
+def test_invalidate_namespace_moves_keys_to_a_new_generation(backend, request):
+    request.getfixturevalue(backend)
+    key = redis_client.namespaced_key("agworld:activities", "c1", "all")
+    assert key == "agworld:activities:v0:c1:all"
+    redis_client.set(key, ["old"])
+    
+    assert redis_client.invalidate_namespace("agworld:activities") == 1
+    new_key = redis_client.namespaced_key("agworld:activities", "c1", "all")
+    assert new_key == "agworld:activities:v1:c1:all"
+    assert redis_client.get(new_key) is None
+    assert redis_client.namespaced_key("agworld:fields", "all") == "agworld:fields:v0:all"
+
+def test_generation_bumps_reach_other_nodes(redis_nodes):
+    reader, writer = redis_nodes(), redis_nodes()
+    assert reader.namespaced_key("agworld:farms", "c1") == "agworld:farms:v0:c1"
+    writer.invalidate_namespace("agworld:farms")
+    wait_for(lambda: reader.namespaced_key("agworld:farms", "c1") == "agworld:farms:v1:c1")
+
+@pytest.fixture
+def pipelines(fake_redis, monkeypatch):
+    """Count pipelined round trips made through the fake Redis server"""
+    executed = []
+    server = fake_redis.redis_client
+    pipeline = server.pipeline
+    
+    def counting_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+        pipe.execute = lambda *a, **kw: executed.append(len(pipe.command_stack)) or execute(*a, **kw)
+        return pipe
+    
+    monkeypatch.setattr(server, "pipeline", counting_pipeline)
+    return executed
+
+def test_batch_flushes_writes_in_one_round_trip(fake_redis, pipelines):
+    redis_client.set("polling:fields:stale", 1)
+    with redis_client.batch() as batch:
+        batch.set("polling:fields:status", "completed", ex=60)
+        redis_client.set("polling:fields:error", None)
+        redis_client.delete("polling:fields:stale")
+        # Reads inside the block see the buffered writes
+        assert redis_client.get("polling:fields:status") == "completed"
+        assert redis_client.get("polling:fields:stale") is None
+        assert fake_redis.redis_client.exists("polling:fields:status") == 0
+    
+    assert pipelines == [3]
+    assert redis_client.get("polling:fields:status") == "completed"
+    assert 0 < fake_redis.redis_client.ttl("polling:fields:status") <= 60
+    assert fake_redis.redis_client.exists("polling:fields:stale") == 0
+
+def test_nested_batches_join_the_outer_one(fake_redis, pipelines):
+    with redis_client.batch():
+        redis_client.set("polling:fields:a", 1)
+        with redis_client.batch() as inner:
+            inner.set("polling:fields:b", 2)
+        assert pipelines == []
+        redis_client.set_many({"polling:fields:c": 3})
+    assert pipelines == [3]
+
+def test_batch_on_the_memory_fallback(memory_redis):
+    with redis_client.batch() as batch:
+        batch.set("polling:fields:status", "completed")
+        batch.delete("polling:fields:error")
+    assert redis_client.get("polling:fields:status") == "completed"
+
+def test_batch_invalidates_hot_keys_on_other_nodes(redis_nodes):
+    reader, writer = redis_nodes(), redis_nodes()
+    writer.set(HOT_KEY, ["old"])
+    reader.get(HOT_KEY)
+    with writer.batch() as batch:
+        batch.set(HOT_KEY, ["new"])
+    wait_for(lambda: HOT_KEY not in reader.local_cache)
+
+def test_collections_are_stored_with_their_freshness_marker_at_once(fake_redis, pipelines):
+    from app.services.agworld_client import AgworldAPIClient
+    AgworldAPIClient()._store_collection("agworld:fields:v0:all:all", [{"id": "f1"}], ttl=60)
+    assert pipelines == [2]
+    assert redis_client.exists("agworld:fields:v0:all:all:fresh")
+
+def test_processor_writes_join_the_callers_batch(fake_redis, pipelines):
+    from app.services.processor import processor
+    records = [{"id": f"f{i}", "name": f"Field {i}", "area": "10 ha"} for i in range(3)]
+    with redis_client.batch():
+        for record in records:
+            processor.process_agworld_data(record, "field", use_cache=False)
+    assert pipelines == [3]
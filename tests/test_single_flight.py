@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.services.single_flight import SingleFlight, single_flight
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def test_concurrent_calls_share_one_fetch(memory_redis):
+    flight = SingleFlight(lock_ttl=5)
+    calls = []
+    release = threading.Event()
+    
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return ["result"]
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", fetch))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: calls)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == [1]
+    assert results == [["result"]] * 8
+    assert not memory_redis.exists("lock:key")
+
+def test_errors_reach_every_waiter(memory_redis):
+    flight = SingleFlight(lock_ttl=5)
+    started = threading.Event()
+    
+    def fetch():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("API down")
+    
+    errors = []
+    
+    def call():
+        try:
+            flight.do("key", fetch)
+        except RuntimeError as e:
+            errors.append(str(e))
+    
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    call()
+    leader.join(5)
+    assert errors == ["API down", "API down"]
+    # A failed fetch is not remembered
+    assert flight.do("key", lambda: "ok") == "ok"
+
+def test_waits_for_a_fill_by_another_process(memory_redis):
+    flight = SingleFlight(lock_ttl=5, poll_interval=0.01)
+    memory_redis.set_if_absent("lock:key", "other-process", ex=5)
+    threading.Timer(0.05, lambda: memory_redis.set("key", "filled elsewhere")).start()
+    
+    result = flight.do("key", lambda: pytest.fail("fetched despite the lock"), cached=lambda: memory_redis.get("key"))
+    assert result == "filled elsewhere"
+    assert memory_redis.get("lock:key") == "other-process"
+
+def test_fetches_once_the_other_lock_is_gone(memory_redis):
+    flight = SingleFlight(lock_ttl=5, poll_interval=0.01)
+    memory_redis.set_if_absent("lock:key", "other-process", ex=5)
+    threading.Timer(0.05, lambda: memory_redis.delete("lock:key")).start()
+    assert flight.do("key", lambda: "fetched here", cached=lambda: None) == "fetched here"
+
+def test_lock_is_released_only_by_its_owner(fake_redis):
+    flight = SingleFlight(lock_ttl=5)
+    token = flight._acquire("key")
+    assert token and flight._acquire("key") is None
+    flight._release("key", "someone-else")
+    assert fake_redis.exists("lock:key")
+    flight._release("key", token)
+    assert not fake_redis.exists("lock:key")
+
+def test_async_calls_share_one_fetch(memory_redis):
+    flight = SingleFlight(lock_ttl=5)
+    calls = []
+    
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+    
+    async def run():
+        return await asyncio.gather(*(flight.do_async("key", fetch) for _ in range(5)))
+    
+    assert asyncio.run(run()) == ["result"] * 5
+    assert calls == [1]
+
+def test_stale_collection_is_served_while_refreshing(memory_redis, agworld_client):
+    cache_key = "agworld:fields:v0:test:all"
+    agworld_client._store_collection(cache_key, ["old"], 3600)
+    memory_redis.delete(f"{cache_key}:fresh")
+    release = threading.Event()
+    
+    def fetch():
+        release.wait(5)
+        return ["new"]
+    
+    assert agworld_client._cached_fetch("field", cache_key, 3600, fetch, lambda: ["mock"]) == ["old"]
+    # Only one refresh runs however many callers see the stale entry
+    assert agworld_client._cached_fetch("field", cache_key, 3600, fetch, lambda: ["mock"]) == ["old"]
+    assert len(single_flight._background) == 1
+    release.set()
+    wait_for(lambda: not single_flight._background)
+    assert agworld_client._cached_fetch("field", cache_key, 3600, fetch, lambda: ["mock"]) == ["new"]
+    assert memory_redis.exists(f"{cache_key}:fresh")
+
+def test_failed_refresh_keeps_the_stale_collection(memory_redis, agworld_client):
+    cache_key = "agworld:fields:v0:test-failing:all"
+    agworld_client._store_collection(cache_key, ["old"], 3600)
+    memory_redis.delete(f"{cache_key}:fresh")
+    
+    def fetch():
+        raise RuntimeError("API down")
+    
+    assert agworld_client._cached_fetch("field", cache_key, 3600, fetch, lambda: ["mock"]) == ["old"]
+    wait_for(lambda: not single_flight._background)
+    assert memory_redis.get(cache_key) == ["old"]
+
+def test_miss_falls_back_to_mock_data(memory_redis, agworld_client):
+    def fetch():
+        raise RuntimeError("API down")
+    
+    cache_key = "agworld:fields:v0:test-miss:all"
+    assert agworld_client._cached_fetch("field", cache_key, 3600, fetch, lambda: ["mock"]) == ["mock"]
+    assert memory_redis.get(cache_key) == ["mock"]
@@ -0,0 +1,23 @@
+from app.transforms import GENERIC_MAX_FIELDS, GENERIC_MAX_TEXT, generic_transform, transform_chunk, RecordError
+
+def test_generic_transform_keeps_scalar_fields():
+    raw = {"id": "x1", "name": "Thing", "count": 3, "active": True, "notes": None, "nested": {"a": 1}, "tags": ["a"]}
+    result = generic_transform(raw)
+    assert result["id"] == "x1"
+    assert result["data"] == {"id": "x1", "name": "Thing", "count": 3, "active": True, "notes": None}
+    assert result["omitted_fields"] == 2
+    assert result["summary"] == "Generic data with 7 fields"
+
+def test_generic_transform_is_bounded():
+    raw = {f"key{index}": "x" * (GENERIC_MAX_TEXT * 4) for index in range(GENERIC_MAX_FIELDS * 5)}
+    result = generic_transform(raw)
+    assert len(result["data"]) == GENERIC_MAX_FIELDS
+    assert all(len(value) == GENERIC_MAX_TEXT for value in result["data"].values())
+    assert result["omitted_fields"] == GENERIC_MAX_FIELDS * 4
+    assert result["id"] is None
+
+def test_unknown_types_use_the_generic_transform():
+    results = transform_chunk("unknown_type", [{"id": "x1", "blob": "y" * 10}, "not a record"])
+    assert results[0]["data"] == {"id": "x1", "blob": "y" * 10}
+    assert isinstance(results[1], RecordError)
+    assert results[1].index == 1
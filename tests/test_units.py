@@ -0,0 +1,50 @@
+import pytest
+from app.transforms import transform_registry
+from app.utils.units import AREA_UNIT, parse_quantities, parse_quantity
+
+@pytest.mark.parametrize("value, expected", [
+    ("25.5 ha", (25.5, "ha")),
+    ("  25.5ha  ", (25.5, "ha")),
+    ("1,234.5 ha", (1234.5, "ha")),
+    ("$1,200", (1200.0, "dollar")),
+    ("500 AUD", (500.0, "AUD")),
+    ("-3.2e2 kg", (-320.0, "kg")),
+    (".5 kg/ha", (0.5, "kg/ha")),
+    ("7", (7.0, None))
+])
+def test_parse_text(value, expected):
+    assert parse_quantity(value) == expected
+
+def test_area_units_convert_to_hectares():
+    number, unit = parse_quantity("10 acres")
+    assert unit == AREA_UNIT
+    assert number == pytest.approx(4.0468564224)
+    assert parse_quantity("1e4 m2") == (pytest.approx(1.0), AREA_UNIT)
+
+@pytest.mark.parametrize("value", ["12,5 ha", "1.000,5 ha", "1,23 ha", "12,5"])
+def test_decimal_comma_is_rejected(value):
+    assert parse_quantity(value) == (None, None)
+
+@pytest.mark.parametrize("value", ["", "   ", "abc", "ha", "1..5 ha", None, True, [], {"value": 1}])
+def test_unparseable(value):
+    assert parse_quantity(value, "ha") == (None, None)
+
+def test_default_unit():
+    assert parse_quantity(3, "ha") == (3.0, "ha")
+    assert parse_quantity(2.5) == (2.5, None)
+    assert parse_quantity("3", "ha") == (3.0, "ha")
+    assert parse_quantity("3 ac", "dollar")[1] == "ha"
+
+def test_parse_quantities():
+    assert parse_quantities(["1 ha", None, 2], "ha") == ([1.0, None, 2.0], ["ha", None, "ha"])
+
+def test_cost_unit_is_the_shared_currency():
+    transform = transform_registry.get("activity")
+    record = transform({"id": "a1", "total_cost": "$1,200", "seed_cost": "200 dollar", "chemical_cost": None})
+    assert (record.cost_unit, record.total_cost, record.seed_cost) == ("dollar", 1200.0, 200.0)
+    assert transform({"id": "a2", "total_cost": 1200}).cost_unit is None
+
+def test_mixed_currencies_have_no_cost_unit():
+    record = transform_registry.get("field")({"id": "f1", "chemical_cost": "$100", "seed_cost": "500 AUD"})
+    assert record.cost_unit is None
+    assert (record.chemical_cost, record.seed_cost) == (100.0, 500.0)